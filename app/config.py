@@ -91,6 +91,8 @@ TTS_VOICE = _env("TTS_VOICE", "alloy")
 # Local model defaults
 OLLAMA_MODEL = _env("OLLAMA_MODEL", "llama3.1:8b")
 OLLAMA_MODEL_CHAT = _env("OLLAMA_MODEL_CHAT", OLLAMA_MODEL)
+# how long Ollama keeps the model (and its prompt KV cache) loaded after a request
+OLLAMA_KEEP_ALIVE = _env("OLLAMA_KEEP_ALIVE", "30m").strip() or "30m"
 
 # OpenAI models (defaults can be overridden via .env)
 OPENAI_MODEL_CHAT = _env("OPENAI_MODEL_CHAT", "gpt-4.1")
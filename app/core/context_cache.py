@@ -0,0 +1,97 @@
+"""Registry of file-backed prompt context blocks (primer, handoff, notes, visual memory).
+
+Each source is read and parsed once and served from RAM until its (mtime, size)
+stamp changes. The stamp is re-checked at most every CONTEXT_RECHECK seconds, so
+steady-state prompt assembly does no disk I/O; writers that update a source in
+process call invalidate() to make the change visible immediately.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+CONTEXT_RECHECK = max(0.0, float(os.getenv("CONTEXT_CACHE_RECHECK", "1.0") or 1.0))
+
+
+class _Source:
+    __slots__ = ("name", "path", "parse", "default", "value", "stamp", "checked", "hits", "misses", "error")
+
+    def __init__(self, name: str, path: Path, parse: Callable[[str], Any], default: Any) -> None:
+        self.name = name
+        self.path = Path(path)
+        self.parse = parse
+        self.default = default
+        self.value = default
+        self.stamp: tuple[int, int] | None = None
+        self.checked = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.error = ""
+
+
+class ContextCache:
+    def __init__(self, recheck: float = CONTEXT_RECHECK) -> None:
+        self.recheck = recheck
+        self._sources: dict[str, _Source] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: Path, parse: Callable[[str], Any], default: Any = None) -> None:
+        """Add (or re-point) a source; parse receives the file text, missing files give default."""
+        with self._lock:
+            self._sources[name] = _Source(name, path, parse, default)
+
+    def get(self, name: str) -> Any:
+        """Parsed value of a source; treat it as read-only (it is shared between callers)."""
+        src = self._sources[name]
+        now = time.monotonic()
+        if src.stamp is not None and now - src.checked < self.recheck:
+            src.hits += 1
+            return src.value
+        try:
+            st = src.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = (0, -1)
+        with self._lock:
+            src.checked = now
+            if stamp == src.stamp:
+                src.hits += 1
+                return src.value
+            src.misses += 1
+            value = src.default
+            if stamp[1] >= 0:
+                try:
+                    value = src.parse(src.path.read_text(encoding="utf-8", errors="ignore"))
+                    src.error = ""
+                except Exception as exc:
+                    src.error = str(exc)
+            src.value = value
+            src.stamp = stamp
+            return value
+
+    def invalidate(self, name: str | None = None) -> None:
+        with self._lock:
+            for src in [self._sources[name]] if name else self._sources.values():
+                src.stamp = None
+
+    def stats(self) -> dict:
+        sources = {
+            src.name: {
+                "path": str(src.path),
+                "hits": src.hits,
+                "misses": src.misses,
+                "cached": src.stamp is not None and src.stamp[1] >= 0,
+                "error": src.error,
+            }
+            for src in list(self._sources.values())
+        }
+        return {
+            "hits": sum(s["hits"] for s in sources.values()),
+            "misses": sum(s["misses"] for s in sources.values()),
+            "sources": sources,
+        }
+
+
+# shared by the server and systems.audio
+context_cache = ContextCache()
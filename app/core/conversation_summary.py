@@ -0,0 +1,222 @@
+"""Rolling summary of conversation turns that aged out of the prompt window.
+
+Prompts carry only the newest SUMMARY_KEEP_RECENT turns verbatim; older ones are
+condensed into one cached block. update(turns) is cheap enough to call on every
+turn: it only notes which turns have aged out since the last summary. Once at
+least SUMMARY_CHUNK of them are waiting and the conversation has been quiet for
+SUMMARY_IDLE seconds (or the backlog reaches three chunks), a daemon thread
+folds them into the summary with the `summarize(previous, turns)` callback and
+saves the result to a JSON file, so it survives restarts. Without a callback, or
+when it fails or returns nothing, an extractive digest (each turn's first
+sentence) is used. text() never blocks.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+from core.prompt_budget import estimate_tokens
+
+SUMMARY_KEEP_RECENT = max(2, int(os.getenv("SUMMARY_KEEP_RECENT", "24") or 24))
+SUMMARY_CHUNK = max(1, int(os.getenv("SUMMARY_CHUNK", "8") or 8))
+SUMMARY_IDLE = max(0.0, float(os.getenv("SUMMARY_IDLE", "20") or 0))
+SUMMARY_MAX_CHARS = max(200, int(os.getenv("SUMMARY_MAX_CHARS", "1200") or 1200))
+_MAX_INPUT_TURNS = SUMMARY_CHUNK * 6  # after a long gap, only the newest aged-out turns are folded in
+
+Turn = tuple[str, str]  # (role, text)
+Summarizer = Callable[[str, list[Turn]], Optional[str]]
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def _fingerprint(turns: Sequence[Turn]) -> str:
+    digest = hashlib.sha1()
+    for role, text in turns:
+        digest.update(f"{role}\0{text}\0".encode("utf-8", errors="ignore"))
+    return digest.hexdigest()
+
+
+def extractive_summary(previous: str, turns: Sequence[Turn], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Previous summary plus the first sentence of each turn, trimmed from the oldest end."""
+    lines = [previous] if previous else []
+    for role, text in turns:
+        first = _SENTENCE_RE.split((text or "").strip(), 1)[0][:160]
+        if first:
+            lines.append(f"{'User' if role == 'user' else 'Assistant'}: {first}")
+    joined = "\n".join(lines)
+    return joined[-max_chars:].lstrip() if len(joined) > max_chars else joined
+
+
+def summary_prompt(previous: str, turns: Sequence[Turn], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Instruction for a model-backed summarize callback."""
+    lines = "\n".join(f"{'User' if role == 'user' else 'Assistant'}: {text}" for role, text in turns)
+    return (
+        "Update the running summary of an ongoing conversation. Keep facts about the user, "
+        "decisions, open requests and promises; drop small talk. Write plain third-person notes, "
+        f"at most {max_chars} characters, and reply with the summary only.\n\n"
+        f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{lines}"
+    )
+
+
+class RollingSummary:
+    def __init__(
+        self,
+        path: Path,
+        summarize: Optional[Summarizer] = None,
+        keep_recent: int = SUMMARY_KEEP_RECENT,
+        chunk: int = SUMMARY_CHUNK,
+        idle: float = SUMMARY_IDLE,
+        max_chars: int = SUMMARY_MAX_CHARS,
+    ) -> None:
+        self.path = Path(path)
+        self.summarize = summarize
+        self.keep_recent = keep_recent
+        self.chunk = chunk
+        self.idle = idle
+        self.max_chars = max_chars
+        self._text = ""
+        self._mark = ""  # fingerprint of the last two summarized turns
+        self._covered = 0
+        self._updated = 0.0
+        self._pending: list[Turn] = []
+        self._last_activity = 0.0
+        self._runs = 0
+        self._fallbacks = 0
+        self._last_ms = 0.0
+        self._generation = 0  # bumped by clear(); a fold that started before it is discarded
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    # --- persistence ------------------------------------------------------------
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        self._text = str(data.get("text") or "")
+        self._mark = str(data.get("mark") or "")
+        self._covered = int(data.get("turns") or 0)
+        self._updated = float(data.get("updated") or 0.0)
+
+    def _save(self) -> None:
+        data = {"text": self._text, "mark": self._mark, "turns": self._covered, "updated": self._updated}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+    # --- request path -----------------------------------------------------------
+    def text(self) -> str:
+        """The cached summary as a prompt block ("" until something was summarized)."""
+        text = self._text
+        return f"Earlier conversation (summary):\n{text}" if text else ""
+
+    def update(self, turns: Sequence[Turn]) -> None:
+        """Note the recent turns (oldest first); schedules a background fold when enough aged out."""
+        older = list(turns[: max(0, len(turns) - self.keep_recent)])
+        with self._lock:
+            self._last_activity = time.monotonic()
+            self._pending = self._unsummarized(older)[-_MAX_INPUT_TURNS:]
+            ready = len(self._pending) >= self.chunk
+        if ready:
+            self._ensure_thread()
+            self._wake.set()
+
+    def _unsummarized(self, older: list[Turn]) -> list[Turn]:
+        if not self._mark:
+            return older
+        for end in range(len(older), 1, -1):
+            if _fingerprint(older[end - 2 : end]) == self._mark:
+                return older[end:]
+        # the marked turns fell out of the window: everything visible is new
+        return older
+
+    def clear(self) -> None:
+        """Forget the summary (memory reset or deleted entries it may quote)."""
+        with self._lock:
+            if not self._text and not self._mark:
+                return
+            self._text = ""
+            self._mark = ""
+            self._covered = 0
+            self._pending = []
+            self._updated = time.time()
+            self._generation += 1
+        self._save()
+
+    # --- background -------------------------------------------------------------
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="conversation-summary", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while True:
+                with self._lock:
+                    quiet = time.monotonic() - self._last_activity
+                    backlog = len(self._pending)
+                if quiet >= self.idle or backlog >= self.chunk * 3:
+                    break
+                time.sleep(min(1.0, self.idle - quiet))
+            self.run_once()
+
+    def run_once(self) -> bool:
+        """Fold the pending turns into the summary now; False if fewer than a chunk are waiting."""
+        with self._lock:
+            batch = list(self._pending)
+            previous = self._text
+            generation = self._generation
+        if len(batch) < self.chunk:
+            return False
+        started = time.perf_counter()
+        summary = ""
+        if self.summarize is not None:
+            try:
+                summary = (self.summarize(previous, batch) or "").strip()
+            except Exception:
+                summary = ""
+        if not summary:
+            self._fallbacks += 1
+            summary = extractive_summary(previous, batch, self.max_chars)
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._text = summary[: self.max_chars]
+            self._mark = _fingerprint(batch[-2:])
+            self._covered += len(batch)
+            self._pending = []
+            self._updated = time.time()
+            self._runs += 1
+            self._last_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        self._save()
+        return True
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "chars": len(self._text),
+                "est_tokens": estimate_tokens(self._text),
+                "turns_summarized": self._covered,
+                "pending_turns": len(self._pending),
+                "keep_recent": self.keep_recent,
+                "chunk": self.chunk,
+                "updated": self._updated,
+                "runs": self._runs,
+                "extractive_fallbacks": self._fallbacks,
+                "last_run_ms": self._last_ms,
+            }
@@ -3,10 +3,18 @@ import os
 import re
 from pathlib import Path
 import datetime
+import threading
 import time
 import uuid
+from collections.abc import Collection, Mapping
+from typing import Callable
 
 from core.issue_log import log_issue
+from core.memory_cold import ColdStore
+from core.memory_index import STOPWORDS, MemoryIndex, query_terms
+from core.memory_record import MemoryRecord, content_hash, entry_id
+from core.memory_sqlite import SqliteMemoryBackend
+from core.memory_vectors import SemanticIndex
 
 from config import PRIVATE_MODE
 
@@ -19,10 +27,50 @@ else:
     MEMORY_PATH = DATA_DIR / "memory.json"
 # Export folder follows the chosen memory path
 CACHE_DIR = MEMORY_PATH.parent / "memory_exports"
-CACHE_HISTORY = 26000  # entries kept in RAM + disk to maintain prompt history
+CACHE_HISTORY = 26000  # hot window: newest entries kept in RAM for timelines/prompts
+# JSON backend: older entries spill (at compaction) into compressed cold segments, in
+# chunks of at least COLD_SPILL_MIN so segments stay reasonably sized.
+COLD_PATH = MEMORY_PATH.with_name(MEMORY_PATH.stem + ".cold")
+COLD_SPILL_MIN = max(1, int(os.getenv("MEMORY_COLD_SPILL", "4000") or 4000))
+# Storage backend: json (memory.json + journal) or sqlite (WAL + FTS5, full history on disk)
+BACKEND = os.getenv("MEMORY_BACKEND", "json").strip().lower() or "json"
+ENV_DB_PATH = os.getenv("MEMORY_DB_PATH", "").strip()
+DB_PATH = Path(ENV_DB_PATH).expanduser().resolve() if ENV_DB_PATH else MEMORY_PATH.with_suffix(".sqlite3")
+# Append-only journal: each turn is one JSON line instead of a full snapshot rewrite.
+JOURNAL_ENABLED = os.getenv("MEMORY_JOURNAL", "1").strip().lower() not in {"0", "false", "no", "off"}
+JOURNAL_PATH = MEMORY_PATH.with_name(MEMORY_PATH.stem + ".journal.jsonl")
+JOURNAL_COMPACT_EVERY = max(1, int(os.getenv("MEMORY_JOURNAL_COMPACT_EVERY", "500") or 500))
+JOURNAL_FSYNC = os.getenv("MEMORY_JOURNAL_FSYNC", "0").strip().lower() in {"1", "true", "yes", "on"}
+# Ranked recall: recency half-life measured in entries, per-hit clip for prompt blocks.
+RECALL_HALF_LIFE = max(1, int(os.getenv("MEMORY_RECALL_HALF_LIFE", "2000") or 2000))
+RECALL_ITEM_CHARS = 400
+# bm25 | semantic | hybrid (semantic needs numpy; falls back to bm25 until vectors exist)
+RECALL_MODE = os.getenv("MEMORY_RECALL_MODE", "hybrid").strip().lower() or "hybrid"
+# newest cold segments a search/recall may open (keeps their sidecar indexes in INDEX_CACHE)
+COLD_SEARCH_SEGMENTS = max(1, int(os.getenv("MEMORY_COLD_SEARCH_SEGMENTS", "16") or 16))
+SEMANTIC_ENABLED = os.getenv("MEMORY_SEMANTIC", "1").strip().lower() not in {"0", "false", "no", "off"}
 
 memory_data: dict = {}
 conversation: list = []
+_lock = threading.RLock()
+_compact_lock = threading.Lock()
+_compact_again = False  # compact_memory() was called while a compaction was running
+_journal_seq = 0  # last sequence number written to the journal
+_journal_pending = 0  # records written since the last compaction
+_db: SqliteMemoryBackend | None = None
+# Stable IDs: id -> entry, plus an absolute-position hint so deletes skip the list scan.
+_by_id: dict[str, dict] = {}
+_pos_hint: dict[str, int] = {}
+_pos_base = 0  # absolute position of conversation[0]
+_pos_drift = 0  # middle deletions since hints were rebuilt (max shift of any hint)
+_index = MemoryIndex()
+_cold = ColdStore(COLD_PATH)
+_vectors = SemanticIndex(MEMORY_PATH) if SEMANTIC_ENABLED else None
+# Change listeners: callback(event, entries) for event add | remove | evict | reset.
+# remove is a real deletion; evict means the entries only left the hot window (RAM cap
+# or cold spill) and are still stored; reset passes the whole hot window. They run
+# under _lock, so keep them cheap and never write back into core.memory from one.
+_listeners: list[Callable[[str, list], None]] = []
 # Persistence is on by default so he always remembers, regardless of PRIVATE_MODE,
 # but the UI toggle can still disable it for privacy.
 persist_enabled = True
@@ -98,8 +146,8 @@ def _read_memory_raw(path: Path):
         return None
 
 
-def _normalize_entry(entry) -> dict | None:
-    if isinstance(entry, dict):
+def _normalize_entry(entry) -> MemoryRecord | None:
+    if isinstance(entry, Mapping):
         content = entry.get("content")
         if content is None:
             content = entry.get("text")
@@ -111,13 +159,13 @@ def _normalize_entry(entry) -> dict | None:
         ts = entry.get("timestamp") or entry.get("time") or entry.get("created_at")
         if not isinstance(ts, str) or not ts:
             ts = datetime.datetime.utcnow().isoformat() + "Z"
-        return {"role": role, "content": content, "timestamp": ts}
+        mem_id = entry.get("id")
+        if not isinstance(mem_id, str) or not mem_id:
+            mem_id = entry_id(role, ts, content)
+        return MemoryRecord(mem_id, role, content, ts)
     if isinstance(entry, str) and entry.strip():
-        return {
-            "role": "system",
-            "content": entry.strip(),
-            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        }
+        ts = datetime.datetime.utcnow().isoformat() + "Z"
+        return MemoryRecord(entry_id("system", ts, entry.strip()), "system", entry.strip(), ts)
     return None
 
 
@@ -150,7 +198,7 @@ def _merge_legacy_memory():
     if not legacy_conv:
         migrations["legacy_merge_done"] = datetime.datetime.utcnow().isoformat() + "Z"
         return
-    existing = {(e.get("role"), e.get("content")) for e in memory_data.get("conversation", []) if isinstance(e, dict)}
+    existing = {(e.get("role"), e.get("content")) for e in memory_data.get("conversation", []) if isinstance(e, Mapping)}
     merged = memory_data.get("conversation", [])
     added = 0
     for entry in legacy_conv:
@@ -163,53 +211,494 @@ def _merge_legacy_memory():
     memory_data["conversation"] = merged
     migrations["legacy_merge_done"] = datetime.datetime.utcnow().isoformat() + "Z"
     if added:
-        _persist_memory_file()
+        compact_memory()
 
 
-def load_memory():
-    global conversation, memory_data
-    if os.path.exists(MEMORY_PATH):
-        raw = _read_memory_raw(MEMORY_PATH)
+def _read_json_state(path: Path, journal_path: Path) -> tuple[dict, int]:
+    """memory.json snapshot with newer journal records applied; returns (data, replayed)."""
+    global _journal_seq, _journal_pending
+    if os.path.exists(path):
+        raw = _read_memory_raw(path)
         if raw is None:
-            memory_data = _empty_memory()
+            data = _empty_memory()
         elif isinstance(raw, list):
-            memory_data = _empty_memory()
-            memory_data["conversation"] = raw
+            data = _empty_memory()
+            data["conversation"] = raw
         elif isinstance(raw, dict):
-            memory_data = raw
+            data = raw
         else:
-            memory_data = _empty_memory()
+            data = _empty_memory()
     else:
-        memory_data = _empty_memory()
+        data = _empty_memory()
         print(
             f" No prior memory log found (state: {'persistent' if persist_enabled else 'private'})."
         )
-    if "conversation" not in memory_data or not isinstance(memory_data["conversation"], list):
-        memory_data["conversation"] = []
-    memory_data["conversation"] = _normalize_conversation(memory_data["conversation"])
-    if "storytime" not in memory_data or not isinstance(memory_data["storytime"], list):
-        memory_data["storytime"] = []
-    memory_data.setdefault("version", 2)
-    memory_data.setdefault("migrations", {})
-    _merge_legacy_memory()
-    conversation = memory_data["conversation"]
+    if "conversation" not in data or not isinstance(data["conversation"], list):
+        data["conversation"] = []
+    # entries without a persisted id get one now; load_memory snapshots so it sticks
+    data["ids_assigned"] = any(
+        not (isinstance(e, dict) and isinstance(e.get("id"), str) and e.get("id"))
+        for e in data["conversation"]
+    )
+    data["conversation"] = _normalize_conversation(data["conversation"])
+    if "storytime" not in data or not isinstance(data["storytime"], list):
+        data["storytime"] = []
+    data.setdefault("version", 2)
+    data.setdefault("migrations", {})
+    base_seq = data.get("journal_seq")
+    if not isinstance(base_seq, int):
+        base_seq = 0
+    last_seq = base_seq
+    replayed = 0
+    for rec in _read_journal(journal_path):
+        if rec["seq"] <= base_seq:
+            continue
+        if _apply_record(rec, data):
+            replayed += 1
+        last_seq = max(last_seq, rec["seq"])
+    if journal_path == JOURNAL_PATH:
+        _journal_seq = last_seq
+        _journal_pending = replayed
+    return data, replayed
+
+
+def _get_db() -> SqliteMemoryBackend:
+    global _db
+    if _db is None:
+        _db = SqliteMemoryBackend(DB_PATH)
+    return _db
+
+
+def migrate_json_to_sqlite(db: SqliteMemoryBackend, json_path: Path | None = None) -> int:
+    """One-shot import of memory.json (+ its journal) into the SQLite backend."""
+    json_path = Path(json_path or MEMORY_PATH)
+    journal_path = json_path.with_name(json_path.stem + ".journal.jsonl")
+    data, _ = _read_json_state(json_path, journal_path)
+    migrations = dict(data.get("migrations") or {})
+    migrations["sqlite_migrated"] = datetime.datetime.utcnow().isoformat() + "Z"
+    # cold segments hold the older history; copy them first to keep rows in order
+    cold = ColdStore(json_path.with_name(json_path.stem + ".cold"))
+    migrated = 0
+    hot_ids = {e.get("id") for e in data["conversation"]}
+    batch: list[dict] = []
+    for entry in cold.iter_entries():
+        if entry.get("id") in hot_ids:
+            continue
+        batch.append(entry)
+        if len(batch) >= 2000:
+            migrated += db.insert_entries(batch)
+            batch = []
+    if batch:
+        migrated += db.insert_entries(batch)
+    migrated += db.import_snapshot(data["conversation"], data["storytime"], migrations)
+    db.set_meta("json_source", str(json_path))
+    return migrated
+
+
+def _read_sqlite_state() -> dict:
+    db = _get_db()
+    if not db.count() and db.get_meta("json_source") is None and MEMORY_PATH.exists():
+        migrated = migrate_json_to_sqlite(db)
+        print(f" Memory migrated to SQLite ({migrated} entries -> {DB_PATH}).")
+    data = _empty_memory()
+    data["conversation"] = db.tail(_ram_limit())
+    data["storytime"] = db.stories()
+    data["migrations"] = db.get_meta("migrations", {}) or {}
+    return data
+
+
+def _ram_limit() -> int:
+    """Hard RAM cap where trimming drops entries: SQLite (history on disk) or unpersisted JSON.
+
+    Persisted JSON memory is never trimmed here; compaction spills it to the cold tier.
+    """
+    return CACHE_HISTORY if BACKEND == "sqlite" else CACHE_HISTORY * 3
+
+
+def _spill_due() -> bool:
+    return BACKEND != "sqlite" and len(conversation) - CACHE_HISTORY >= COLD_SPILL_MIN
+
+
+def load_memory():
+    global conversation, memory_data
+    replayed = 0
+    if BACKEND == "sqlite":
+        data = _read_sqlite_state()
+    else:
+        data, replayed = _read_json_state(MEMORY_PATH, JOURNAL_PATH)
+    ids_assigned = bool(data.pop("ids_assigned", False))
+    reconciled = False
+    if BACKEND != "sqlite":
+        # a crash between a cold spill and the next snapshot leaves spilled rows in both
+        spilled_gen = data.get("cold_generation")
+        spilled_gen = spilled_gen if isinstance(spilled_gen, int) else 0
+        if _cold.generation > spilled_gen:
+            spilled = _cold.ids_after(spilled_gen)
+            data["conversation"] = [e for e in data["conversation"] if e.get("id") not in spilled]
+            reconciled = True
+    with _lock:
+        memory_data = data
+        conversation = memory_data["conversation"]
+        if BACKEND == "sqlite" and len(conversation) > _ram_limit():
+            del conversation[: -_ram_limit()]
+    if BACKEND != "sqlite":
+        _merge_legacy_memory()
+    with _lock:
+        _rebuild_indexes()
     state = "persistent" if persist_enabled else "private / volatile"
     print(f" Memory loaded ({len(conversation)} convo entries, {state}).")
-    _persist_memory_file()
+    if replayed:
+        print(f" Memory journal replayed ({replayed} records).")
+    if BACKEND != "sqlite" and (
+        not JOURNAL_ENABLED or replayed or ids_assigned or reconciled or _spill_due() or not MEMORY_PATH.exists()
+    ):
+        compact_memory()
     return conversation
 
 
-def _persist_memory_file():
+def subscribe(callback: Callable[[str, list], None]) -> None:
+    """Register a change listener (see _listeners); it is primed with a reset event."""
+    with _lock:
+        if callback not in _listeners:
+            _listeners.append(callback)
+            _call_listener(callback, "reset", conversation)
+
+
+def unsubscribe(callback: Callable[[str, list], None]) -> None:
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def _call_listener(callback: Callable[[str, list], None], event: str, entries: list) -> None:
+    try:
+        callback(event, entries)
+    except Exception as exc:
+        log_issue(
+            "PHX-MEM-024",
+            "memory_listener_failed",
+            f"{getattr(callback, '__qualname__', callback)}: {exc}",
+            source="memory",
+            severity="warning",
+        )
+
+
+def _notify(event: str, entries: list) -> None:
+    for callback in tuple(_listeners):
+        _call_listener(callback, event, entries)
+
+
+def _index_listener(event: str, entries: list) -> None:
+    if event == "add":
+        for entry in entries:
+            _index.add(entry)
+    elif event in ("remove", "evict"):
+        _index.remove(entries)
+    else:
+        _index.rebuild(entries)
+
+
+def _vector_listener(event: str, entries: list) -> None:
+    if event == "add":
+        for entry in entries:
+            _vectors.add(entry)
+    elif event in ("remove", "evict"):
+        _vectors.remove(entries)
+    else:
+        _vectors.rebuild(entries)
+
+
+subscribe(_index_listener)
+if _vectors is not None:
+    subscribe(_vector_listener)
+
+
+def _rebuild_indexes() -> None:
+    """Rebuild id/position hints and reset every listener (token/vector indexes, views)."""
+    global _pos_base, _pos_drift
+    _by_id.clear()
+    _pos_hint.clear()
+    _pos_base = 0
+    _pos_drift = 0
+    for pos, entry in enumerate(conversation):
+        _register_id(entry, pos)
+    _notify("reset", conversation)
+
+
+def _register_id(entry: dict, pos: int) -> None:
+    mem_id = entry.get("id") or entry_id(entry.get("role"), entry.get("timestamp"), entry.get("content", ""))
+    if mem_id in _by_id and _by_id[mem_id] is not entry:
+        # identical role/timestamp/content (legacy duplicates): disambiguate once, then persist
+        suffix = 2
+        while f"{mem_id}-{suffix}" in _by_id:
+            suffix += 1
+        mem_id = f"{mem_id}-{suffix}"
+    entry["id"] = mem_id
+    _by_id[mem_id] = entry
+    _pos_hint[mem_id] = _pos_base + pos
+
+
+def _locate(mem_id: str) -> int | None:
+    """Current list index of mem_id: the hint minus at most _pos_drift shifts."""
+    entry = _by_id.get(mem_id)
+    if entry is None:
+        return None
+    hint = _pos_hint.get(mem_id, 0) - _pos_base
+    hi = min(hint, len(conversation) - 1)
+    lo = max(0, hint - _pos_drift)
+    for idx in range(hi, lo - 1, -1):
+        if conversation[idx] is entry:
+            return idx
+    for idx, candidate in enumerate(conversation):
+        if candidate is entry:
+            return idx
+    return None
+
+
+def _read_journal(path: Path = JOURNAL_PATH) -> list[dict]:
+    """Parse journal records, skipping a torn trailing line from a crash."""
+    if not path.exists():
+        return []
+    records: list[dict] = []
+    try:
+        with path.open("r", encoding="utf-8", errors="ignore") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue
+                if isinstance(rec, dict) and isinstance(rec.get("seq"), int):
+                    records.append(rec)
+    except Exception as exc:
+        log_issue(
+            "PHX-MEM-016",
+            "memory_journal_read_failed",
+            str(exc),
+            source="memory",
+            extra={"path": str(path)},
+        )
+    return records
+
+
+def _apply_record(rec: dict, data: dict) -> bool:
+    conv = data["conversation"]
+    op = rec.get("op")
+    if op == "add":
+        entry = _normalize_entry(rec.get("entry"))
+        if not entry:
+            return False
+        conv.append(entry)
+        return True
+    if op == "pop":
+        count = rec.get("count")
+        if not isinstance(count, int) or count <= 0:
+            return False
+        del conv[-count:]
+        return True
+    if op == "replace":
+        entries = rec.get("entries")
+        if not isinstance(entries, list):
+            return False
+        conv[:] = _normalize_conversation(entries)
+        return True
+    if op == "delete":
+        ids = set(rec.get("ids") or [])
+        if ids:
+            before = len(conv)
+            conv[:] = [e for e in conv if e.get("id") not in ids]
+            return len(conv) < before
+        keys = rec.get("keys")
+        if not isinstance(keys, list):
+            return False
+        return bool(_remove_matching(conv, keys))
+    if op == "story":
+        entry = rec.get("entry")
+        if not isinstance(entry, dict):
+            return False
+        bucket = data.setdefault("storytime", [])
+        bucket.append(entry)
+        if len(bucket) > 200:
+            del bucket[:-200]
+        return True
+    return False
+
+
+def _entry_key(entry: dict) -> list:
+    return [entry.get("role"), entry.get("timestamp"), content_hash(entry.get("content", ""))]
+
+
+def _remove_matching(conv: list, keys: list) -> list[dict]:
+    """Remove the newest entry matching each [role, timestamp, content_hash] key."""
+    removed: list[dict] = []
+    for key in keys:
+        if not isinstance(key, list) or len(key) != 3:
+            continue
+        for idx in range(len(conv) - 1, -1, -1):
+            if _entry_key(conv[idx]) == key:
+                removed.append(conv.pop(idx))
+                break
+    return removed
+
+
+def _journal_write(records: list[dict]) -> bool:
+    """Append records to the journal; returns False when the caller must snapshot instead."""
+    global _journal_seq, _journal_pending
+    if not JOURNAL_ENABLED or not records:
+        return False
+    with _lock:
+        lines = []
+        for rec in records:
+            _journal_seq += 1
+            rec = dict(rec, seq=_journal_seq)
+            lines.append(json.dumps(rec, ensure_ascii=False, default=dict))
+        try:
+            os.makedirs(JOURNAL_PATH.parent, exist_ok=True)
+            with JOURNAL_PATH.open("a", encoding="utf-8") as handle:
+                handle.write("\n".join(lines) + "\n")
+                if JOURNAL_FSYNC:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+        except Exception as exc:
+            log_issue(
+                "PHX-MEM-017",
+                "memory_journal_write_failed",
+                str(exc),
+                source="memory",
+                extra={"path": str(JOURNAL_PATH)},
+            )
+            return False
+        _journal_pending += len(records)
+        due = _journal_pending >= JOURNAL_COMPACT_EVERY
+    if due:
+        _schedule_compaction()
+    return True
+
+
+def _schedule_compaction() -> None:
+    if _compact_lock.locked():
+        return
+    threading.Thread(target=compact_memory, name="memory-compact", daemon=True).start()
+
+
+def compact_memory() -> None:
+    """Fold the journal into memory.json, then drop the folded journal records.
+
+    A call that lands while another compaction is running makes that one go again,
+    so a change made after its snapshot was taken still reaches memory.json.
+    """
+    global _compact_again
+    if BACKEND == "sqlite":
+        _get_db().checkpoint()
+        return
+    with _lock:
+        if not _compact_lock.acquire(blocking=False):
+            _compact_again = True
+            return
+        _compact_again = False
+    try:
+        while True:
+            _compact_once()
+            with _lock:
+                if not _compact_again:
+                    _compact_lock.release()
+                    return
+                _compact_again = False
+    except BaseException:
+        _compact_lock.release()
+        raise
+
+
+def _compact_once() -> None:
+    global _journal_pending
+    if persist_enabled and _spill_due():
+        _spill_to_cold()
+    with _lock:
+        snapshot = dict(memory_data)
+        snapshot["conversation"] = list(conversation)
+        snapshot["storytime"] = list(memory_data.get("storytime", []))
+        snapshot["journal_seq"] = _journal_seq
+        snapshot["cold_generation"] = _cold.generation
+        folded = _journal_pending
+    if not _persist_memory_file(snapshot):
+        return
+    with _lock:
+        memory_data["journal_seq"] = snapshot["journal_seq"]
+        _journal_pending = max(0, _journal_pending - folded)
+        _truncate_journal(snapshot["journal_seq"])
+
+
+def _spill_to_cold() -> None:
+    """Move everything older than the hot window into a new cold segment (compaction only)."""
+    global _pos_base
+    with _lock:
+        spill = conversation[: len(conversation) - CACHE_HISTORY]
+    if not spill:
+        return
+    try:
+        _cold.write(spill)
+    except Exception as exc:
+        log_issue(
+            "PHX-MEM-023",
+            "memory_cold_spill_failed",
+            str(exc),
+            source="memory",
+            extra={"path": str(COLD_PATH)},
+        )
+        return
+    spilled = {e.get("id") for e in spill}
+    with _lock:
+        # spilled rows are a prefix of the list unless some were deleted meanwhile
+        keep_from = 0
+        while keep_from < len(conversation) and conversation[keep_from].get("id") in spilled:
+            keep_from += 1
+        moved = conversation[:keep_from]
+        del conversation[:keep_from]
+        _pos_base += keep_from
+        _drop_from_indexes(moved, "evict")
+    gone = spilled - {e.get("id") for e in moved}
+    if gone:
+        _cold.delete(gone)
+
+
+def _truncate_journal(upto_seq: int) -> None:
+    """Keep only journal records written after the snapshot at upto_seq."""
+    if not JOURNAL_PATH.exists():
+        return
+    keep = [rec for rec in _read_journal(JOURNAL_PATH) if rec["seq"] > upto_seq]
+    try:
+        if not keep:
+            JOURNAL_PATH.unlink()
+            return
+        tmp = JOURNAL_PATH.with_suffix(f".tmp.{uuid.uuid4().hex}")
+        tmp.write_text(
+            "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in keep),
+            encoding="utf-8",
+        )
+        os.replace(tmp, JOURNAL_PATH)
+    except Exception as exc:
+        log_issue(
+            "PHX-MEM-018",
+            "memory_journal_truncate_failed",
+            str(exc),
+            source="memory",
+            extra={"path": str(JOURNAL_PATH)},
+        )
+
+
+def _persist_memory_file(snapshot: dict | None = None) -> bool:
     """Atomic-ish save to avoid WinError 5; fallback to direct write on failure."""
     os.makedirs(MEMORY_PATH.parent, exist_ok=True)
-    payload = json.dumps(memory_data, indent=2, ensure_ascii=False)
+    payload = json.dumps(memory_data if snapshot is None else snapshot, indent=2, ensure_ascii=False, default=dict)
     last_err = None
     for attempt in range(3):
         tmp = MEMORY_PATH.with_suffix(f".tmp.{uuid.uuid4().hex}")
         try:
             tmp.write_text(payload, encoding="utf-8")
             os.replace(tmp, MEMORY_PATH)
-            return
+            return True
         except Exception as exc:
             last_err = exc
             try:
@@ -220,6 +709,7 @@ def _persist_memory_file():
             time.sleep(0.2 * (attempt + 1))
     try:
         MEMORY_PATH.write_text(payload, encoding="utf-8")
+        return True
     except Exception:
         if last_err:
             log_issue(
@@ -229,61 +719,181 @@ def _persist_memory_file():
                 source="memory",
                 extra={"path": str(MEMORY_PATH)},
             )
+        return False
 
 
 def save_memory():
+    """Write a full snapshot now (shutdown/sleep); turns normally go through the journal."""
     if not persist_enabled:
         return
-    memory_data["conversation"] = conversation[-CACHE_HISTORY:]
-    _persist_memory_file()
+    compact_memory()
 
 
-def _append(role: str, content):
-    if not content:
+def _persist_records(records: list[dict]) -> None:
+    if not persist_enabled or not records:
+        return
+    if BACKEND == "sqlite":
+        try:
+            _get_db().apply(records)
+        except Exception as exc:
+            log_issue(
+                "PHX-MEM-021",
+                "memory_sqlite_write_failed",
+                str(exc),
+                source="memory",
+                extra={"path": str(DB_PATH)},
+            )
         return
+    if not _journal_write(records):
+        compact_memory()
+
+
+def _drop_from_indexes(entries: list[dict], event: str = "remove") -> None:
+    for entry in entries:
+        mem_id = entry.get("id")
+        if _by_id.get(mem_id) is entry:
+            del _by_id[mem_id]
+            _pos_hint.pop(mem_id, None)
+    _notify(event, entries)
+
+
+def _append(role: str, content, timestamp: str | None = None, dedupe: bool = True) -> MemoryRecord | None:
+    if not content:
+        return None
     if not isinstance(content, str):
         try:
             content = json.dumps(content, ensure_ascii=False)
         except Exception:
             content = str(content)
     if not content:
-        return
-    entry = {"role": role, "content": content}
-    if (
-        conversation
-        and conversation[-1].get("role") == role
-        and conversation[-1].get("content") == content
-    ):
-        return
-    conversation.append(entry)
-    if len(conversation) > CACHE_HISTORY * 3:
-        del conversation[: -CACHE_HISTORY * 3]
+        return None
+    ts = timestamp or datetime.datetime.utcnow().isoformat() + "Z"
+    entry = MemoryRecord(entry_id(role, ts, content), role, content, ts)
+    with _lock:
+        global _pos_base
+        if (
+            dedupe
+            and conversation
+            and conversation[-1].get("role") == role
+            and conversation[-1].get("content") == content
+        ):
+            return None
+        conversation.append(entry)
+        _register_id(entry, len(conversation) - 1)
+        _notify("add", [entry])
+        if (BACKEND == "sqlite" or not persist_enabled) and len(conversation) > _ram_limit():
+            trimmed = len(conversation) - _ram_limit()
+            _drop_from_indexes(conversation[:trimmed], "evict")
+            del conversation[:trimmed]
+            _pos_base += trimmed
+        elif persist_enabled and _spill_due():
+            _schedule_compaction()
+    return entry
 
 
 def log_conversation(role: str, content: str):
-    """Append a conversation turn and persist a rolling window."""
-    _append(role, content)
-    save_memory()
+    """Append a conversation turn and persist it to the journal."""
+    entry = _append(role, content)
+    if entry:
+        _persist_records([{"op": "add", "entry": entry}])
+
+
+def add_entries(items: list[tuple[str, str, str | None]], dedupe: bool = True) -> list[MemoryRecord]:
+    """Append (role, content, timestamp) turns in one journal write; returns stored entries."""
+    added: list[dict] = []
+    with _lock:
+        for role, content, ts in items:
+            entry = _append(role or "system", content, ts, dedupe=dedupe)
+            if entry:
+                added.append(entry)
+    _persist_records([{"op": "add", "entry": e} for e in added])
+    return added
+
+
+def replace_conversation(entries: list[dict]):
+    """Swap the whole conversation (bulk edits) and write a fresh snapshot.
+
+    On JSON the swap is also journaled as one replace record under the lock, so it
+    survives a crash before the snapshot lands and stays ordered with other writes.
+    """
+    with _lock:
+        conversation[:] = _normalize_conversation(entries)
+        _rebuild_indexes()
+        if BACKEND != "sqlite" and persist_enabled:
+            _journal_write([{"op": "replace", "entries": list(conversation)}])
+    if BACKEND == "sqlite":
+        _persist_records([{"op": "replace", "entries": list(conversation)}])
+    elif persist_enabled:
+        compact_memory()
+
+
+def recent_entries(limit: int, roles: Collection[str] | None = None) -> list[MemoryRecord]:
+    """Newest `limit` hot-window entries (only `roles` when given), oldest first."""
+    out: list[MemoryRecord] = []
+    if limit <= 0:
+        return out
+    with _lock:
+        for idx in range(len(conversation) - 1, -1, -1):
+            entry = conversation[idx]
+            if roles is None or entry.get("role") in roles:
+                out.append(entry)
+                if len(out) >= limit:
+                    break
+    out.reverse()
+    return out
+
+
+def get_entry(mem_id: str) -> MemoryRecord | None:
+    return _by_id.get(mem_id)
+
+
+def delete_ids(ids: list[str]) -> list[str]:
+    """Delete entries by stable id; one journal/SQL record for the whole batch."""
+    global _pos_drift
+    removed: list[dict] = []
+    with _lock:
+        for mem_id in dict.fromkeys(ids):
+            idx = _locate(mem_id)
+            if idx is None:
+                continue
+            entry = conversation.pop(idx)
+            removed.append(entry)
+            _pos_drift += 1
+        if removed:
+            _drop_from_indexes(removed)
+        if _pos_drift > 256:
+            for pos, entry in enumerate(conversation):
+                _pos_hint[entry["id"]] = _pos_base + pos
+            _pos_drift = 0
+    deleted = [e["id"] for e in removed]
+    found = set(deleted)
+    missing = [mem_id for mem_id in dict.fromkeys(ids) if mem_id not in found]
+    if missing and BACKEND != "sqlite":
+        deleted += _cold.delete(missing)
+    if deleted:
+        _persist_records([{"op": "delete", "ids": deleted}])
+    return deleted
 
 
 def save_memory_entry(entry: dict):
     """Store an arbitrary memory entry in the conversation log."""
     if not isinstance(entry, dict):
         return
-    _append("system", entry)
-    save_memory()
+    stored = _append("system", entry)
+    if stored:
+        _persist_records([{"op": "add", "entry": stored}])
 
 
 def log_story_entry(entry: dict):
     """Archive Story Time summaries separately from conversational memory."""
     if not isinstance(entry, dict):
         return
-    bucket = memory_data.setdefault("storytime", [])
-    bucket.append(entry)
-    if len(bucket) > 200:
-        del bucket[:-200]
-    if persist_enabled:
-        _persist_memory_file()
+    with _lock:
+        bucket = memory_data.setdefault("storytime", [])
+        bucket.append(entry)
+        if len(bucket) > 200:
+            del bucket[:-200]
+    _persist_records([{"op": "story", "entry": entry}])
 
 
 def export_snapshot(label: str | None = None) -> Path | None:
@@ -297,13 +907,99 @@ def export_snapshot(label: str | None = None) -> Path | None:
             if safe:
                 name += f"_{safe}"
         path = CACHE_DIR / f"{name}.json"
-        payload = json.dumps(memory_data, indent=2, ensure_ascii=False)
-        path.write_text(payload, encoding="utf-8")
+        _export_history(path)
         return path
     except Exception:
         return None
 
 
+def iter_history(after: str | None = None, first_bucket: str | None = None, last_bucket: str | None = None):
+    """Every stored entry oldest-first (cold tier / SQLite, then the hot window).
+
+    after resumes behind that entry id (KeyError if it no longer exists); the
+    YYYY-MM buckets let the cold tier skip whole segments.
+    """
+    if BACKEND == "sqlite":
+        yield from _get_db().iter_entries(after_uid=after)
+        return
+    hot_from = 0
+    if after and _cold.locate(after) is None:
+        with _lock:
+            idx = _locate(after)
+        if idx is None:
+            raise KeyError(after)
+        hot_from = idx + 1
+    else:
+        yield from _cold.iter_entries(after_id=after, first_bucket=first_bucket, last_bucket=last_bucket)
+    with _lock:
+        hot = conversation[hot_from:]
+    yield from hot
+
+
+def has_entry(mem_id: str) -> bool:
+    """True while mem_id is stored anywhere (hot window, cold tier or SQLite)."""
+    if get_entry(mem_id) is not None:
+        return True
+    if BACKEND == "sqlite":
+        return _get_db().has_uid(mem_id)
+    return _cold.locate(mem_id) is not None
+
+
+def find_stored_content(content: str, role: str | None = None) -> str | None:
+    """Id of an on-disk entry (cold tier / SQLite) with exactly this content; callers check RAM first."""
+    if BACKEND == "sqlite":
+        return _get_db().find_content(content, role)
+    return _cold.find_content(content, role)
+
+
+def iter_export(
+    since: str | None = None,
+    until: str | None = None,
+    roles: set[str] | None = None,
+    cursor: str | None = None,
+):
+    """Filtered history for streaming exports; cursor is the last entry id a client received.
+
+    since/until compare against ISO timestamps (a date prefix like 2024-05 works).
+    Raises KeyError up front when the cursor entry no longer exists.
+    """
+    if cursor and not has_entry(cursor):
+        raise KeyError(cursor)
+    first_bucket = since[:7] if since and len(since) >= 7 else None
+    last_bucket = until[:7] if until and len(until) >= 7 else None
+
+    def _filtered():
+        for entry in iter_history(after=cursor, first_bucket=first_bucket, last_bucket=last_bucket):
+            ts = entry.get("timestamp") or ""
+            if since and ts < since:
+                continue
+            if until and ts[: len(until)] > until:
+                continue
+            if roles and entry.get("role") not in roles:
+                continue
+            yield entry
+
+    return _filtered()
+
+
+def _export_history(path: Path) -> None:
+    """Write the full history as memory.json-shaped JSON without loading it all."""
+    stories = _get_db().stories() if BACKEND == "sqlite" else list(memory_data.get("storytime", []))
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write('{"version": 2, "conversation": [\n')
+        first = True
+        for entry in iter_history():
+            if not first:
+                handle.write(",\n")
+            handle.write(json.dumps(entry, ensure_ascii=False, default=dict))
+            first = False
+        handle.write('\n], "storytime": ')
+        handle.write(json.dumps(stories, ensure_ascii=False))
+        handle.write(', "migrations": ')
+        handle.write(json.dumps(memory_data.get("migrations", {}), ensure_ascii=False))
+        handle.write("}\n")
+
+
 def set_persist_enabled(flag: bool):
     global persist_enabled
     persist_enabled = bool(flag)
@@ -320,12 +1016,13 @@ def prune_recent_conversation(entries: int = 1):
     """Drop the most recent N conversation turns (used for synthetic prompts)."""
     if entries <= 0:
         return
-    removed = False
-    for _ in range(min(entries, len(conversation))):
-        conversation.pop()
-        removed = True
-    if removed:
-        save_memory()
+    with _lock:
+        count = min(entries, len(conversation))
+        if count:
+            _drop_from_indexes(conversation[-count:])
+            del conversation[-count:]
+    if count:
+        _persist_records([{"op": "pop", "count": count}])
 
 
 def _normalize_text(text: str) -> str:
@@ -337,7 +1034,26 @@ def _normalize_text(text: str) -> str:
 
 
 def search_memories(query: str, max_hits: int = 5) -> list[dict]:
-    """Return conversation entries containing all terms in query."""
+    """Return conversation entries containing all terms in query.
+
+    Older entries come from the newest COLD_SEARCH_SEGMENTS cold segments only.
+    """
+    if not query:
+        return []
+    with _lock:
+        hits = _index.search(query, max_hits=max_hits)
+    if hits is None:
+        hits = _scan_memories(query, max_hits=max_hits)
+    if len(hits) < max_hits and BACKEND != "sqlite" and len(_cold):
+        cold = _cold.search(
+            query_terms(query), max_hits - len(hits), substring=True, max_segments=COLD_SEARCH_SEGMENTS
+        )
+        hits = [entry for _, entry in reversed(cold)] + hits
+    return hits
+
+
+def _scan_memories(query: str, max_hits: int = 5) -> list[dict]:
+    """Linear fallback for queries the index can't answer (no usable terms)."""
     if not query:
         return []
     q_terms = []
@@ -365,3 +1081,109 @@ def search_memories(query: str, max_hits: int = 5) -> list[dict]:
     ordered = prioritized + others
     ordered = ordered[:max_hits]
     return list(reversed(ordered))
+
+
+def _fuse_rankings(*rankings: list[tuple[float, dict]], k: int = 60) -> list[tuple[float, dict]]:
+    """Reciprocal rank fusion of several best-first rankings."""
+    fused: dict[int, list] = {}
+    for ranking in rankings:
+        for rank, (_, entry) in enumerate(ranking):
+            slot = fused.setdefault(id(entry), [0.0, entry])
+            slot[0] += 1.0 / (k + rank + 1)
+    return sorted(((score, entry) for score, entry in fused.values()), key=lambda pair: -pair[0])
+
+
+def _cold_hits(query: str, limit: int) -> list[tuple[float, dict]]:
+    """Hits older than the in-RAM window: SQLite FTS5 or the JSON cold segments."""
+    terms = [t for t in dict.fromkeys(_normalize_text(query).split()) if t not in STOPWORDS]
+    try:
+        if BACKEND == "sqlite":
+            return _get_db().search(terms, limit=limit, skip_newest=len(conversation))
+        return _cold.search(terms, limit, max_segments=COLD_SEARCH_SEGMENTS)
+    except Exception:
+        return []
+
+
+def recall_memories(
+    query: str,
+    max_hits: int = 8,
+    max_chars: int = 1600,
+    mode: str | None = None,
+) -> list[dict]:
+    """Ranked memories for a prompt block, best first, clipped to max_chars total.
+
+    mode: bm25 (lexical), semantic (embeddings) or hybrid (both, rank-fused);
+    defaults to MEMORY_RECALL_MODE and degrades to bm25 when vectors aren't ready or
+    the query can't be embedded (Ollama down).
+    """
+    if not query:
+        return []
+    mode = (mode or RECALL_MODE).lower()
+    semantic: list[tuple[float, dict]] = []
+    if mode in {"semantic", "hybrid"} and _vectors is not None and _vectors.ready:
+        norm_query = _normalize_text(query)
+        semantic = [
+            (score, entry)
+            for score, entry in _vectors.search(query, max_hits=max_hits + 2)
+            if not (entry.get("role") == "user" and _normalize_text(entry.get("content", "")) == norm_query)
+        ]
+    lexical: list[tuple[float, dict]] = []
+    if mode != "semantic" or not semantic:
+        with _lock:
+            lexical = _index.rank(
+                query,
+                max_hits=max_hits,
+                half_life=RECALL_HALF_LIFE,
+                skip_text=query,
+            )
+    if len(lexical) < max_hits:
+        lexical = lexical + _cold_hits(query, max_hits - len(lexical))
+    if semantic and lexical:
+        ranked = _fuse_rankings(lexical, semantic)
+    else:
+        ranked = semantic or lexical
+    hits: list[dict] = []
+    budget = max_chars
+    for score, entry in ranked[:max_hits]:
+        content = entry.get("content", "")
+        if not isinstance(content, str):
+            content = str(content)
+        content = re.sub(r"\s+", " ", content).strip()
+        if len(content) > RECALL_ITEM_CHARS:
+            content = content[:RECALL_ITEM_CHARS].rstrip() + "…"
+        if not content:
+            continue
+        if len(content) > budget:
+            break
+        budget -= len(content)
+        hits.append(
+            {
+                "id": entry.get("id"),
+                "role": entry.get("role", "system"),
+                "content": content,
+                "timestamp": entry.get("timestamp"),
+                "score": round(score, 3),
+            }
+        )
+    return hits
+
+
+def tier_status() -> dict:
+    """Hot window vs on-disk history sizes for /memory/info."""
+    if BACKEND == "sqlite":
+        cold = {"backend": "sqlite", "entries": max(0, _get_db().count() - len(conversation))}
+    else:
+        cold = dict(_cold.status(), backend="segments")
+    return {"hot": len(conversation), "hot_window": CACHE_HISTORY, "cold": cold}
+
+
+def set_embed_health(check: Callable[[], bool] | None) -> None:
+    """Ollama health probe for semantic recall (e.g. OllamaMonitor.available)."""
+    if _vectors is not None:
+        _vectors.health = check
+
+
+def semantic_status() -> dict:
+    if _vectors is None:
+        return {"available": False, "backend": None, "rows": 0, "pending": 0, "error": "disabled"}
+    return _vectors.status()
@@ -0,0 +1,328 @@
+"""Cold tier for core.memory: immutable, compressed, time-bucketed segment files.
+
+Entries that age out of the hot RAM window are spilled during compaction into
+<memory stem>.cold/<YYYY-MM>-<gen>.ndjson.(zst|zz). Each segment has a small
+sidecar index (entry ids + token postings) so search and recall only page in
+segments that can match. Segments are never rewritten; deletes are tombstones.
+"""
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+from core.memory_index import normalize_text
+
+try:
+    import zstandard as zstd  # type: ignore
+except Exception:
+    zstd = None  # type: ignore
+
+SEGMENT_CACHE = 4  # decoded segments kept in RAM
+INDEX_CACHE = 32  # segment sidecar indexes kept in RAM
+_BUCKET_RE = re.compile(r"^\d{4}-\d{2}")
+
+
+def _compress(data: bytes) -> tuple[bytes, str]:
+    if zstd is not None:
+        return zstd.ZstdCompressor(level=6).compress(data), "zst"
+    return zlib.compress(data, 6), "zz"
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        if zstd is None:
+            raise RuntimeError("segment is zstd-compressed but zstandard is not installed")
+        return zstd.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _bucket(entry: dict) -> str:
+    ts = entry.get("timestamp")
+    return ts[:7] if isinstance(ts, str) and _BUCKET_RE.match(ts) else "undated"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class ColdStore:
+    """Append-only set of segments plus a manifest (metadata only; rows stay on disk)."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.manifest_path = root / "manifest.json"
+        self.tombstone_path = root / "tombstones.txt"
+        self._segments: list[dict] = []
+        self._tombstones: set[str] = set()
+        self._rows: OrderedDict[str, list[dict]] = OrderedDict()
+        self._indexes: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            self._segments = [s for s in manifest.get("segments", []) if isinstance(s, dict)]
+        except Exception:
+            self._segments = []
+        try:
+            lines = self.tombstone_path.read_text(encoding="utf-8").splitlines()
+            self._tombstones = {line.strip() for line in lines if line.strip()}
+        except Exception:
+            self._tombstones = set()
+
+    @property
+    def generation(self) -> int:
+        return int(self._segments[-1]["gen"]) if self._segments else 0
+
+    def __len__(self) -> int:
+        return max(0, sum(int(s.get("count", 0)) for s in self._segments) - len(self._tombstones))
+
+    # --- writes ---------------------------------------------------------------
+    def write(self, entries: list[dict]) -> int:
+        """Spill entries (oldest first) into new month-bucketed segments; returns the generation."""
+        if not entries:
+            return self.generation
+        groups: list[tuple[str, list[dict]]] = []
+        for entry in entries:
+            bucket = _bucket(entry)
+            if groups and groups[-1][0] == bucket:
+                groups[-1][1].append(entry)
+            else:
+                groups.append((bucket, [entry]))
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            segments = list(self._segments)
+            gen = self.generation
+            for bucket, rows in groups:
+                gen += 1
+                name = f"{bucket}-{gen:06d}"
+                payload = "".join(json.dumps(row, ensure_ascii=False, default=dict) + "\n" for row in rows)
+                payload = payload.encode("utf-8")
+                blob, codec = _compress(payload)
+                postings: dict[str, list[int]] = {}
+                for pos, row in enumerate(rows):
+                    for tok in set(normalize_text(str(row.get("content", ""))).split()):
+                        postings.setdefault(tok, []).append(pos)
+                index = {"ids": [row.get("id") for row in rows], "tokens": postings}
+                _write_atomic(self.root / f"{name}.ndjson.{codec}", blob)
+                _write_atomic(self.root / f"{name}.idx", zlib.compress(json.dumps(index).encode("utf-8"), 6))
+                segments.append(
+                    {
+                        "gen": gen,
+                        "name": name,
+                        "codec": codec,
+                        "bucket": bucket,
+                        "count": len(rows),
+                        "first_ts": rows[0].get("timestamp"),
+                        "last_ts": rows[-1].get("timestamp"),
+                        "bytes": len(blob),
+                    }
+                )
+            # the manifest is the commit point: segments it doesn't list are ignored
+            _write_atomic(self.manifest_path, json.dumps({"segments": segments}, indent=1).encode("utf-8"))
+            self._segments = segments
+        return gen
+
+    def delete(self, ids) -> list[str]:
+        """Tombstone ids that live in cold segments; returns the ones found."""
+        wanted = set(ids) - self._tombstones
+        found: list[str] = []
+        if not wanted:
+            return found
+        with self._lock:
+            for seg in reversed(self._segments):
+                hit = wanted.intersection(self._index(seg)["ids"])
+                if hit:
+                    found.extend(hit)
+                    wanted -= hit
+                if not wanted:
+                    break
+            if found:
+                self.root.mkdir(parents=True, exist_ok=True)
+                with self.tombstone_path.open("a", encoding="utf-8") as handle:
+                    handle.write("".join(f"{mem_id}\n" for mem_id in found))
+                self._tombstones.update(found)
+        return found
+
+    # --- reads ----------------------------------------------------------------
+    def _path(self, seg: dict) -> Path:
+        return self.root / f"{seg['name']}.ndjson.{seg.get('codec', 'zz')}"
+
+    def _index(self, seg: dict) -> dict:
+        name = seg["name"]
+        cached = self._indexes.get(name)
+        if cached is None:
+            try:
+                cached = json.loads(zlib.decompress((self.root / f"{name}.idx").read_bytes()))
+            except Exception:
+                rows = self._load_rows(seg)
+                postings: dict[str, list[int]] = {}
+                for pos, row in enumerate(rows):
+                    for tok in set(normalize_text(str(row.get("content", ""))).split()):
+                        postings.setdefault(tok, []).append(pos)
+                cached = {"ids": [row.get("id") for row in rows], "tokens": postings}
+            self._indexes[name] = cached
+            if len(self._indexes) > INDEX_CACHE:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(name)
+        return cached
+
+    def _load_rows(self, seg: dict) -> list[dict]:
+        name = seg["name"]
+        cached = self._rows.get(name)
+        if cached is not None:
+            self._rows.move_to_end(name)
+            return cached
+        raw = _decompress(self._path(seg).read_bytes(), seg.get("codec", "zz"))
+        rows = [json.loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+        self._rows[name] = rows
+        if len(self._rows) > SEGMENT_CACHE:
+            self._rows.popitem(last=False)
+        return rows
+
+    def ids_after(self, generation: int) -> set[str]:
+        """Ids spilled by segments newer than generation (load-time reconciliation)."""
+        out: set[str] = set()
+        with self._lock:
+            for seg in self._segments:
+                if int(seg["gen"]) > generation:
+                    out.update(mem_id for mem_id in self._index(seg)["ids"] if mem_id)
+        return out
+
+    def locate(self, mem_id: str) -> int | None:
+        """Generation of the segment holding a live mem_id (sidecar indexes only)."""
+        if mem_id in self._tombstones:
+            return None
+        with self._lock:
+            for seg in reversed(self._segments):
+                if mem_id in self._index(seg)["ids"]:
+                    return int(seg["gen"])
+        return None
+
+    def find_content(self, content: str, role: str | None = None) -> str | None:
+        """Id of the newest live entry with exactly this content (token postings narrow the scan)."""
+        tokens = set(normalize_text(content).split())
+        if not tokens:
+            return None
+        with self._lock:
+            for seg in reversed(self._segments):
+                postings = self._index(seg)["tokens"]
+                rows: set[int] | None = None
+                for tok in tokens:
+                    rows = set(postings.get(tok, ())) if rows is None else rows & set(postings.get(tok, ()))
+                    if not rows:
+                        break
+                if not rows:
+                    continue
+                seg_rows = self._load_rows(seg)
+                for pos in sorted(rows, reverse=True):
+                    row = seg_rows[pos]
+                    if (
+                        row.get("content") == content
+                        and (role is None or row.get("role") == role)
+                        and row.get("id") not in self._tombstones
+                    ):
+                        return row.get("id")
+        return None
+
+    def iter_entries(
+        self,
+        after_id: str | None = None,
+        first_bucket: str | None = None,
+        last_bucket: str | None = None,
+    ):
+        """Live cold entries oldest first, one segment in memory at a time.
+
+        after_id resumes behind that entry; first/last_bucket (YYYY-MM) skip
+        whole segments outside a time range without decompressing them.
+        """
+        start_gen = self.locate(after_id) if after_id else None
+        for seg in list(self._segments):
+            if start_gen is not None and int(seg["gen"]) < start_gen:
+                continue
+            bucket = seg.get("bucket", "undated")
+            if bucket != "undated" and (
+                (first_bucket and bucket < first_bucket) or (last_bucket and bucket > last_bucket)
+            ):
+                if start_gen is None or int(seg["gen"]) != start_gen:
+                    continue
+            with self._lock:
+                rows = self._load_rows(seg)
+            skipping = start_gen is not None and int(seg["gen"]) == start_gen
+            for row in rows:
+                if skipping:
+                    skipping = row.get("id") != after_id
+                    continue
+                if row.get("id") not in self._tombstones:
+                    yield row
+
+    def search(
+        self,
+        terms: list[str],
+        limit: int,
+        substring: bool = False,
+        max_segments: int | None = None,
+    ) -> list[tuple[float, dict]]:
+        """Newest-first cold hits containing every term (substring) or any term (ranked).
+
+        max_segments caps how many of the newest segments are opened.
+        """
+        if not terms or limit <= 0:
+            return []
+        hits: list[tuple[float, dict]] = []
+        with self._lock:
+            segments = self._segments if max_segments is None else self._segments[-max_segments:]
+            for seg in reversed(segments):
+                index = self._index(seg)
+                tokens = index["tokens"]
+                count = max(1, len(index["ids"]))
+                if substring:
+                    rows: set[int] | None = None
+                    for term in terms:
+                        matched: set[int] = set()
+                        for tok, posting in tokens.items():
+                            if term in tok:
+                                matched.update(posting)
+                        rows = matched if rows is None else rows & matched
+                        if not rows:
+                            break
+                    scores = {pos: 1.0 for pos in rows or ()}
+                else:
+                    scores = {}
+                    for term in terms:
+                        posting = tokens.get(term)
+                        if not posting:
+                            continue
+                        idf = math.log(1.0 + count / len(posting))
+                        for pos in posting:
+                            scores[pos] = scores.get(pos, 0.0) + idf
+                if not scores:
+                    continue
+                seg_rows = self._load_rows(seg)
+                ranked = sorted(scores.items(), key=lambda kv: (-kv[1], -kv[0]))
+                for pos, score in ranked:
+                    row = seg_rows[pos]
+                    if row.get("id") in self._tombstones:
+                        continue
+                    hits.append((score, row))
+                    if len(hits) >= limit:
+                        return hits
+        return hits
+
+    def status(self) -> dict:
+        return {
+            "segments": len(self._segments),
+            "entries": len(self),
+            "bytes": sum(int(s.get("bytes", 0)) for s in self._segments),
+            "tombstones": len(self._tombstones),
+            "codec": "zst" if zstd is not None else "zz",
+            "oldest": self._segments[0].get("first_ts") if self._segments else None,
+        }
@@ -0,0 +1,327 @@
+"""Streaming ChatGPT export importer for core.memory.
+
+The upload is spooled to disk, conversations.json is read incrementally (from the
+zip member or the plain file) one conversation object at a time, and messages are
+handed to a sink in bounded batches. Progress lives in a small JSON state file
+next to the spooled upload, so a job interrupted by a crash resumes from the
+last committed conversation on the next start.
+"""
+import datetime
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Callable
+
+from core import memory as cm
+from core.issue_log import log_issue
+from core.memory_record import entry_id
+
+IMPORT_DIR = cm.MEMORY_PATH.parent / "imports"
+STATE_PATH = IMPORT_DIR / "chatgpt_import.json"
+IMPORT_BATCH = max(1, int(os.getenv("MEMORY_IMPORT_BATCH", "500") or 500))
+IMPORT_MAX_BYTES = 25 * 1024 * 1024 * 1024
+_READ_CHUNK = 1 << 20
+_WRAPPER_RE = re.compile(r'"conversations"\s*:\s*\[')
+
+# (text, role, timestamp) triples -> list of stored items
+Sink = Callable[[list[tuple[str, str, str | None]]], list]
+
+
+def iter_json_array(stream, start: int = 0, chunk: int = _READ_CHUNK):
+    """Yield (element, end_offset) for each element of a top-level JSON array.
+
+    Offsets are character positions in the decoded stream; pass a previous
+    end_offset as start to resume after that element. Only one element is held
+    in memory at a time. A {"conversations": [...]} wrapper is accepted too.
+    """
+    decoder = json.JSONDecoder()
+    base = 0
+    buf = ""
+
+    def fill(size: int) -> bool:
+        nonlocal buf
+        data = stream.read(size)
+        if not data:
+            return False
+        buf += data
+        return True
+
+    if start:
+        while base + len(buf) < start and fill(chunk):
+            if base + len(buf) < start:
+                base += len(buf)
+                buf = ""
+        buf = buf[start - base :]
+        base = start
+    else:
+        while True:
+            stripped = buf.lstrip()
+            if stripped[:1] == "[":
+                cut = len(buf) - len(stripped) + 1
+                break
+            if stripped[:1] == "{":
+                match = _WRAPPER_RE.search(buf)
+                if match:
+                    cut = match.end()
+                    break
+            elif stripped:
+                raise ValueError("Unsupported export format (expected list)")
+            if not fill(chunk):
+                raise ValueError("Unsupported export format (expected list)")
+        base += cut
+        buf = buf[cut:]
+    while True:
+        idx = 0
+        while True:
+            while idx < len(buf) and buf[idx] in " \t\r\n,":
+                idx += 1
+            if idx < len(buf) or not fill(chunk):
+                break
+        if idx >= len(buf) or buf[idx] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, idx)
+        except json.JSONDecodeError:
+            # grow geometrically so a huge conversation is not re-parsed per chunk
+            if not fill(max(chunk, len(buf))):
+                raise
+            continue
+        yield obj, base + end
+        buf = buf[end:]
+        base += end
+
+
+def _iso(epoch) -> str | None:
+    try:
+        return datetime.datetime.utcfromtimestamp(float(epoch)).isoformat() + "Z"
+    except Exception:
+        return None
+
+
+def _fallback_ts(conv_time, pos: int) -> str | None:
+    """Stand-in for a message without create_time: the conversation's time (or the
+    epoch) plus pos microseconds, so a re-import yields the same entry ids."""
+    try:
+        base = float(conv_time)
+    except (TypeError, ValueError):
+        base = 0.0
+    return _iso(base + pos / 1_000_000)
+
+
+def _part_text(part) -> str | None:
+    if isinstance(part, str):
+        return part
+    if isinstance(part, dict):
+        for key in ("text", "value", "content"):
+            if isinstance(part.get(key), str):
+                return part[key]
+        try:
+            return json.dumps(part, ensure_ascii=False)
+        except Exception:
+            pass
+    try:
+        return str(part)
+    except Exception:
+        return None
+
+
+def conversation_entries(conv) -> tuple[list[tuple[str, str, str | None]], int]:
+    """Flatten one conversation's mapping into (text, role, timestamp) + skipped count."""
+    entries: list[tuple[str, str, str | None]] = []
+    skipped = 0
+    mapping = conv.get("mapping", {}) if isinstance(conv, dict) else {}
+    conv_time = (conv.get("create_time") or conv.get("update_time")) if isinstance(conv, dict) else None
+    for pos, node in enumerate(mapping.values() if isinstance(mapping, dict) else []):
+        msg = (node.get("message") or {}) if isinstance(node, dict) else {}
+        role = (msg.get("author") or {}).get("role")
+        if role not in {"user", "assistant"}:
+            skipped += 1
+            continue
+        parts = [_part_text(p) for p in (((msg.get("content") or {}).get("parts")) or [])]
+        text = "\n".join(p for p in parts if p is not None).strip()
+        if not text:
+            skipped += 1
+            continue
+        ts = _iso(msg.get("create_time")) or _fallback_ts(conv_time, pos)
+        entries.append((f"[chatgpt/{role}] {text}", role, ts))
+    return entries, skipped
+
+
+def _open_text(path: Path, member: str | None):
+    """Text stream over the export plus the raw handle to close with it."""
+    raw = path.open("rb")
+    if member:
+        zf = zipfile.ZipFile(raw)
+        return io.TextIOWrapper(zf.open(member), encoding="utf-8", errors="ignore"), raw
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="ignore"), raw
+
+
+def _payload_size(path: Path, member: str | None) -> int:
+    """Uncompressed size of the JSON being parsed (progress denominator)."""
+    if member:
+        with zipfile.ZipFile(path) as zf:
+            return zf.getinfo(member).file_size
+    return path.stat().st_size
+
+
+def pick_member(path: Path) -> str | None:
+    """conversations.json inside a zip (else its largest .json); None for a plain file."""
+    if not zipfile.is_zipfile(path):
+        return None
+    with zipfile.ZipFile(path) as zf:
+        names = zf.namelist()
+        inner = [n for n in names if n.lower().endswith("conversations.json")]
+        if inner:
+            return inner[0]
+        jsons = [n for n in names if n.lower().endswith(".json")]
+        if not jsons:
+            raise ValueError("No conversations.json or *.json found in zip")
+        return max(jsons, key=lambda n: zf.getinfo(n).file_size)
+
+
+class ChatGPTImporter:
+    """One background import at a time; state survives restarts in STATE_PATH."""
+
+    def __init__(self, state_path: Path = STATE_PATH) -> None:
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.state: dict = self._read_state()
+
+    def _read_state(self) -> dict:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _write_state(self) -> None:
+        self.state["updated_at"] = datetime.datetime.utcnow().isoformat() + "Z"
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def new_upload_path(self, filename: str) -> Path:
+        IMPORT_DIR.mkdir(parents=True, exist_ok=True)
+        suffix = ".zip" if filename.lower().endswith(".zip") else ".json"
+        return IMPORT_DIR / f"chatgpt_{uuid.uuid4().hex[:12]}{suffix}"
+
+    def start(self, upload: Path, filename: str, sink: Sink) -> dict:
+        with self._lock:
+            if self.running:
+                raise RuntimeError("An import is already running")
+            member = pick_member(upload)
+            self.state = {
+                "job_id": upload.stem,
+                "filename": filename,
+                "upload": str(upload),
+                "member": member,
+                "status": "queued",
+                "offset": 0,
+                "conversations": 0,
+                "imported": 0,
+                "skipped": 0,
+                "duplicates": 0,
+                "upload_bytes": upload.stat().st_size,
+                "bytes_total": _payload_size(upload, member),
+                "bytes_read": 0,
+                "error": "",
+                "started_at": datetime.datetime.utcnow().isoformat() + "Z",
+                "finished_at": None,
+            }
+            self._write_state()
+            self._spawn(sink)
+        return self.status()
+
+    def resume(self, sink: Sink) -> bool:
+        """Restart a job left queued/running by a previous process."""
+        with self._lock:
+            if self.running or self.state.get("status") not in {"queued", "running", "interrupted"}:
+                return False
+            if not Path(self.state.get("upload") or "").exists():
+                self.state["status"] = "failed"
+                self.state["error"] = "spooled upload missing"
+                self._write_state()
+                return False
+            self.state["status"] = "queued"
+            self.state["resumed"] = int(self.state.get("resumed", 0)) + 1
+            self._write_state()
+            self._spawn(sink)
+        return True
+
+    def _spawn(self, sink: Sink) -> None:
+        self._thread = threading.Thread(target=self._run, args=(sink,), name="chatgpt-import", daemon=True)
+        self._thread.start()
+
+    def _flush(self, sink: Sink, batch: list[tuple[str, str, str | None]]) -> None:
+        # has_entry also sees turns already spilled to the cold tier / SQLite
+        fresh = [item for item in batch if not cm.has_entry(entry_id(item[1], item[2], item[0]))]
+        self.state["duplicates"] += len(batch) - len(fresh)
+        if fresh:
+            self.state["imported"] += len(sink(fresh))
+
+    def _run(self, sink: Sink) -> None:
+        state = self.state
+        upload = Path(state["upload"])
+        state["status"] = "running"
+        self._write_state()
+        started = time.perf_counter()
+        try:
+            stream, raw = _open_text(upload, state.get("member"))
+            with raw, stream:
+                batch: list[tuple[str, str, str | None]] = []
+                for conv, end in iter_json_array(stream, start=int(state.get("offset") or 0)):
+                    entries, skipped = conversation_entries(conv)
+                    batch.extend(entries)
+                    state["skipped"] += skipped
+                    state["conversations"] += 1
+                    if len(batch) >= IMPORT_BATCH:
+                        self._flush(sink, batch)
+                        batch = []
+                        # commit point: everything up to `end` is stored
+                        state["offset"] = end
+                        state["bytes_read"] = end
+                        self._write_state()
+                if batch:
+                    self._flush(sink, batch)
+            state["status"] = "done"
+            state["bytes_read"] = state["bytes_total"]
+            state["finished_at"] = datetime.datetime.utcnow().isoformat() + "Z"
+            self._write_state()
+            try:
+                upload.unlink()
+            except Exception:
+                pass
+            logging.info(
+                "import_chatgpt: done imported=%s skipped=%s duplicates=%s in %.1fs",
+                state["imported"],
+                state["skipped"],
+                state["duplicates"],
+                time.perf_counter() - started,
+            )
+        except Exception as exc:
+            state["status"] = "failed"
+            state["error"] = str(exc)
+            self._write_state()
+            log_issue("PHX-MEM-022", "chatgpt_import_failed", str(exc), source="memory")
+
+    def status(self) -> dict:
+        state = dict(self.state)
+        if not state:
+            return {"status": "idle"}
+        total = state.get("bytes_total") or 0
+        state["progress"] = round(min(1.0, (state.get("bytes_read") or 0) / total), 4) if total else 0.0
+        state["active"] = self.running
+        return state
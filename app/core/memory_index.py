@@ -0,0 +1,231 @@
+"""Incremental inverted index over core.memory conversation entries.
+
+Postings map normalized tokens to entry sequence numbers in append order, so
+lookups walk only the entries that can match instead of the whole log. The same
+postings feed BM25-ranked recall for prompt building.
+"""
+import heapq
+import math
+import re
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+
+_TOKEN_RE = re.compile(r"[^\w']+")
+_EXPAND_CACHE_MAX = 512
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Only the newest postings of very common terms are scored; recency decay makes older ones negligible.
+RANK_POSTINGS_MAX = 4000
+ROLE_WEIGHTS = {"system": 1.15, "assistant": 1.0, "user": 0.85}
+STOPWORDS = frozenset(
+    """
+    a about above after again all am an and any are aren't as at be because been before being
+    below between both but by can can't could couldn't did didn't do does doesn't doing don't down
+    during each few for from further had hadn't has hasn't have haven't having he he'd he'll he's her
+    here here's hers herself him himself his how how's i i'd i'll i'm i've if in into is isn't it
+    it's its itself let's me more most my myself no nor not of off on once only or other ought our
+    ours ourselves out over own same she she'd she'll she's should shouldn't so some such than that
+    that's the their theirs them themselves then there there's these they they'd they'll they're
+    they've this those through to too under until up very was wasn't we we'd we'll we're we've were
+    weren't what what's when when's where where's which while who who's whom why why's will with
+    won't would wouldn't you you'd you'll you're you've your yours yourself yourselves
+    hey hi hello ok okay please just like really know tell remember recall yeah yes
+    """.split()
+)
+
+
+def normalize_text(text: str) -> str:
+    if not text:
+        return ""
+    lowered = text.lower()
+    lowered = _TOKEN_RE.sub(" ", lowered)
+    return lowered.strip()
+
+
+def query_terms(query: str) -> list[str]:
+    terms = []
+    for token in (query or "").split():
+        cleaned = _TOKEN_RE.sub("", token.lower())
+        if cleaned:
+            terms.append(cleaned)
+    return terms
+
+
+def _entry_text(entry) -> str:
+    text = entry.get("content", "") if isinstance(entry, Mapping) else ""
+    return text if isinstance(text, str) else str(text)
+
+
+class MemoryIndex:
+    """Token -> posting list index keyed by a monotonically increasing sequence."""
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self._next_seq = 0
+        self._entries: dict[int, dict] = {}
+        self._tokens: dict[int, dict[str, int]] = {}
+        self._lengths: dict[int, int] = {}
+        self._total_len = 0
+        self._seq_by_obj: dict[int, int] = {}
+        self._postings: dict[str, list[int]] = {}
+        self._expand_cache: OrderedDict[str, set[str]] = OrderedDict()
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, entries) -> None:
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry: dict) -> None:
+        if not isinstance(entry, Mapping):
+            return
+        seq = self._next_seq
+        self._next_seq += 1
+        words = normalize_text(_entry_text(entry)).split()
+        tokens = dict(Counter(words))
+        self._entries[seq] = entry
+        self._tokens[seq] = tokens
+        self._lengths[seq] = len(words)
+        self._total_len += len(words)
+        self._seq_by_obj[id(entry)] = seq
+        for tok in tokens:
+            posting = self._postings.get(tok)
+            if posting is None:
+                self._postings[tok] = [seq]
+                for term, expansion in self._expand_cache.items():
+                    if term in tok:
+                        expansion.add(tok)
+            else:
+                posting.append(seq)
+
+    def remove(self, entries) -> None:
+        for entry in entries:
+            seq = self._seq_by_obj.pop(id(entry), None)
+            if seq is None:
+                continue
+            self._entries.pop(seq, None)
+            self._tokens.pop(seq, None)
+            self._total_len -= self._lengths.pop(seq, 0)
+            self._dead += 1
+        if self._dead > 1024 and self._dead > len(self._entries):
+            self._vacuum()
+
+    def _vacuum(self) -> None:
+        """Drop dead sequence numbers (and empty tokens) from the posting lists."""
+        live = self._entries
+        for tok in list(self._postings):
+            kept = [seq for seq in self._postings[tok] if seq in live]
+            if kept:
+                self._postings[tok] = kept
+            else:
+                del self._postings[tok]
+        self._expand_cache.clear()
+        self._dead = 0
+
+    def _expand(self, term: str) -> set[str]:
+        """All indexed tokens containing term (search_memories matches substrings)."""
+        cached = self._expand_cache.get(term)
+        if cached is not None:
+            self._expand_cache.move_to_end(term)
+            return cached
+        expansion = {tok for tok in self._postings if term in tok}
+        self._expand_cache[term] = expansion
+        if len(self._expand_cache) > _EXPAND_CACHE_MAX:
+            self._expand_cache.popitem(last=False)
+        return expansion
+
+    def _iter_newest(self, tokens: set[str]):
+        """Yield live sequence numbers holding any of tokens, newest first."""
+        lists = [self._postings[tok] for tok in tokens if tok in self._postings]
+        if len(lists) == 1:
+            merged = reversed(lists[0])
+        else:
+            merged = heapq.merge(*(reversed(p) for p in lists), reverse=True)
+        last = None
+        for seq in merged:
+            if seq == last:
+                continue
+            last = seq
+            if seq in self._entries:
+                yield seq
+
+    def search(self, query: str, max_hits: int = 5) -> list[dict] | None:
+        """Same contract as core.memory.search_memories; None means fall back to a scan."""
+        terms = query_terms(query)
+        if not terms:
+            return None
+        expansions = [self._expand(term) for term in terms]
+        if any(not exp for exp in expansions):
+            return []
+        expansions.sort(key=lambda exp: sum(len(self._postings[t]) for t in exp))
+        driver, rest = expansions[0], expansions[1:]
+        norm_query = normalize_text(query)
+        prioritized: list[dict] = []
+        others: list[dict] = []
+        recent_skipped = False
+        for seq in self._iter_newest(driver):
+            tokens = self._tokens[seq]
+            if any(exp.isdisjoint(tokens) for exp in rest):
+                continue
+            entry = self._entries[seq]
+            role = entry.get("role", "user")
+            if (
+                not recent_skipped
+                and role == "user"
+                and normalize_text(_entry_text(entry)) == norm_query
+            ):
+                recent_skipped = True
+                continue
+            target = prioritized if role in {"assistant", "system"} else others
+            target.append(entry)
+            if len(prioritized) + len(others) >= max_hits:
+                break
+        ordered = (prioritized + others)[:max_hits]
+        return list(reversed(ordered))
+
+    def rank(
+        self,
+        query: str,
+        max_hits: int = 8,
+        half_life: int = 2000,
+        skip_text: str | None = None,
+    ) -> list[tuple[float, dict]]:
+        """BM25 over the postings with role weights and a recency decay, best first."""
+        terms = [t for t in dict.fromkeys(normalize_text(query).split()) if t not in STOPWORDS]
+        terms = [t for t in terms if t in self._postings]
+        live = len(self._entries)
+        if not terms or not live:
+            return []
+        avg_len = max(1.0, self._total_len / live)
+        newest = self._next_seq - 1
+        skip_norm = normalize_text(skip_text) if skip_text else None
+        scores: dict[int, float] = {}
+        for term in terms:
+            posting = self._postings[term]
+            df = sum(1 for seq in posting[-RANK_POSTINGS_MAX:] if seq in self._entries)
+            if not df:
+                continue
+            idf = math.log(1.0 + (live - df + 0.5) / (df + 0.5))
+            for seq in reversed(posting[-RANK_POSTINGS_MAX:]):
+                tokens = self._tokens.get(seq)
+                if tokens is None:
+                    continue
+                tf = tokens.get(term, 0)
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._lengths[seq] / avg_len)
+                scores[seq] = scores.get(seq, 0.0) + idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        ranked: list[tuple[float, dict]] = []
+        for seq, score in scores.items():
+            entry = self._entries[seq]
+            role = entry.get("role", "user")
+            if skip_norm is not None and role == "user" and normalize_text(_entry_text(entry)) == skip_norm:
+                continue
+            decay = 0.5 ** ((newest - seq) / max(1, half_life))
+            score *= ROLE_WEIGHTS.get(role, 1.0) * (0.35 + 0.65 * decay)
+            ranked.append((score, entry))
+        return heapq.nlargest(max_hits, ranked, key=lambda pair: pair[0])
@@ -0,0 +1,70 @@
+"""Compact conversation record shared by core.memory, its indexes and the server.
+
+A __slots__ object instead of a per-entry dict (roughly a third of the RAM), but
+it keeps the read-only mapping interface (entry.get("content"), entry["role"],
+dict(entry)) the rest of the tree already uses. json.dumps needs default=dict.
+The stable id helpers live here too, so both storage backends and the importer
+derive ids the same way.
+"""
+import hashlib
+from collections.abc import Mapping
+
+FIELDS = ("id", "role", "content", "timestamp")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8", errors="ignore")).hexdigest()
+
+
+def entry_id(role: str, timestamp: str, content: str) -> str:
+    """Stable memory ID derived from role + timestamp + content hash."""
+    raw = f"{role}\x1f{timestamp}\x1f{content_hash(content)}"
+    return hashlib.sha1(raw.encode("utf-8", errors="ignore")).hexdigest()[:20]
+
+
+class MemoryRecord(Mapping):
+    __slots__ = FIELDS
+
+    def __init__(self, id: str, role: str, content: str, timestamp: str) -> None:  # noqa: A002
+        self.id = id
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+
+    # Mapping interface -----------------------------------------------------
+    def __getitem__(self, key: str):
+        if key in FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __contains__(self, key) -> bool:
+        return key in FIELDS
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in FIELDS else default
+
+    # Mapping would compare by value; records are distinct objects (indexes key on identity)
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    @property
+    def text(self) -> str:
+        """Server-facing alias for content."""
+        return self.content
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "role": self.role, "content": self.content, "timestamp": self.timestamp}
+
+    def __repr__(self) -> str:
+        return f"MemoryRecord(id={self.id!r}, role={self.role!r}, content={self.content[:40]!r})"
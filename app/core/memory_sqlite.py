@@ -0,0 +1,317 @@
+"""SQLite (WAL) storage backend for core.memory with an FTS5 full-text table.
+
+Selected with MEMORY_BACKEND=sqlite. The full history lives on disk; core.memory
+only keeps the newest CACHE_HISTORY entries in RAM and asks FTS5 for older hits
+(the JSON backend uses core.memory_cold segments for the same job).
+
+One-shot migration from memory.json (+ journal):
+    python -m core.memory_sqlite [--json PATH] [--db PATH]
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from core.memory_record import MemoryRecord, content_hash, entry_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    chash TEXT NOT NULL,
+    uid TEXT
+);
+CREATE INDEX IF NOT EXISTS memories_chash ON memories(chash);
+CREATE TABLE IF NOT EXISTS storytime (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    content, content='memories', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+STORY_KEEP = 200
+
+
+def _row_entry(row) -> MemoryRecord:
+    # same record type as the JSON backend's hot window, so listeners see one shape
+    return MemoryRecord(row[4], row[1], row[2], row[3])
+
+
+class SqliteMemoryBackend:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._upgrade_uids()
+        try:
+            self._conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def _upgrade_uids(self) -> None:
+        """Add/backfill the stable uid column for databases created before it existed."""
+        cols = {row[1] for row in self._conn.execute("PRAGMA table_info(memories)")}
+        if "uid" not in cols:
+            self._conn.execute("ALTER TABLE memories ADD COLUMN uid TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memories_uid ON memories(uid)")
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, role, content, timestamp FROM memories WHERE uid IS NULL LIMIT 2000"
+            ).fetchall()
+            if not rows:
+                return
+            self._conn.executemany(
+                "UPDATE memories SET uid = ? WHERE id = ?",
+                [(entry_id(r[1], r[3], r[2]), r[0]) for r in rows],
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- meta -----------------------------------------------------------------
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return default
+
+    def set_meta(self, key: str, value) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value, ensure_ascii=False)),
+            )
+
+    # --- reads ----------------------------------------------------------------
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0])
+
+    def has_uid(self, uid: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM memories WHERE uid = ? LIMIT 1", (uid,)).fetchone() is not None
+
+    def find_content(self, content: str, role: str | None = None) -> str | None:
+        """uid of the newest entry with exactly this content (chash index)."""
+        sql = "SELECT uid, content FROM memories WHERE chash = ?" + (" AND role = ?" if role else "")
+        params = (content_hash(content), role) if role else (content_hash(content),)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id DESC", params).fetchall()
+        return next((uid for uid, text in rows if text == content), None)
+
+    def tail(self, limit: int) -> list[MemoryRecord]:
+        """Newest `limit` entries in chronological order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, role, content, timestamp, uid FROM memories ORDER BY id DESC LIMIT ?",
+                (int(limit),),
+            ).fetchall()
+        return [_row_entry(row) for row in reversed(rows)]
+
+    def iter_entries(self, batch: int = 2000, after_uid: str | None = None):
+        """Yield every entry oldest-first in bounded batches (exports), optionally after a uid."""
+        last_id = 0
+        if after_uid:
+            with self._lock:
+                row = self._conn.execute("SELECT id FROM memories WHERE uid = ?", (after_uid,)).fetchone()
+            if row is None:
+                raise KeyError(after_uid)
+            last_id = int(row[0])
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, role, content, timestamp, uid FROM memories WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _row_entry(row)
+            last_id = rows[-1][0]
+
+    def stories(self) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM storytime ORDER BY id DESC LIMIT ?", (STORY_KEEP,)
+            ).fetchall()
+        out = []
+        for (payload,) in reversed(rows):
+            try:
+                out.append(json.loads(payload))
+            except Exception:
+                continue
+        return out
+
+    def search(self, query_terms: list[str], limit: int = 8, skip_newest: int = 0) -> list[tuple[float, dict]]:
+        """FTS5 bm25 hits, optionally ignoring the newest rows (already in RAM)."""
+        if not query_terms:
+            return []
+        with self._lock:
+            ceiling = self._ceiling(skip_newest)
+            if self.fts:
+                match = " OR ".join('"' + term.replace('"', '""') + '"' for term in query_terms)
+                try:
+                    rows = self._conn.execute(
+                        "SELECT m.id, m.role, m.content, m.timestamp, m.uid, bm25(memories_fts) AS score "
+                        "FROM memories_fts JOIN memories m ON m.id = memories_fts.rowid "
+                        "WHERE memories_fts MATCH ? AND m.id <= ? ORDER BY score LIMIT ?",
+                        (match, ceiling, int(limit)),
+                    ).fetchall()
+                except sqlite3.OperationalError:
+                    rows = []
+                return [(-float(row[5]), _row_entry(row)) for row in rows]
+            clauses = " AND ".join("content LIKE ?" for _ in query_terms)
+            rows = self._conn.execute(
+                f"SELECT id, role, content, timestamp, uid FROM memories WHERE {clauses} AND id <= ? "
+                "ORDER BY id DESC LIMIT ?",
+                [f"%{term}%" for term in query_terms] + [ceiling, int(limit)],
+            ).fetchall()
+        return [(1.0, _row_entry(row)) for row in rows]
+
+    def _ceiling(self, skip_newest: int) -> int:
+        if skip_newest <= 0:
+            return 2**62
+        row = self._conn.execute(
+            "SELECT id FROM memories ORDER BY id DESC LIMIT 1 OFFSET ?", (int(skip_newest),)
+        ).fetchone()
+        return int(row[0]) if row else -1
+
+    # --- writes ---------------------------------------------------------------
+    def _insert(self, entries: list[dict]) -> None:
+        rows = []
+        for e in entries:
+            role, content, ts = e.get("role", "system"), e.get("content", ""), e.get("timestamp", "")
+            rows.append((role, content, ts, content_hash(content), e.get("id") or entry_id(role, ts, content)))
+        self._conn.executemany(
+            "INSERT INTO memories(role, content, timestamp, chash, uid) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def apply(self, records: list[dict]) -> None:
+        """Apply core.memory journal-style records (add/pop/replace/story/delete) atomically."""
+        with self._lock:
+            cur = self._conn
+            cur.execute("BEGIN")
+            try:
+                for rec in records:
+                    op = rec.get("op")
+                    if op == "add":
+                        self._insert([rec["entry"]])
+                    elif op == "pop":
+                        cur.execute(
+                            "DELETE FROM memories WHERE id IN (SELECT id FROM memories ORDER BY id DESC LIMIT ?)",
+                            (int(rec.get("count", 0)),),
+                        )
+                    elif op == "replace":
+                        cur.execute("DELETE FROM memories")
+                        self._insert(rec.get("entries") or [])
+                    elif op == "story":
+                        cur.execute(
+                            "INSERT INTO storytime(payload) VALUES (?)",
+                            (json.dumps(rec.get("entry"), ensure_ascii=False),),
+                        )
+                        cur.execute(
+                            "DELETE FROM storytime WHERE id NOT IN (SELECT id FROM storytime ORDER BY id DESC LIMIT ?)",
+                            (STORY_KEEP,),
+                        )
+                    elif op == "delete":
+                        cur.executemany(
+                            "DELETE FROM memories WHERE uid = ?",
+                            [(uid,) for uid in rec.get("ids") or []],
+                        )
+                        for role, ts, chash in rec.get("keys") or []:
+                            cur.execute(
+                                "DELETE FROM memories WHERE id = (SELECT id FROM memories "
+                                "WHERE chash = ? AND role = ? AND timestamp = ? ORDER BY id DESC LIMIT 1)",
+                                (chash, role, ts),
+                            )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def checkpoint(self) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            except sqlite3.OperationalError:
+                pass
+
+    def insert_entries(self, entries: list[dict]) -> int:
+        """Bulk-append entries in one transaction (migration of cold segments)."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._insert(entries)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(entries)
+
+    def import_snapshot(self, conversation: list[dict], storytime: list[dict], migrations: dict) -> int:
+        """Bulk-load a JSON snapshot (the one-shot migrator); returns rows written."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._insert(conversation)
+                self._conn.executemany(
+                    "INSERT INTO storytime(payload) VALUES (?)",
+                    [(json.dumps(s, ensure_ascii=False),) for s in storytime[-STORY_KEEP:]],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.set_meta("migrations", migrations or {})
+        return len(conversation)
+
+
+def _main() -> int:
+    import argparse
+
+    from core import memory as cm
+
+    parser = argparse.ArgumentParser(description="Migrate memory.json (+ journal) into SQLite.")
+    parser.add_argument("--json", default=str(cm.MEMORY_PATH))
+    parser.add_argument("--db", default=str(cm.DB_PATH))
+    parser.add_argument("--force", action="store_true", help="migrate even if the database has rows")
+    args = parser.parse_args()
+    backend = SqliteMemoryBackend(Path(args.db))
+    if backend.count() and not args.force:
+        print(f"{args.db} already has {backend.count()} entries; use --force to append.")
+        return 1
+    migrated = cm.migrate_json_to_sqlite(backend, Path(args.json))
+    print(f"Migrated {migrated} entries from {args.json} -> {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,399 @@
+"""Semantic recall for core.memory: embeddings in a memory-mapped float32 matrix.
+
+Rows are keyed by a content hash, so identical text (primer/handoff rehydration,
+repeated turns) is embedded once and reused across restarts. Embedding runs on a
+background worker; search is a single NumPy mat-vec over the cached rows.
+
+Ollama calls go through systems.http_client with short timeouts. While Ollama is
+down (health check false, or a recent embed failed) queries return no semantic
+hits so recall falls back to BM25, and in auto mode the index follows Ollama's
+health: hashing vectors while it is down, Ollama vectors once it is back.
+"""
+import hashlib
+import math
+import os
+import queue
+import threading
+import time
+import zlib
+from collections.abc import Callable, Mapping
+from pathlib import Path
+
+from core.issue_log import log_issue
+from core.memory_index import STOPWORDS, normalize_text
+from systems import http_client
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+EMBED_BACKEND = os.getenv("MEMORY_EMBED_BACKEND", "auto").strip().lower() or "auto"
+EMBED_MODEL = os.getenv("MEMORY_EMBED_MODEL", "nomic-embed-text").strip()
+OLLAMA_ENDPOINT = os.getenv("OLLAMA_ENDPOINT", "http://127.0.0.1:11434").rstrip("/")
+# (connect, read) seconds: queries sit on the chat path, batches run off-thread
+EMBED_QUERY_TIMEOUT = (1.0, max(0.5, float(os.getenv("MEMORY_EMBED_QUERY_TIMEOUT", "2") or 2)))
+EMBED_BATCH_TIMEOUT = (3.0, 30.0)
+# after a failed Ollama embed, skip it for this long (unless a health check says it is back)
+EMBED_RETRY_AFTER = max(1.0, float(os.getenv("MEMORY_EMBED_RETRY_AFTER", "30") or 30))
+HASH_DIM = 256
+_INITIAL_ROWS = 4096
+_BATCH = 64
+
+
+def content_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class HashingEmbedder:
+    """Zero-dependency signed feature hashing over unigrams + bigrams."""
+
+    name = "hash"
+
+    def __init__(self, dim: int = HASH_DIM) -> None:
+        self.dim = dim
+
+    def embed(self, texts: list[str], timeout=None) -> list[list[float]]:
+        out = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            words = normalize_text(text).split()
+            feats = [w for w in words if w not in STOPWORDS]
+            feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for feat in feats:
+                h = zlib.crc32(feat.encode("utf-8", errors="ignore"))
+                vec[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            out.append([v / norm for v in vec])
+        return out
+
+
+class OllamaEmbedder:
+    """Ollama /api/embeddings against OLLAMA_ENDPOINT."""
+
+    name = "ollama"
+
+    def __init__(self, model: str = EMBED_MODEL, endpoint: str = OLLAMA_ENDPOINT) -> None:
+        self.model = model
+        self.endpoint = endpoint
+        self.dim = 0
+
+    def embed(self, texts: list[str], timeout=EMBED_BATCH_TIMEOUT) -> list[list[float]]:
+        out = []
+        for text in texts:
+            resp = http_client.post(
+                "ollama",
+                f"{self.endpoint}/api/embeddings",
+                json={"model": self.model, "prompt": text},
+                timeout=timeout,
+                retries=0,
+            )
+            if resp.status_code != 200:
+                raise RuntimeError(f"embeddings {resp.status_code}: {resp.text[:200]}")
+            vec = resp.json().get("embedding") or []
+            if not vec:
+                raise RuntimeError("empty embedding")
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            out.append([v / norm for v in vec])
+        self.dim = len(out[-1]) if out else self.dim
+        return out
+
+
+def pick_embedder(ollama_up: bool = True):
+    """Resolve MEMORY_EMBED_BACKEND; auto prefers Ollama when it is up and the embed model answers."""
+    if EMBED_BACKEND == "hash":
+        return HashingEmbedder()
+    ollama = OllamaEmbedder()
+    if EMBED_BACKEND == "ollama":
+        return ollama
+    if ollama_up:
+        try:
+            ollama.embed(["ping"], timeout=EMBED_QUERY_TIMEOUT)
+            return ollama
+        except Exception:
+            pass
+    return HashingEmbedder()
+
+
+class VectorStore:
+    """Append-only mmap matrix (<stem>.vectors.<backend>.f32) plus a row-key sidecar."""
+
+    def __init__(self, base_path: Path, embedder) -> None:
+        self.embedder = embedder
+        tag = embedder.name if embedder.name == "hash" else f"{embedder.name}-{_slug(getattr(embedder, 'model', ''))}"
+        self.matrix_path = base_path.with_name(f"{base_path.stem}.vectors.{tag}.f32")
+        self.keys_path = self.matrix_path.with_suffix(".keys")
+        self.dim = embedder.dim
+        self._keys: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._mat = None
+        self._capacity = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if self.keys_path.exists():
+            try:
+                lines = self.keys_path.read_text(encoding="utf-8").splitlines()
+            except Exception:
+                lines = []
+            if lines and lines[0].startswith("dim="):
+                self.dim = int(lines[0][4:] or 0) or self.dim
+                lines = lines[1:]
+            self._keys = [line.strip() for line in lines if line.strip()]
+        if self._keys and self.dim and self.matrix_path.exists():
+            rows_on_disk = self.matrix_path.stat().st_size // (4 * self.dim)
+            self._keys = self._keys[:rows_on_disk]
+            self._open(max(rows_on_disk, len(self._keys)))
+        else:
+            self._keys = []
+        self._rows = {key: idx for idx, key in enumerate(self._keys)}
+
+    def _open(self, capacity: int) -> None:
+        self._mat = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._capacity = capacity
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(_INITIAL_ROWS, self._capacity * 2)
+        while capacity < rows:
+            capacity *= 2
+        if self._mat is not None:
+            self._mat.flush()
+            self._mat = None
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.matrix_path.open("ab") as handle:
+            handle.truncate(capacity * self.dim * 4)
+        self._open(capacity)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, keys: list[str], vectors: list[list[float]]) -> None:
+        if not keys:
+            return
+        with self._lock:
+            if not self.dim:
+                self.dim = len(vectors[0])
+            if not self._keys and not self.keys_path.exists():
+                self.keys_path.parent.mkdir(parents=True, exist_ok=True)
+                self.keys_path.write_text(f"dim={self.dim}\n", encoding="utf-8")
+            start = len(self._keys)
+            self._ensure_capacity(start + len(keys))
+            self._mat[start : start + len(keys)] = np.asarray(vectors, dtype=np.float32)
+            self._mat.flush()
+            with self.keys_path.open("a", encoding="utf-8") as handle:
+                handle.write("".join(f"{key}\n" for key in keys))
+            for offset, key in enumerate(keys):
+                self._rows[key] = start + offset
+            self._keys.extend(keys)
+
+    def search(self, vector: list[float], top: int) -> list[tuple[float, str]]:
+        with self._lock:
+            count = len(self._keys)
+            if not count or self._mat is None:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            scores = self._mat[:count] @ query
+            top = min(top, count)
+            idx = np.argpartition(-scores, top - 1)[:top]
+            idx = idx[np.argsort(-scores[idx])]
+            return [(float(scores[i]), self._keys[i]) for i in idx]
+
+
+def _slug(value: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in value).strip("_") or "default"
+
+
+class SemanticIndex:
+    """Maps live conversation entries to cached embeddings; embeds new text off-thread."""
+
+    def __init__(self, base_path: Path) -> None:
+        self.base_path = base_path
+        self.store: VectorStore | None = None
+        self._entries: dict[str, list[dict]] = {}
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._texts: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._repick = False
+        self._down_until = 0.0
+        # optional Ollama health probe (the server passes OllamaMonitor.available)
+        self.health: Callable[[], bool] | None = None
+        self.error = ""
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.store is not None and len(self.store) > 0
+
+    def rebuild(self, entries) -> None:
+        with self._lock:
+            self._entries = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry: dict) -> None:
+        if not self.available or not isinstance(entry, Mapping):
+            return
+        text = entry.get("content")
+        if not isinstance(text, str) or not text.strip():
+            return
+        key = content_key(text)
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+            if self.store is not None and key in self.store:
+                return
+            if key not in self._texts:
+                self._texts[key] = text
+                self._queue.put(key)
+        self._start_worker()
+
+    def remove(self, entries) -> None:
+        with self._lock:
+            for entry in entries:
+                text = entry.get("content") if isinstance(entry, Mapping) else None
+                if not isinstance(text, str):
+                    continue
+                bucket = self._entries.get(content_key(text))
+                if not bucket:
+                    continue
+                for idx in range(len(bucket) - 1, -1, -1):
+                    if bucket[idx] is entry:
+                        del bucket[idx]
+                        break
+                if not bucket:
+                    self._entries.pop(content_key(text), None)
+
+    # --- Ollama health ------------------------------------------------------------
+    def _ollama_up(self) -> bool:
+        if time.monotonic() < self._down_until:
+            return False
+        try:
+            return self.health is None or bool(self.health())
+        except Exception:
+            return False
+
+    def _ollama_failed(self, exc: Exception) -> None:
+        self.error = str(exc)
+        self._down_until = time.monotonic() + EMBED_RETRY_AFTER
+
+    def _follow_health(self) -> None:
+        """Auto mode: switch stores when Ollama goes down or comes back, re-queueing live text."""
+        store = self.store
+        if EMBED_BACKEND != "auto" or store is None or self._repick:
+            return
+        if (store.embedder.name == "ollama") == self._ollama_up():
+            return
+        with self._lock:
+            self._repick = True
+            for key, bucket in self._entries.items():
+                if bucket and key not in self._texts:
+                    self._texts[key] = bucket[-1].get("content", "")
+                    self._queue.put(key)
+        self._start_worker()
+
+    def _requeue(self, batch: dict[str, str]) -> None:
+        with self._lock:
+            for key, text in batch.items():
+                if key not in self._texts:
+                    self._texts[key] = text
+                    self._queue.put(key)
+
+    # --- worker ---------------------------------------------------------------------
+    def _start_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, name="memory-embed", daemon=True)
+        self._worker.start()
+
+    def _pick(self):
+        up = self._ollama_up()
+        embedder = pick_embedder(up)
+        if up and EMBED_BACKEND == "auto" and embedder.name != "ollama":
+            self._down_until = time.monotonic() + EMBED_RETRY_AFTER  # embed model didn't answer
+        return embedder
+
+    def _run(self) -> None:
+        while True:
+            keys = [self._queue.get()]
+            while len(keys) < _BATCH:
+                try:
+                    keys.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._follow_health()
+            try:
+                if self.store is None or self._repick:
+                    self._repick = False
+                    self.store = VectorStore(self.base_path, self._pick())
+            except Exception as exc:
+                self.error = str(exc)
+                log_issue("PHX-MEM-019", "memory_embed_init_failed", str(exc), source="memory")
+                return
+            store = self.store
+            down = store.embedder.name == "ollama" and not self._ollama_up()
+            batch: dict[str, str] = {}
+            with self._lock:
+                if self._repick or down:
+                    for key in keys:
+                        self._queue.put(key)
+                    if self._repick:
+                        continue
+                    return  # Ollama is down; the next add() or search() restarts the worker
+                for key in keys:
+                    text = self._texts.pop(key, None)
+                    if text is not None and key not in store:
+                        batch[key] = text
+            if not batch:
+                continue
+            try:
+                vectors = store.embedder.embed(list(batch.values()))
+                store.add(list(batch), vectors)
+                self.error = ""
+            except Exception as exc:
+                self._requeue(batch)
+                self._ollama_failed(exc)
+                log_issue("PHX-MEM-020", "memory_embed_failed", str(exc), source="memory", severity="warning")
+                return
+
+    def search(self, query: str, max_hits: int = 8) -> list[tuple[float, dict]]:
+        """Cosine top-k over live entries; empty when embeddings are unavailable."""
+        if not query or self.store is None:
+            return []
+        self._follow_health()
+        store = self.store
+        if store.embedder.name == "ollama" and not self._ollama_up():
+            return []
+        try:
+            vector = store.embedder.embed([query], timeout=EMBED_QUERY_TIMEOUT)[0]
+        except Exception as exc:
+            self._ollama_failed(exc)
+            return []
+        hits: list[tuple[float, dict]] = []
+        for score, key in store.search(vector, top=max_hits * 4):
+            with self._lock:
+                bucket = self._entries.get(key)
+                entry = bucket[-1] if bucket else None
+            if entry is None:
+                continue
+            hits.append((score, entry))
+            if len(hits) >= max_hits:
+                break
+        return hits
+
+    def status(self) -> dict:
+        return {
+            "available": self.available,
+            "backend": self.store.embedder.name if self.store else None,
+            "rows": len(self.store) if self.store else 0,
+            "pending": self._queue.qsize(),
+            "error": self.error,
+        }
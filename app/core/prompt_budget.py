@@ -0,0 +1,152 @@
+"""Token-budgeted prompt assembly with a stable prefix.
+
+Callers add context blocks in prompt order, each with a priority (0 = always
+kept, larger = dropped first). build() spends the budget from the highest
+priority down: a block that no longer fits is cut to the remaining space when it
+allows it (keep="head" keeps the start, keep="tail" the end) or dropped, and the
+survivors come back as chat messages in their original order.
+
+Blocks marked stable (primer, handoff, identity, capabilities, ...) always come
+first and are fitted on their own (within PROMPT_PREFIX_BUDGET), so the leading
+messages stay byte-identical across requests and Ollama can reuse its KV cache
+for them; everything per-turn follows. The report carries a prefix version
+(PROMPT_LAYOUT_VERSION plus a hash of the prefix) to spot what broke reuse.
+
+Token counts are estimates (CHARS_PER_TOKEN plus a per-message overhead), close
+enough to tune budgets without loading the model's tokenizer. Each assembler's
+last per-block report is kept by label for the /perf endpoints.
+"""
+import hashlib
+import math
+import os
+import threading
+from typing import Any
+
+PROMPT_TOKEN_BUDGET = max(256, int(os.getenv("PROMPT_TOKEN_BUDGET", "3072") or 3072))
+PROMPT_PREFIX_BUDGET = max(128, int(os.getenv("PROMPT_PREFIX_BUDGET", "1536") or 1536))
+PROMPT_LAYOUT_VERSION = 2  # bump when the order or wording of stable blocks changes
+CHARS_PER_TOKEN = 4.0
+MESSAGE_OVERHEAD = 4  # role/separator tokens per chat message
+MIN_TRUNCATED_TOKENS = 32  # smaller leftovers drop the block instead of keeping a stub
+
+_last: dict[str, dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+class _Block:
+    __slots__ = ("name", "role", "content", "priority", "keep", "stable", "extra", "tokens", "kept", "status")
+
+    def __init__(
+        self, name: str, role: str, content: str, priority: int, keep: str | None, stable: bool, extra: dict
+    ) -> None:
+        self.name = name
+        self.role = role
+        self.content = content
+        self.priority = priority
+        self.keep = keep
+        self.stable = stable
+        self.extra = extra
+        self.tokens = estimate_tokens(content) + MESSAGE_OVERHEAD
+        self.kept = 0
+        self.status = "dropped"
+
+
+def _cut(text: str, max_chars: int, keep: str) -> str:
+    max_chars -= 1  # room for the ellipsis
+    if keep == "tail":
+        return "…" + text[-max_chars:].lstrip()
+    return text[:max_chars].rstrip() + "…"
+
+
+def _fit(blocks: list[_Block], budget: int) -> int:
+    """Keep/cut/drop blocks by priority within budget; returns the tokens used."""
+    remaining = budget
+    for block in sorted(blocks, key=lambda b: b.priority):
+        if block.priority == 0 or block.tokens <= remaining:
+            block.kept = block.tokens
+            block.status = "kept"
+        elif block.keep and remaining - MESSAGE_OVERHEAD >= MIN_TRUNCATED_TOKENS:
+            block.content = _cut(block.content, int((remaining - MESSAGE_OVERHEAD) * CHARS_PER_TOKEN), block.keep)
+            block.kept = remaining
+            block.status = "truncated"
+        else:
+            continue
+        remaining -= block.kept
+    return budget - remaining
+
+
+class PromptAssembler:
+    def __init__(self, label: str, budget: int = PROMPT_TOKEN_BUDGET, prefix_budget: int = PROMPT_PREFIX_BUDGET) -> None:
+        self.label = label
+        self.budget = budget
+        self.prefix_budget = min(prefix_budget, budget)
+        self._blocks: list[_Block] = []
+
+    def add(
+        self,
+        name: str,
+        content: str,
+        priority: int,
+        role: str = "system",
+        keep: str | None = None,
+        stable: bool = False,
+        **extra: Any,
+    ) -> None:
+        """Queue a block; empty content is skipped. Extra keys (e.g. images) go into the message."""
+        if content:
+            self._blocks.append(_Block(name, role, content, priority, keep, stable, extra))
+
+    def build(self) -> list[dict[str, Any]]:
+        # the prefix never depends on per-turn blocks, so it stays identical between requests
+        prefix = [b for b in self._blocks if b.stable]
+        suffix = [b for b in self._blocks if not b.stable]
+        used = _fit(prefix, self.prefix_budget)
+        _fit(suffix, max(0, self.budget - used))
+        self._blocks = prefix + suffix
+        report = self.report()
+        with _lock:
+            _last[self.label] = report
+        return [
+            {"role": b.role, "content": b.content, **b.extra}
+            for b in self._blocks
+            if b.status != "dropped"
+        ]
+
+    def prefix_version(self) -> str:
+        """Layout version plus a hash of the kept stable blocks; changes whenever KV reuse would break."""
+        digest = hashlib.sha1()
+        for block in self._blocks:
+            if block.stable and block.status != "dropped":
+                digest.update(f"{block.role}\0{block.content}\0".encode("utf-8", errors="ignore"))
+        return f"v{PROMPT_LAYOUT_VERSION}-{digest.hexdigest()[:10]}"
+
+    def report(self) -> dict[str, Any]:
+        """Estimated tokens per block (before and after budgeting) and the total used."""
+        return {
+            "label": self.label,
+            "budget": self.budget,
+            "used": sum(b.kept for b in self._blocks),
+            "prefix_version": self.prefix_version(),
+            "prefix_tokens": sum(b.kept for b in self._blocks if b.stable),
+            "blocks": [
+                {
+                    "name": b.name,
+                    "priority": b.priority,
+                    "stable": b.stable,
+                    "tokens": b.tokens,
+                    "kept": b.kept,
+                    "status": b.status,
+                }
+                for b in self._blocks
+            ],
+        }
+
+
+def last_reports() -> dict[str, dict[str, Any]]:
+    """Most recent report per assembler label."""
+    with _lock:
+        return dict(_last)
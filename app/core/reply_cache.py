@@ -0,0 +1,149 @@
+"""LRU + TTL cache of chat replies for repeated questions.
+
+Keys combine the normalized message with a hash of the context blocks that shape
+the answer (primer/handoff, owner profile, persona, mood, ...), so an edit to any
+of them misses naturally. Follow-ups that point back at the conversation ("yes",
+"why?", "what did I just say?") also key on the last REPLY_CACHE_HISTORY turns,
+so they only replay in the same context; self-contained questions don't, so
+asking one again right after it was answered still hits. Sources ("ai_local", "think", or a client-supplied tag
+such as "discord") can be opted out with REPLY_CACHE_DISABLED; REPLY_CACHE_TTL=0
+turns the cache off entirely.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+REPLY_CACHE_SIZE = max(1, int(os.getenv("REPLY_CACHE_SIZE", "256") or 256))
+REPLY_CACHE_TTL = max(0.0, float(os.getenv("REPLY_CACHE_TTL", "600") or 0))
+REPLY_CACHE_HISTORY = max(1, int(os.getenv("REPLY_CACHE_HISTORY", "6") or 6))
+REPLY_CACHE_DISABLED = frozenset(
+    s.strip().lower() for s in os.getenv("REPLY_CACHE_DISABLED", "").split(",") if s.strip()
+)
+
+_PUNCT_RE = re.compile(r"[\s?!.,;:]+$")
+_SPACE_RE = re.compile(r"\s+")
+_FOLLOW_UP_RE = re.compile(
+    r"^(?:yes|yeah|yep|no|nope|nah|ok(?:ay)?|sure|why|how so|go on|continue|more|and|then|really)\b"
+    r"|\b(?:it|its|it's|that|that's|this|these|those|they|them|their|he|she|him|her|again|above|"
+    r"earlier|before|previous|last|just|said|also|too|instead|else|same)\b"
+)
+
+
+def normalize_message(text: str) -> str:
+    """Case-folded, whitespace-collapsed message without trailing punctuation."""
+    return _PUNCT_RE.sub("", _SPACE_RE.sub(" ", (text or "").strip().casefold()))
+
+
+def is_follow_up(message: str) -> bool:
+    """Reply or reference that only makes sense with the preceding turns."""
+    text = normalize_message(message)
+    return not text or bool(_FOLLOW_UP_RE.search(text))
+
+
+def history_context(message: str, turns: Iterable[tuple[str, str]]) -> tuple:
+    """Key part for the conversation: the newest REPLY_CACHE_HISTORY (role, text) turns
+    for a follow-up, nothing for a self-contained message."""
+    if not is_follow_up(message):
+        return ()
+    return tuple(turns)[-REPLY_CACHE_HISTORY:]
+
+
+class _SourceStats:
+    __slots__ = ("hits", "misses", "stores")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+
+class ReplyCache:
+    def __init__(
+        self,
+        max_items: int = REPLY_CACHE_SIZE,
+        ttl: float = REPLY_CACHE_TTL,
+        disabled: Iterable[str] = REPLY_CACHE_DISABLED,
+    ) -> None:
+        self.max_items = max_items
+        self.ttl = ttl
+        self.disabled = {s.lower() for s in disabled}
+        self._items: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._stats: dict[str, _SourceStats] = {}
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def enabled(self, source: str) -> bool:
+        return self.ttl > 0 and source.lower() not in self.disabled
+
+    @staticmethod
+    def key(message: str, context: Iterable[Any]) -> str:
+        digest = hashlib.sha1()
+        for part in context:
+            digest.update(str(part or "").encode("utf-8", errors="ignore"))
+            digest.update(b"\0")
+        return f"{normalize_message(message)}\0{digest.hexdigest()}"
+
+    def _source(self, source: str) -> _SourceStats:
+        st = self._stats.get(source)
+        if st is None:
+            st = self._stats[source] = _SourceStats()
+        return st
+
+    def get(self, source: str, key: str) -> Any:
+        """Cached value or None; refreshes the entry's LRU position on a hit."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            st = self._source(source)
+            if item is None or now - item[0] > self.ttl:
+                if item is not None:
+                    del self._items[key]
+                st.misses += 1
+                return None
+            self._items.move_to_end(key)
+            st.hits += 1
+            return item[1]
+
+    def put(self, source: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            self._source(source).stores += 1
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sources = {
+                name: {
+                    "hits": st.hits,
+                    "misses": st.misses,
+                    "stores": st.stores,
+                    "hit_rate": round(st.hits / (st.hits + st.misses), 3) if st.hits + st.misses else 0.0,
+                }
+                for name, st in self._stats.items()
+            }
+            hits = sum(s["hits"] for s in sources.values())
+            lookups = hits + sum(s["misses"] for s in sources.values())
+            return {
+                "entries": len(self._items),
+                "max_items": self.max_items,
+                "ttl": self.ttl,
+                "disabled": sorted(self.disabled),
+                "evictions": self._evictions,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "sources": sources,
+            }
+
+
+# shared by the server (/ai/local) and systems.audio (think)
+reply_cache = ReplyCache()
@@ -0,0 +1,219 @@
+"""Per-stage latency tracing for the chat pipeline.
+
+A request opens a trace (`with trace("ai_local"):`, or start()/activate()/finish()
+when it spans several blocks); code below it marks stages with
+`with span("recall"):`. The current trace rides a contextvar, so spans in
+helpers and in asyncio.to_thread workers attach to the right request without
+passing it around. A trace() opened inside another one (think() called from
+process_input()) becomes a nested span of the outer trace.
+
+Every span feeds a per-(op, stage) latency histogram, exported in Prometheus text
+format by render_prometheus(); finished traces are kept in a ring buffer
+(TRACE_RECENT) for a per-request stage breakdown.
+"""
+import bisect
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Iterator
+
+TRACE_RECENT = max(1, int(os.getenv("TRACE_RECENT", "50") or 50))
+# seconds; Prometheus-style cumulative buckets (+Inf is implicit)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Trace:
+    __slots__ = ("op", "started", "t0", "spans", "attrs", "total_ms", "error", "depth")
+
+    def __init__(self, op: str, attrs: dict[str, Any]) -> None:
+        self.op = op
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.spans: list[tuple[str, float, float, int]] = []  # (stage, offset_ms, duration_ms, depth)
+        self.attrs = attrs
+        self.total_ms: float | None = None
+        self.error = ""
+        self.depth = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "op": self.op,
+            "started": self.started,
+            "total_ms": self.total_ms,
+            "error": self.error,
+            "attrs": self.attrs,
+            "stages": [
+                {"stage": stage, "offset_ms": round(offset, 2), "ms": round(ms, 2), "depth": depth}
+                for stage, offset, ms, depth in sorted(self.spans, key=lambda s: s[1])
+            ],
+        }
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+
+_current: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("trace", default=None)
+_stage_hist: dict[tuple[str, str], _Histogram] = {}
+_request_hist: dict[str, _Histogram] = {}
+_errors: dict[str, int] = {}
+_recent: deque[Trace] = deque(maxlen=TRACE_RECENT)
+_lock = threading.Lock()
+
+
+def _observe(table: dict, key, seconds: float) -> None:
+    with _lock:
+        hist = table.get(key)
+        if hist is None:
+            hist = table[key] = _Histogram()
+        hist.observe(seconds)
+
+
+def start(op: str, **attrs: Any) -> Trace:
+    """Open a trace by hand (for requests that outlive one `with` block, e.g. streams)."""
+    return Trace(op, attrs)
+
+
+def finish(tr: Trace, error: str = "") -> None:
+    if tr.total_ms is not None:
+        return
+    elapsed = time.perf_counter() - tr.t0
+    tr.total_ms = round(elapsed * 1000.0, 2)
+    tr.error = error
+    _observe(_request_hist, tr.op, elapsed)
+    with _lock:
+        _recent.append(tr)
+        if error:
+            _errors[tr.op] = _errors.get(tr.op, 0) + 1
+
+
+@contextlib.contextmanager
+def activate(tr: Trace) -> Iterator[Trace]:
+    """Make `tr` the current trace inside the block."""
+    token = _current.set(tr)
+    try:
+        yield tr
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # an async generator closed from another task (client disconnect)
+            pass
+
+
+@contextlib.contextmanager
+def trace(op: str, **attrs: Any) -> Iterator[Trace]:
+    """Trace one request end to end; nested inside another trace it is just a span."""
+    parent = _current.get()
+    if parent is not None and parent.total_ms is None:
+        with span(op):
+            yield parent
+        return
+    tr = start(op, **attrs)
+    error = ""
+    try:
+        with activate(tr):
+            yield tr
+    except BaseException as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        finish(tr, error)
+
+
+@contextlib.contextmanager
+def span(stage: str, op: str | None = None) -> Iterator[None]:
+    """Time a stage of the current trace (or of `op` when running outside one)."""
+    tr = _current.get()
+    if tr is not None and tr.total_ms is not None:
+        tr = None  # finished request (e.g. a deferred write): histogram only
+    began = time.perf_counter()
+    if tr is not None:
+        tr.depth += 1
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - began
+        if tr is not None:
+            tr.depth -= 1
+            tr.spans.append((stage, (began - tr.t0) * 1000.0, elapsed * 1000.0, tr.depth))
+        _observe(_stage_hist, (op or (tr.op if tr is not None else "none"), stage), elapsed)
+
+
+def record(stage: str, seconds: float, op: str | None = None, ended_ago: float = 0.0) -> None:
+    """Add a stage measured elsewhere (e.g. scheduler queue wait) that ended `ended_ago` seconds ago."""
+    tr = _current.get()
+    if tr is not None and tr.total_ms is not None:
+        tr = None
+    if tr is not None:
+        end = (time.perf_counter() - ended_ago - tr.t0) * 1000.0
+        tr.spans.append((stage, end - seconds * 1000.0, seconds * 1000.0, tr.depth))
+    _observe(_stage_hist, (op or (tr.op if tr is not None else "none"), stage), seconds)
+
+
+def annotate(**attrs: Any) -> None:
+    """Attach attributes (model, source, cache hit, ...) to the current trace."""
+    tr = _current.get()
+    if tr is not None:
+        tr.attrs.update(attrs)
+
+
+def detach() -> None:
+    """Drop the inherited trace in a long-lived task/thread spawned from a request."""
+    _current.set(None)
+
+
+def recent(limit: int = 20, op: str | None = None) -> list[dict[str, Any]]:
+    """Newest finished traces first, with their stage breakdown."""
+    with _lock:
+        items = [tr for tr in reversed(_recent) if op is None or tr.op == op]
+    return [tr.as_dict() for tr in items[: max(0, limit)]]
+
+
+def _render_hist(lines: list[str], name: str, labels: str, hist: _Histogram) -> None:
+    cumulative = 0
+    for bound, count in zip(BUCKETS, hist.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+    lines.append(f"{name}_sum{{{labels}}} {hist.total:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def render_prometheus(prefix: str = "phoenix") -> str:
+    """Histograms and error counters in Prometheus text exposition format."""
+    lines: list[str] = []
+    with _lock:
+        requests = sorted(_request_hist.items())
+        stages = sorted(_stage_hist.items())
+        errors = sorted(_errors.items())
+    name = f"{prefix}_request_duration_seconds"
+    lines += [f"# HELP {name} End-to-end request latency by operation.", f"# TYPE {name} histogram"]
+    for op, hist in requests:
+        _render_hist(lines, name, f'op="{_label(op)}"', hist)
+    name = f"{prefix}_stage_duration_seconds"
+    lines += [f"# HELP {name} Latency of pipeline stages by operation.", f"# TYPE {name} histogram"]
+    for (op, stage), hist in stages:
+        _render_hist(lines, name, f'op="{_label(op)}",stage="{_label(stage)}"', hist)
+    name = f"{prefix}_request_errors_total"
+    lines += [f"# HELP {name} Requests that ended with an exception.", f"# TYPE {name} counter"]
+    for op, count in errors:
+        lines.append(f'{name}{{op="{_label(op)}"}} {count}')
+    return "\n".join(lines) + "\n"
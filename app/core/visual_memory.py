@@ -0,0 +1,121 @@
+"""Append-only visual memory log (/vision/analyze results).
+
+Each analysis is one JSON line in visual_memory.jsonl; the newest `max_items`
+entries stay in RAM with a digest index, so context reads and duplicate-image
+checks never touch disk. The log is rewritten down to that tail once it holds
+twice as many lines. A legacy visual_memory.json list is imported on first load.
+"""
+import json
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+
+class VisualMemoryLog:
+    def __init__(self, path: Path, max_items: int = 2000, legacy_path: Path | None = None) -> None:
+        self.path = Path(path)
+        self.legacy_path = legacy_path
+        self.max_items = max(1, int(max_items))
+        self._items: deque[dict[str, Any]] = deque(maxlen=self.max_items)
+        self._by_digest: dict[str, dict[str, Any]] = {}
+        self._lines = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _digest(entry: dict[str, Any]) -> str | None:
+        meta = entry.get("meta")
+        digest = meta.get("digest") if isinstance(meta, dict) else None
+        return digest if isinstance(digest, str) and digest else None
+
+    def load(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._by_digest.clear()
+            self._lines = 0
+            if not self.path.exists() and self.legacy_path is not None and self.legacy_path.exists():
+                self._import_legacy()
+            try:
+                handle = self.path.open("r", encoding="utf-8", errors="ignore")
+            except OSError:
+                return
+            torn = False
+            with handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    self._lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except Exception:
+                        torn = True  # partial line from a crash mid-write
+                        continue
+                    if isinstance(entry, dict):
+                        self._items.append(entry)
+            if torn:
+                # rewrite so the next append doesn't land on the broken line
+                self._write_all(self._items)
+                self._lines = len(self._items)
+            for entry in self._items:
+                digest = self._digest(entry)
+                if digest:
+                    self._by_digest[digest] = entry
+
+    def _import_legacy(self) -> None:
+        try:
+            data = json.loads(self.legacy_path.read_text(encoding="utf-8", errors="ignore") or "[]")
+        except Exception:
+            return
+        items = [d for d in data if isinstance(d, dict)] if isinstance(data, list) else []
+        self._write_all(items[-self.max_items :])
+
+    def _write_all(self, items) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as handle:
+            handle.write("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items))
+        os.replace(tmp, self.path)
+
+    def append(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+            self._lines += 1
+            if len(self._items) == self.max_items:
+                evicted = self._items[0]
+                digest = self._digest(evicted)
+                if digest and self._by_digest.get(digest) is evicted:
+                    del self._by_digest[digest]
+            self._items.append(entry)
+            digest = self._digest(entry)
+            if digest:
+                self._by_digest[digest] = entry
+            if self._lines >= 2 * self.max_items:
+                self._write_all(self._items)
+                self._lines = len(self._items)
+
+    def find(self, digest: str) -> dict[str, Any] | None:
+        """Newest retained entry for an image digest."""
+        return self._by_digest.get(digest)
+
+    def tail(self, count: int) -> list[dict[str, Any]]:
+        if count <= 0:
+            return []
+        with self._lock:
+            start = max(0, len(self._items) - count)
+            return [self._items[idx] for idx in range(start, len(self._items))]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "entries": len(self._items),
+            "digests": len(self._by_digest),
+            "log_lines": self._lines,
+        }
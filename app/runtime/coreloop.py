@@ -16,12 +16,13 @@ except Exception:
 import calendar
 import random
 import re
+from collections.abc import Mapping
 from datetime import datetime, timedelta
 
 from config import HOTKEY_PTT
 from core import (identity, memory, mood, owner_profile, reflection,
-                  user_profile)
-from systems import audio, stt, tasks
+                  tracing, user_profile)
+from systems import audio, inference, side_effects, stt, tasks
 try:
     from systems import discord_bridge  # type: ignore
 except Exception:
@@ -88,6 +89,10 @@ def register_shutdown_hook(fn: Callable[[], None]):
     _shutdown_hooks.append(fn)
 
 
+# queued profile/reflection writes land before the process exits
+register_shutdown_hook(side_effects.flush)
+
+
 def unregister_shutdown_hook(fn: Callable[[], None]):
     try:
         _shutdown_hooks.remove(fn)
@@ -151,7 +156,7 @@ def _pre_sleep_line() -> str:
         last_user = ""
         try:
             for m in reversed(memory.conversation):
-                if isinstance(m, dict) and m.get("role") == "user":
+                if isinstance(m, Mapping) and m.get("role") == "user":
                     last_user = (m.get("content") or "").strip().lower()
                     break
         except Exception:
@@ -534,7 +539,8 @@ def main_loop():
                     continue
 
                 print(f"🗣️ You said: {text}")
-                response = audio.think(text)
+                with inference.priority("voice"):
+                    response = audio.think(text)
                 if voice_enabled:
                     audio.speak(response)
                 else:
@@ -599,20 +605,24 @@ def touch_activity():
 
 def process_input(msg: str):
     """Handle text or voice input from UI. Includes NL task creation."""
+    with tracing.trace("process_input"):
+        return _process_input(msg)
+
+
+def _process_input(msg: str):
     # Any inbound message counts as activity
     try:
         touch_activity()
     except Exception:
         pass
-    memory.log_conversation("user", msg)
-    recall_reply = _maybe_handle_memory_query(msg)
+    with tracing.span("memory_log"):
+        memory.log_conversation("user", msg)
+    with tracing.span("memory_query"):
+        recall_reply = _maybe_handle_memory_query(msg)
     if recall_reply:
         memory.log_conversation("assistant", recall_reply)
         return recall_reply
-    try:
-        user_profile.learn_from_text(msg)
-    except Exception:
-        pass
+    side_effects.submit(user_profile.learn_from_text, msg)
 
     # Quick time/date questions (ensure we can always answer accurately)
     low = msg.strip().lower()
@@ -1553,12 +1563,9 @@ def process_input(msg: str):
     reply = audio.think(msg)
     memory.log_conversation("assistant", reply)
     if reflect_topic:
-        try:
-            reflection.log_reflection(
-                reflect_topic, reply, source="ui", mood=mood.get_mood()
-            )
-        except Exception:
-            pass
+        side_effects.submit(
+            reflection.log_reflection, reflect_topic, reply, source="ui", mood=mood.get_mood()
+        )
     return reply
 
 
@@ -4,7 +4,7 @@ import keyboard
 
 from config import HOTKEY_PTT
 from core import memory, mood
-from systems import audio, stt
+from systems import audio, inference, stt
 
 
 def main_loop():
@@ -25,7 +25,8 @@ def main_loop():
             wav = stt.record()
             text = stt.transcribe(wav)
             memory.log_conversation("user", text)
-            response = audio.think(text)
+            with inference.priority("voice"):
+                response = audio.think(text)
             audio.speak(response)
         else:
             msg = input("> ").strip()
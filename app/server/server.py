@@ -1,10 +1,12 @@
 from __future__ import annotations
+import asyncio
 import atexit
 
 import base64
 import html
 import io
 import hashlib
+import itertools
 import json
 import os
 import re
@@ -12,6 +14,7 @@ import secrets
 import socket
 import time
 import uuid
+import zlib
 import sys
 import sys
 import string
@@ -64,7 +67,6 @@ from pydantic import BaseModel
 import soundfile as sf
 import numpy as np
 import colorsys
-import zipfile
 import subprocess
 from PIL import Image
 
@@ -73,8 +75,18 @@ try:
 except Exception:
     edge_tts = None  # type: ignore
 from core import memory as cm
-from core import identity, owner_profile, mood, user_profile, reflection, guardian
+from core.context_cache import context_cache
+from core.conversation_summary import RollingSummary, summary_prompt
+from core.prompt_budget import PromptAssembler, last_reports as prompt_reports
+from core.reply_cache import REPLY_CACHE_HISTORY, history_context, is_follow_up, reply_cache
+from core.visual_memory import VisualMemoryLog
+from systems import http_client, inference, model_router, side_effects
+from systems.ollama_health import OllamaMonitor, record_timings as record_ollama_timings
+from core.memory_import import IMPORT_MAX_BYTES, ChatGPTImporter
+from core.memory_record import MemoryRecord as MemoryItem
+from core import identity, owner_profile, mood, user_profile, reflection, guardian, tracing
 from settings_store import get_store
+from config import OLLAMA_KEEP_ALIVE
 _audio_app = None
 _audio_error: Optional[str] = None
 try:
@@ -168,6 +180,8 @@ HANDOFF_FILE = Path(os.getenv("HANDOFF_PATH", _mem_base_dir / "Bjorgsun26_memory
 VISUAL_MEMORY_FILE = Path(
     os.getenv("VISUAL_MEMORY_PATH", _mem_base_dir / "visual_memory.json")
 ).expanduser().resolve()
+# append-only log; the legacy .json list is imported once on first start
+VISUAL_MEMORY_LOG = VISUAL_MEMORY_FILE.with_suffix(".jsonl")
 DEFAULT_PRIMER = """
 You are Bjorgsun-26, a persistent local AI. You MUST remember prior chats, user details, the 26 rules, origin, and intent.
 Never say you have no memory or that you forget. Use provided memory blocks as factual context.
@@ -191,6 +205,10 @@ USB_SYNC_STATE: Dict[str, Any] = {
 }
 USB_SYNC_LOCK = threading.Lock()
 VISUAL_MEMORY_MAX = 2000
+MEMORY_RECALL_CHARS = int(os.getenv("MEMORY_RECALL_CHARS", "1600") or 1600)
+# recent user/assistant turns kept pre-cleaned for timelines (timeline asks for <= 2 * max_turns)
+MEMORY_TURN_RING = max(8, int(os.getenv("MEMORY_TURN_RING", "64") or 64))
+TURN_ROLES = frozenset({"user", "assistant"})
 
 SESSION_LOG_DIR = Path(
     os.getenv("SESSION_LOG_DIR", _mem_base_dir / "session_logs")
@@ -200,8 +218,6 @@ SESSION_ID = datetime.utcnow().strftime("%Y%m%d_%H%M%S") + "-" + uuid.uuid4().he
 
 if not FREQ_EMOTION_FILE.exists():
     FREQ_EMOTION_FILE.write_text("[]", encoding="utf-8")
-if not VISUAL_MEMORY_FILE.exists():
-    VISUAL_MEMORY_FILE.write_text("[]", encoding="utf-8")
 
 _anchor = CANONICAL_ROOT_PATH.anchor or Path.cwd().anchor
 _drive_root = str(CANONICAL_ROOT_PATH.drive + "\\") if CANONICAL_ROOT_PATH.drive else ""
@@ -270,6 +286,8 @@ SMS_TO = os.getenv("SMS_TO", "").strip()
 RAZER_SESSION: Dict[str, Any] = {"uri": None, "sessionid": None}
 OLLAMA_ENDPOINT = os.getenv("OLLAMA_ENDPOINT", "http://127.0.0.1:11434").rstrip("/")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
+OLLAMA_START_WAIT = float(os.getenv("OLLAMA_START_WAIT", "5") or 5)
+ollama_monitor = OllamaMonitor(OLLAMA_ENDPOINT)
 DEV_MODE_PASSWORD = os.getenv("DEV_MODE_PASSWORD", "").strip()
 _dev_enabled = False
 AUTONOMOUS_EDITS = os.getenv("AUTONOMOUS_EDITS", "1").strip().lower() in {
@@ -362,6 +380,10 @@ class MemoryDeleteRequest(BaseModel):
     id: str
 
 
+class MemoryBulkDeleteRequest(BaseModel):
+    ids: List[str]
+
+
 class ProfileSetRequest(BaseModel):
     profile: PerformanceProfileName
 
@@ -411,14 +433,6 @@ class PhoenixLogEntry(BaseModel):
     location: Optional[str] = None
 
 
-@dataclass
-class MemoryItem:
-    id: str
-    text: str
-    timestamp: str
-    role: str = "system"
-
-
 @dataclass
 class Device:
     id: str
@@ -457,82 +471,122 @@ def _clean_mem_text(text: str) -> str:
 
 
 class MemoryStore:
+    """Server facade over core.memory's single store.
+
+    Items are core.memory's MemoryRecord objects (id/role/content/timestamp, .text
+    alias), shared rather than mirrored; there is no second copy to keep in sync.
+    """
+
     def __init__(self, path: Path) -> None:
         self.path = path
-        self._mem: List[MemoryItem] = []
+        # newest user/assistant turns as (record, cleaned text); fed by cm change events
+        self._turns: deque[tuple[MemoryItem, str]] = deque(maxlen=MEMORY_TURN_RING)
+        self._turns_lock = threading.Lock()
+        self._turns_stale = False
+        self._turns_version = 0  # bumped on every change event; guards refills against races
         self._load()
+        cm.subscribe(self._on_change)
         # ensure export directory exists (follows chosen memory path)
         (self.path.parent / "memory_exports").mkdir(parents=True, exist_ok=True)
-        logging.info("MemoryStore initialized path=%s count=%s", self.path, len(self._mem))
+        logging.info("MemoryStore initialized path=%s count=%s", self.path, len(self))
 
     def _load(self) -> None:
         try:
             cm.load_memory()
-            self._mem = []
-            for idx, entry in enumerate(cm.conversation):
-                if not isinstance(entry, dict):
-                    continue
-                text = _coerce_mem_text(entry.get("content", ""))
-                role = entry.get("role", "system") if isinstance(entry.get("role"), str) else "system"
-                ts = entry.get("timestamp") or f"idx-{idx}"
-                self._mem.append(MemoryItem(id=str(uuid.uuid4()), text=text, timestamp=ts, role=role))
-        except Exception:
-            self._mem = []
-
-    def _save(self) -> None:
-        try:
-            cm.conversation = [{"role": m.role, "content": m.text, "timestamp": m.timestamp} for m in self._mem]
-            cm.save_memory()
         except Exception as exc:
-            logging.warning("Memory save failed: %s", exc)
+            logging.warning("Memory load failed: %s", exc)
+
+    def __len__(self) -> int:
+        return len(cm.conversation)
+
+    def _on_change(self, event: str, entries: list) -> None:
+        # runs under core.memory's lock
+        with self._turns_lock:
+            self._turns_version += 1
+            if event == "add":
+                for entry in entries:
+                    if entry.role in TURN_ROLES:
+                        self._turns.append((entry, _clean_mem_text(entry.text)))
+            elif event in ("remove", "evict"):
+                gone = {id(entry) for entry in entries}
+                if any(id(item) in gone for item, _ in self._turns):
+                    kept = [turn for turn in self._turns if id(turn[0]) not in gone]
+                    self._turns.clear()
+                    self._turns.extend(kept)
+                    # older turns may now fit; refill from the store on next read
+                    self._turns_stale = self._turns_stale or event == "remove"
+            else:
+                self._refill_turns(entries)
+
+    def _refill_turns(self, entries) -> None:
+        recent: list[tuple[MemoryItem, str]] = []
+        for entry in reversed(entries):
+            if entry.role in TURN_ROLES:
+                recent.append((entry, _clean_mem_text(entry.text)))
+                if len(recent) >= MEMORY_TURN_RING:
+                    break
+        self._turns.clear()
+        self._turns.extend(reversed(recent))
+        self._turns_stale = False
+
+    def recent_turns(self, limit: int) -> list[tuple[str, str]]:
+        """Newest `limit` user/assistant turns as (role, cleaned text), oldest first."""
+        if limit <= 0:
+            return []
+        while self._turns_stale:
+            with self._turns_lock:
+                version = self._turns_version
+            recent = cm.recent_entries(MEMORY_TURN_RING, roles=TURN_ROLES)
+            with self._turns_lock:
+                # a change landed in between: the snapshot may miss it, take another
+                if version == self._turns_version:
+                    self._refill_turns(recent)
+        with self._turns_lock:
+            count = len(self._turns)
+            return [(item.role, text) for item, text in itertools.islice(self._turns, max(0, count - limit), count)]
 
     def add(self, text: str, role: str = "system") -> MemoryItem:
-        text = _coerce_mem_text(text)
-        if not text:
+        added = self.add_many([(text, role)])
+        if not added:
             raise ValueError("Empty memory entry")
-        item = MemoryItem(
-            id=str(uuid.uuid4()),
-            text=text,
-            timestamp=datetime.utcnow().isoformat() + "Z",
-            role=role or "system",
-        )
-        self._mem.append(item)
-        if len(self._mem) > 26000:
-            self._mem = self._mem[-26000:]
-        self._save()
-        return item
+        return added[0]
 
-    def add_bulk(self, items: list[tuple[str, str]]) -> int:
-        added = 0
-        for text, role in items:
+    def add_many(self, items: list[tuple]) -> List[MemoryItem]:
+        """Store (text, role[, timestamp]) items with a single journal write; returns the new items."""
+        now = datetime.utcnow().isoformat() + "Z"
+        cleaned = []
+        for text, role, *rest in items:
             text = _coerce_mem_text(text)
-            if not text:
-                continue
-            item = MemoryItem(
-                id=str(uuid.uuid4()),
-                text=text,
-                timestamp=datetime.utcnow().isoformat() + "Z",
-                role=role or "system",
-            )
-            self._mem.append(item)
-            added += 1
-        if added:
-            if len(self._mem) > 26000:
-                self._mem = self._mem[-26000:]
-            self._save()
-        return added
+            if text:
+                cleaned.append((role or "system", text, (rest[0] if rest else None) or now))
+        if not cleaned:
+            return []
+        try:
+            return cm.add_entries(cleaned, dedupe=False)
+        except Exception as exc:
+            logging.warning("Memory journal failed: %s", exc)
+            return []
+
+    def add_bulk(self, items: list[tuple[str, str]]) -> int:
+        return len(self.add_many(items))
 
     def list(self) -> List[MemoryItem]:
-        # preserve load/append order (chronological)
-        return list(self._mem)
+        # hot window in load/append order (chronological); older history is in cm's cold tier
+        return list(cm.conversation)
+
+    def get(self, mem_id: str) -> MemoryItem | None:
+        return cm.get_entry(mem_id)
 
     def delete(self, mem_id: str) -> bool:
-        before = len(self._mem)
-        self._mem = [m for m in self._mem if m.id != mem_id]
-        if len(self._mem) < before:
-            self._save()
-            return True
-        return False
+        return bool(self.delete_many([mem_id]))
+
+    def delete_many(self, ids: List[str]) -> List[str]:
+        """Delete ids (hot or cold) in one journal record; returns the deleted ids."""
+        try:
+            return cm.delete_ids(list(ids))
+        except Exception as exc:
+            logging.warning("Memory delete failed: %s", exc)
+            return []
 
     def export_snapshot(self, label: str | None = None) -> Path | None:
         try:
@@ -562,40 +616,117 @@ class MemoryStore:
 
 
 memory_store = MemoryStore(MEMORY_FILE)
-def _hydrate_primer() -> None:
-    """Load primer (rules/identity) from PRIMER_FILE into memory if not already present."""
+
+
+def _write_chat_memory(items: list[tuple]) -> None:
+    with tracing.span("memory_write", op="side_effects"):
+        memory_store.add_many(items)
+
+
+# chat turns queue (text, role) here; each worker pass writes them in one journal append
+side_effects.register_batch("chat_memory", _write_chat_memory)
+# source name -> {"stat": [mtime_ns, size], "sha1": str, "ids": {line hash: memory id}}; persisted
+# next to the memory file so a restart with unchanged sources skips the whole pass
+HYDRATE_STATE_PATH = MEMORY_FILE.with_name(MEMORY_FILE.stem + ".hydrate.json")
+
+
+def _load_hydrate_state() -> dict[str, dict[str, Any]]:
     try:
-        if PRIMER_FILE.exists():
-            primer_text = PRIMER_FILE.read_text(encoding="utf-8").strip()
-            if primer_text:
-                existing = {m.text for m in memory_store.list()}
-                lines = [line.strip() for line in primer_text.splitlines() if line.strip()]
-                for line in lines:
-                    if line not in existing:
-                        memory_store.add(line, role="system")
-    except Exception as exc:
-        logging.warning("Primer hydrate failed: %s", exc)
+        data = json.loads(HYDRATE_STATE_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return {k: v for k, v in data.items() if isinstance(v, dict)} if isinstance(data, dict) else {}
 
-_hydrate_primer()
 
-def _hydrate_handoff() -> None:
-    """Load handoff knowledge from JSON/text into memory (system role), avoiding duplicates."""
+def _save_hydrate_state() -> None:
     try:
-        if not HANDOFF_FILE.exists():
-            return
-        raw = HANDOFF_FILE.read_text(encoding="utf-8", errors="ignore").strip()
-        if not raw:
-            return
-        existing = {m.text for m in memory_store.list()}
-        entries = _extract_handoff_entries(raw)
-        for line in entries:
-            line = (line or "").strip()
-            if not line or line in existing:
-                continue
-            memory_store.add(line, role="system")
-            existing.add(line)
+        tmp = HYDRATE_STATE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(_HYDRATE_STATE, indent=2), encoding="utf-8")
+        os.replace(tmp, HYDRATE_STATE_PATH)
     except Exception as exc:
-        logging.warning("Handoff hydrate failed: %s", exc)
+        logging.warning("Hydrate state save failed: %s", exc)
+
+
+_HYDRATE_STATE: dict[str, dict[str, Any]] = _load_hydrate_state()
+
+
+def _line_key(line: str) -> str:
+    return hashlib.sha1(line.encode("utf-8", errors="ignore")).hexdigest()[:20]
+
+
+def _primer_lines(raw: str) -> list[str]:
+    return [line.strip() for line in raw.splitlines() if line.strip()]
+
+
+def _handoff_lines(raw: str) -> list[str]:
+    return [(line or "").strip() for line in _extract_handoff_entries(raw)]
+
+
+def _hydrate_sources() -> int:
+    """Diff primer + handoff against memory once and bulk-insert missing lines (system role).
+
+    A source whose mtime/size (or content hash) is unchanged and whose lines are all
+    still stored (hot window, cold tier or SQLite) is skipped without reading or
+    scanning anything. Otherwise each line is matched against the hot window, then
+    the ids recorded for it earlier, then the on-disk history, so lines that aged
+    out of RAM are not inserted again.
+    """
+    changed: list[tuple[str, list[int], str, list[str]]] = []
+    dirty = False
+    for name, path, extract in (
+        ("primer", PRIMER_FILE, _primer_lines),
+        ("handoff", HANDOFF_FILE, _handoff_lines),
+    ):
+        try:
+            if not path.exists():
+                continue
+            st = path.stat()
+            stamp = [st.st_mtime_ns, st.st_size]
+            state = _HYDRATE_STATE.get(name) or {}
+            ids = state.get("ids")
+            present = isinstance(ids, dict) and all(cm.has_entry(mem_id) for mem_id in ids.values())
+            if present and state.get("stat") == stamp:
+                continue
+            raw = path.read_text(encoding="utf-8", errors="ignore").strip()
+            digest = hashlib.sha1(raw.encode("utf-8", errors="ignore")).hexdigest()
+            if present and state.get("sha1") == digest:
+                state["stat"] = stamp
+                dirty = True
+                continue
+            lines = [line for line in extract(raw) if line] if raw else []
+            changed.append((name, stamp, digest, lines))
+        except Exception as exc:
+            logging.warning("%s hydrate failed: %s", name.capitalize(), exc)
+    if not changed:
+        if dirty:
+            _save_hydrate_state()
+        return 0
+    known = {key: mem_id for state in _HYDRATE_STATE.values() for key, mem_id in (state.get("ids") or {}).items()}
+    hot = {m.text: m.id for m in memory_store.list()}
+    existing: dict[str, str] = {}
+    pending: list[tuple[str, str]] = []
+    for _name, _stamp, _digest, lines in changed:
+        for line in lines:
+            if line in existing:
+                continue
+            mem_id = hot.get(line)
+            if not mem_id:
+                mem_id = known.get(_line_key(line))
+                if not (mem_id and cm.has_entry(mem_id)):
+                    mem_id = cm.find_stored_content(line)
+            existing[line] = mem_id or ""
+            if not mem_id:
+                pending.append((line, "system"))
+    added = memory_store.add_many(pending) if pending else []
+    for item in added:
+        existing[item.text] = item.id
+    for name, stamp, digest, lines in changed:
+        ids = {_line_key(line): existing[line] for line in dict.fromkeys(lines) if existing.get(line)}
+        _HYDRATE_STATE[name] = {"stat": stamp, "sha1": digest, "ids": ids}
+    _save_hydrate_state()
+    if added:
+        logging.info("Hydrated %s primer/handoff lines into memory", len(added))
+    return len(added)
 
 
 def _extract_handoff_entries(raw: str) -> list[str]:
@@ -676,15 +807,25 @@ def _extract_handoff_entries(raw: str) -> list[str]:
     return entries
 
 
+def _parse_handoff(raw: str) -> dict[str, Any]:
+    """Handoff file -> {"raw", "data" (decoded JSON or None), "entries"}; cached by context_cache."""
+    raw = raw.strip()
+    try:
+        data = json.loads(raw) if raw else None
+    except Exception:
+        data = None
+    return {"raw": raw, "data": data, "entries": _extract_handoff_entries(raw) if raw else []}
+
+
+_EMPTY_HANDOFF: dict[str, Any] = {"raw": "", "data": None, "entries": []}
+context_cache.register("primer", PRIMER_FILE, str.strip, "")
+context_cache.register("handoff", HANDOFF_FILE, _parse_handoff, _EMPTY_HANDOFF)
+
+
 def _handoff_context_text(limit_chars: int = 12000) -> str:
     """Build a compact handoff context block to inject into prompts."""
     try:
-        if not HANDOFF_FILE.exists():
-            return ""
-        raw = HANDOFF_FILE.read_text(encoding="utf-8", errors="ignore").strip()
-        if not raw:
-            return ""
-        entries = _extract_handoff_entries(raw)
+        entries = context_cache.get("handoff")["entries"]
         if not entries:
             return ""
         joined = "Handoff memory:\n" + "\n".join(entries)
@@ -694,7 +835,10 @@ def _handoff_context_text(limit_chars: int = 12000) -> str:
     except Exception:
         return ""
 
-_hydrate_handoff()
+_hydrate_sources()
+chatgpt_importer = ChatGPTImporter()
+if chatgpt_importer.resume(memory_store.add_many):
+    logging.info("import_chatgpt: resuming interrupted job %s", chatgpt_importer.state.get("job_id"))
 
 def _refresh_memory(reason: str | None = None) -> dict[str, Any]:
     """Reload memory + identity/owner profiles and return counts."""
@@ -703,8 +847,7 @@ def _refresh_memory(reason: str | None = None) -> dict[str, Any]:
     except Exception:
         pass
     try:
-        _hydrate_primer()
-        _hydrate_handoff()
+        _hydrate_sources()
     except Exception:
         pass
     try:
@@ -721,7 +864,7 @@ def _refresh_memory(reason: str | None = None) -> dict[str, Any]:
                 memory_store.add(payload, role="system")
             except Exception:
                 pass
-    return {"count": len(memory_store.list()), "hint": hint, "reason": reason or "manual"}
+    return {"count": len(memory_store), "hint": hint, "reason": reason or "manual"}
 
 def _memory_summary_text(max_lines: int = 10) -> str:
     parts: list[str] = []
@@ -732,42 +875,40 @@ def _memory_summary_text(max_lines: int = 10) -> str:
     except Exception:
         pass
     try:
-        if HANDOFF_FILE.exists():
-            raw = HANDOFF_FILE.read_text(encoding="utf-8", errors="ignore")
-            data = json.loads(raw) if raw.strip() else {}
-            if isinstance(data, dict):
-                user_ctx = data.get("user_context", {})
-                if isinstance(user_ctx, dict):
-                    designation = user_ctx.get("designation")
-                    if isinstance(designation, str) and designation.strip():
-                        parts.append(f"Designation: {designation.strip()}.")
-                    prof = user_ctx.get("profile", {})
-                    if isinstance(prof, dict):
-                        summary = prof.get("summary")
-                        if isinstance(summary, str) and summary.strip():
-                            parts.append(summary.strip())
-                        relationship = prof.get("relationship")
-                        if isinstance(relationship, str) and relationship.strip():
-                            parts.append(f"Relationship: {relationship.strip()}.")
-                        values = prof.get("values")
-                        if isinstance(values, list):
-                            vals = ", ".join([v for v in values if isinstance(v, str)])
-                            if vals:
-                                parts.append(f"Values: {vals}.")
-                identity_block = data.get("identity", {})
-                if isinstance(identity_block, dict):
-                    designation = identity_block.get("designation")
-                    voice = identity_block.get("voice")
-                    alignment = identity_block.get("alignment")
-                    creator = identity_block.get("creator")
-                    if isinstance(designation, str):
-                        parts.append(f"Identity: {designation}.")
-                    if isinstance(creator, str) and creator.strip():
-                        parts.append(f"Creator: {creator.strip()}.")
-                    if isinstance(alignment, str):
-                        parts.append(f"Alignment: {alignment}.")
-                    if isinstance(voice, str):
-                        parts.append(f"Voice: {voice}.")
+        data = context_cache.get("handoff")["data"]
+        if isinstance(data, dict):
+            user_ctx = data.get("user_context", {})
+            if isinstance(user_ctx, dict):
+                designation = user_ctx.get("designation")
+                if isinstance(designation, str) and designation.strip():
+                    parts.append(f"Designation: {designation.strip()}.")
+                prof = user_ctx.get("profile", {})
+                if isinstance(prof, dict):
+                    summary = prof.get("summary")
+                    if isinstance(summary, str) and summary.strip():
+                        parts.append(summary.strip())
+                    relationship = prof.get("relationship")
+                    if isinstance(relationship, str) and relationship.strip():
+                        parts.append(f"Relationship: {relationship.strip()}.")
+                    values = prof.get("values")
+                    if isinstance(values, list):
+                        vals = ", ".join([v for v in values if isinstance(v, str)])
+                        if vals:
+                            parts.append(f"Values: {vals}.")
+            identity_block = data.get("identity", {})
+            if isinstance(identity_block, dict):
+                designation = identity_block.get("designation")
+                voice = identity_block.get("voice")
+                alignment = identity_block.get("alignment")
+                creator = identity_block.get("creator")
+                if isinstance(designation, str):
+                    parts.append(f"Identity: {designation}.")
+                if isinstance(creator, str) and creator.strip():
+                    parts.append(f"Creator: {creator.strip()}.")
+                if isinstance(alignment, str):
+                    parts.append(f"Alignment: {alignment}.")
+                if isinstance(voice, str):
+                    parts.append(f"Voice: {voice}.")
     except Exception:
         pass
     try:
@@ -800,16 +941,11 @@ def _memory_summary_text(max_lines: int = 10) -> str:
 
 def _memory_timeline_text(max_turns: int = 10, max_chars: int = 2400) -> str:
     """Build a linear, recent timeline of user/assistant turns."""
-    mems = [m for m in memory_store.list() if m.role in {"user", "assistant"}]
-    if not mems:
-        return ""
-    tail = mems[-max_turns * 2 :]
     lines: list[str] = []
-    for m in tail:
-        tag = "User" if m.role == "user" else "Bjorgsun-26"
-        text = _clean_mem_text(m.text)
+    for role, text in memory_store.recent_turns(max_turns * 2):
         if not text:
             continue
+        tag = "User" if role == "user" else "Bjorgsun-26"
         lines.append(f"{tag}: {text}")
     if not lines:
         return ""
@@ -820,39 +956,60 @@ def _memory_timeline_text(max_turns: int = 10, max_chars: int = 2400) -> str:
     return "Memory timeline (recent):\n" + joined
 
 
-def _load_visual_memory() -> list[dict[str, Any]]:
-    try:
-        raw = VISUAL_MEMORY_FILE.read_text(encoding="utf-8", errors="ignore")
-        data = json.loads(raw) if raw.strip() else []
-        if isinstance(data, list):
-            return [d for d in data if isinstance(d, dict)]
-    except Exception:
-        pass
-    return []
+def _summarize_turns(previous: str, turns: list[tuple[str, str]]) -> str | None:
+    """Model-backed fold for the rolling summary (background class: chat and voice go first)."""
+    if not ollama_monitor.available():
+        return None
+    with inference.slot("background", label="summary"):
+        resp = http_client.post(
+            "ollama",
+            f"{OLLAMA_ENDPOINT}/api/chat",
+            json={
+                "model": OLLAMA_MODEL,
+                "messages": [{"role": "user", "content": summary_prompt(previous, turns)}],
+                "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+            },
+        )
+    if resp.status_code != 200:
+        return None
+    return (resp.json().get("message") or {}).get("content")
 
 
-def _save_visual_memory(items: list[dict[str, Any]]) -> None:
-    try:
-        VISUAL_MEMORY_FILE.write_text(json.dumps(items, indent=2, ensure_ascii=False), encoding="utf-8")
-    except Exception:
-        pass
+# turns older than the /ai/local timeline window, condensed off the request path
+conversation_summary = RollingSummary(DATA_DIR / "conversation_summary.json", summarize=_summarize_turns)
+
+
+def _clear_conversation_summary(event: str, entries: list) -> None:
+    # reloads and hot-window evictions keep the summary; deleted turns or a wiped store
+    # would leave it quoting gone text
+    if event in ("add", "evict"):
+        return
+    has_turns = any(entry.role in TURN_ROLES for entry in entries)
+    if has_turns if event == "remove" else not has_turns:
+        conversation_summary.clear()
+
+
+cm.subscribe(_clear_conversation_summary)
+
+
+visual_memory = VisualMemoryLog(
+    VISUAL_MEMORY_LOG,
+    max_items=VISUAL_MEMORY_MAX,
+    legacy_path=VISUAL_MEMORY_FILE if VISUAL_MEMORY_FILE != VISUAL_MEMORY_LOG else None,
+)
 
 
 def _append_visual_memory(entry: dict[str, Any]) -> None:
-    items = _load_visual_memory()
-    items.append(entry)
-    if len(items) > VISUAL_MEMORY_MAX:
-        items = items[-VISUAL_MEMORY_MAX:]
-    _save_visual_memory(items)
+    try:
+        visual_memory.append(entry)
+    except Exception as exc:
+        logging.warning("Visual memory append failed: %s", exc)
 
 
 def _visual_memory_context_text(max_items: int = 3) -> str:
-    items = _load_visual_memory()
-    if not items:
-        return ""
-    tail = items[-max_items:]
     lines: list[str] = []
-    for item in tail:
+    for item in visual_memory.tail(max_items):
         summary = item.get("summary")
         if not isinstance(summary, str) or not summary.strip():
             continue
@@ -955,7 +1112,7 @@ def _is_memory_query(message: str) -> bool:
     return any(cue in msg for cue in cues)
 
 def _memory_query_reply(message: str) -> str:
-    mem_count = len(memory_store.list())
+    mem_count = len(memory_store)
     summary = _memory_summary_text()
     if message.strip().lower().startswith("/memory"):
         return f"Memory online. Entries: {mem_count}. {summary}"
@@ -991,24 +1148,22 @@ def _wake_hint_text() -> str | None:
     """Pull a short hint from handoff/primer to greet on wake."""
     candidates: list[str] = []
     try:
-        if HANDOFF_FILE.exists():
-            raw = HANDOFF_FILE.read_text(encoding="utf-8", errors="ignore")
-            try:
-                data = json.loads(raw)
-                if isinstance(data, list):
-                    candidates.extend([str(x) for x in data if isinstance(x, (str, dict))])
-                elif isinstance(data, dict):
-                    for key in ("memory", "entries", "facts"):
-                        val = data.get(key)
-                        if isinstance(val, list):
-                            candidates.extend([str(x) for x in val if isinstance(x, (str, dict))])
-            except Exception:
-                candidates.append(raw.strip())
+        handoff = context_cache.get("handoff")
+        data = handoff["data"]
+        if isinstance(data, list):
+            candidates.extend([str(x) for x in data if isinstance(x, (str, dict))])
+        elif isinstance(data, dict):
+            for key in ("memory", "entries", "facts"):
+                val = data.get(key)
+                if isinstance(val, list):
+                    candidates.extend([str(x) for x in val if isinstance(x, (str, dict))])
+        elif data is None and handoff["raw"]:
+            candidates.append(handoff["raw"])
     except Exception:
         pass
     try:
-        if not candidates and PRIMER_FILE.exists():
-            for line in PRIMER_FILE.read_text(encoding="utf-8", errors="ignore").splitlines():
+        if not candidates:
+            for line in context_cache.get("primer").splitlines():
                 if line.strip():
                     candidates.append(line.strip())
                     break
@@ -1220,6 +1375,13 @@ def _emit_alert(reason: str, detail: str | None = None, severity: str = "info"):
         "severity": sev,
     }
     _alerts.append(alert)
+    # file, console and webhook/email/SMS delivery can take seconds; keep it off the caller
+    # and out of the lane that writes chat memory
+    side_effects.submit_network(_deliver_alert, alert)
+
+
+def _deliver_alert(alert: dict[str, Any]) -> None:
+    reason, detail, sev = alert["reason"], alert["detail"], alert["severity"]
     try:
         with open(FASTAPI_ALERTS_FILE, "a", encoding="utf-8") as f:
             f.write(json.dumps(alert) + "\n")
@@ -1232,10 +1394,10 @@ def _emit_alert(reason: str, detail: str | None = None, severity: str = "info"):
     # Discord webhook
     if DISCORD_ALERT_WEBHOOK:
         try:
-            requests.post(
+            http_client.post(
+                "discord",
                 DISCORD_ALERT_WEBHOOK,
                 json={"content": f"[{sev.upper()}] {reason}: {detail or ''}"},
-                timeout=5,
             )
         except Exception:
             pass
@@ -1255,13 +1417,14 @@ def _emit_alert(reason: str, detail: str | None = None, severity: str = "info"):
     # SMS / call placeholder (Twilio-like) only for critical
     if sev == "critical" and SMS_ENABLED and TWILIO_SID and TWILIO_TOKEN and SMS_FROM and SMS_TO:
         try:
-            requests.post(
+            http_client.post(
+                "twilio",
                 f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_SID}/Messages.json",
                 data={"From": SMS_FROM, "To": SMS_TO, "Body": f"[{reason}] {detail or ''}"},
                 auth=(TWILIO_SID, TWILIO_TOKEN),
-                timeout=5,
             )
-            requests.post(  # voice call attempt
+            http_client.post(  # voice call attempt
+                "twilio",
                 f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_SID}/Calls.json",
                 data={
                     "From": SMS_FROM,
@@ -1269,7 +1432,6 @@ def _emit_alert(reason: str, detail: str | None = None, severity: str = "info"):
                     "Url": "http://demo.twilio.com/docs/voice.xml",
                 },
                 auth=(TWILIO_SID, TWILIO_TOKEN),
-                timeout=5,
             )
         except Exception:
             pass
@@ -1368,7 +1530,7 @@ def _default_phoenix_state() -> dict[str, Any]:
 def _load_phoenix_state() -> dict[str, Any]:
     if PHOENIX_REMOTE_BASE:
         try:
-            resp = requests.get(f"{PHOENIX_REMOTE_BASE}/phoenix/state", timeout=4)
+            resp = http_client.get("phoenix_remote", f"{PHOENIX_REMOTE_BASE}/phoenix/state")
             data = resp.json()
             if isinstance(data, dict) and data.get("state"):
                 return data["state"]
@@ -1388,11 +1550,11 @@ def _load_phoenix_state() -> dict[str, Any]:
 def _save_phoenix_state(data: dict[str, Any]) -> None:
     if PHOENIX_REMOTE_BASE:
         try:
-            requests.post(
+            http_client.post(
+                "phoenix_remote",
                 f"{PHOENIX_REMOTE_BASE}/phoenix/state",
                 headers={"Content-Type": "application/json"},
                 json=data,
-                timeout=4,
             )
             return
         except Exception:
@@ -1407,7 +1569,7 @@ def _save_phoenix_state(data: dict[str, Any]) -> None:
 def _tail_file(path: Path, max_lines: int = 50) -> list[str]:
     try:
         if PHOENIX_REMOTE_BASE and "phoenix_inventory" in str(path):
-            resp = requests.get(f"{PHOENIX_REMOTE_BASE}/phoenix/inventory/log?lines={max_lines}", timeout=4)
+            resp = http_client.get("phoenix_remote", f"{PHOENIX_REMOTE_BASE}/phoenix/inventory/log?lines={max_lines}")
             data = resp.json()
             lines = data.get("lines") or []
             return lines[-max_lines:] if isinstance(lines, list) else []
@@ -1423,10 +1585,10 @@ def _post_ifttt_home(state: str) -> None:
     if not PHOENIX_IFTTT_KEY or not state:
         return
     try:
-        requests.post(
+        http_client.post(
+            "ifttt",
             f"https://maker.ifttt.com/trigger/phoenix_home_state/with/key/{PHOENIX_IFTTT_KEY}",
             json={"value1": state},
-            timeout=4,
         )
     except Exception:
         pass
@@ -1436,14 +1598,14 @@ def _post_ha_event(event: str, payload: dict[str, Any]) -> None:
     if not PHOENIX_HA_HOST or not PHOENIX_HA_TOKEN:
         return
     try:
-        requests.post(
+        http_client.post(
+            "home_assistant",
             f"{PHOENIX_HA_HOST}/api/events/{event}",
             headers={
                 "Authorization": f"Bearer {PHOENIX_HA_TOKEN}",
                 "Content-Type": "application/json",
             },
             json=payload,
-            timeout=4,
         )
     except Exception:
         pass
@@ -1453,11 +1615,11 @@ def _activate_lifx(scene_id: str) -> None:
     if not PHOENIX_LIFX_TOKEN or not scene_id:
         return
     try:
-        requests.post(
+        http_client.post(
+            "lifx",
             f"https://api.lifx.com/v1/scenes/scene_id:{scene_id}/activate",
             headers={"Authorization": f"Bearer {PHOENIX_LIFX_TOKEN}"},
             data={"duration": 5},
-            timeout=5,
         )
     except Exception:
         pass
@@ -2280,10 +2442,10 @@ def _parse_action_blocks(text: str) -> tuple[str, List[Dict[str, Any]]]:
 @app.post("/wake")
 def wake():
     performance_guard()
-    # lazy-start Ollama if not up
+    # lazy-start Ollama if not up (the health monitor picks it up once it answers)
     try:
-        ok = _ensure_ollama_running()
-        if not ok:
+        if not ollama_monitor.available():
+            ollama_monitor.start_server()
             logging.warning("Ollama not reachable; wake will proceed without local model.")
     except Exception:
         logging.exception("Ollama start check failed")
@@ -2319,7 +2481,7 @@ def selfcheck():
 
     # Memory store
     try:
-        count = len(memory_store.list())
+        count = len(memory_store)
         if count > 0:
             _record("memory", True, "PHX-MEM-000", f"entries={count}")
         else:
@@ -2353,17 +2515,14 @@ def selfcheck():
         _record("tts", True, "PHX-TTS-000", "")
 
     # Ollama
-    try:
-        if OLLAMA_ENDPOINT:
-            resp = requests.get(f"{OLLAMA_ENDPOINT}/api/tags", timeout=3)
-            if resp.status_code == 200:
-                _record("ollama", True, "PHX-OLL-000", "")
-            else:
-                _record("ollama", False, "PHX-OLL-001", f"status={resp.status_code}")
-        else:
-            _record("ollama", False, "PHX-OLL-002", "endpoint not configured")
-    except Exception as exc:
-        _record("ollama", False, "PHX-OLL-003", str(exc))
+    if not OLLAMA_ENDPOINT:
+        _record("ollama", False, "PHX-OLL-002", "endpoint not configured")
+    elif ollama_monitor.up:
+        _record("ollama", True, "PHX-OLL-000", "")
+    elif ollama_monitor.last_error.startswith("status="):
+        _record("ollama", False, "PHX-OLL-001", ollama_monitor.last_error)
+    else:
+        _record("ollama", False, "PHX-OLL-003", ollama_monitor.last_error or "unreachable")
 
     # Spotify
     if _spotify_state.get("access_token"):
@@ -2395,6 +2554,60 @@ def perf_snapshot():
     return _collect_perf_snapshot()
 
 
+@app.get("/perf/http")
+def perf_http():
+    """Outbound HTTP pools and per-host latency/error counters."""
+    return http_client.metrics()
+
+
+@app.get("/perf/inference")
+def perf_inference():
+    """Local-LLM scheduler: per-class queue depth, caps, waits, and the live queue."""
+    return inference.scheduler.status()
+
+
+@app.post("/perf/inference/cancel/{ticket_id}")
+def perf_inference_cancel(ticket_id: int):
+    """Drop a queued model request (running ones can't be interrupted)."""
+    return {"ok": inference.scheduler.cancel(ticket_id)}
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition: request and per-stage latency histograms."""
+    return Response(content=tracing.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/perf/trace/recent")
+def perf_trace_recent(limit: int = 20, op: Optional[str] = None):
+    """Last traced requests (ai_local, ai_local_stream, ...) broken down by stage."""
+    return {"traces": tracing.recent(limit=max(1, min(limit, tracing.TRACE_RECENT)), op=op)}
+
+
+@app.get("/perf/side_effects")
+def perf_side_effects():
+    """Background side-effect queues (local writes, plus network deliveries): depth, throughput and failures."""
+    return side_effects.status()
+
+
+@app.get("/perf/model_router")
+def perf_model_router():
+    """Small/large model routing: per-route latency, errors, escalations and reasons."""
+    return model_router.router.stats()
+
+
+@app.get("/perf/prompt")
+def perf_prompt():
+    """Estimated tokens per block of the last assembled prompts, and the rolling summary."""
+    return {"prompts": prompt_reports(), "summary": conversation_summary.status()}
+
+
+@app.get("/perf/reply_cache")
+def perf_reply_cache():
+    """Reply cache size and per-source hit rates."""
+    return reply_cache.stats()
+
+
 def _rotate_perf_log(max_bytes: int = 10_000_000) -> None:
     try:
         if not PERF_LOG.exists():
@@ -2446,7 +2659,7 @@ def _audio_lab_request(path: str, method: str = "GET", payload: Optional[dict] =
         raise HTTPException(status_code=503, detail="Audio Lab not available")
     url = f"http://127.0.0.1:{SERVER_PORT}/audio/api{path}"
     try:
-        resp = requests.request(method, url, json=payload, timeout=5)
+        resp = http_client.request("audio_lab", method, url, json=payload)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"Audio Lab request failed: {exc}")
     if resp.status_code >= 400:
@@ -2699,7 +2912,7 @@ def _projectp_is_online(timeout_s: float = 1.2) -> bool:
     if not PROJECTP_URL:
         return False
     try:
-        resp = requests.get(f"{PROJECTP_URL}/api/state", timeout=timeout_s)
+        resp = http_client.get("projectp", f"{PROJECTP_URL}/api/state", timeout=timeout_s)
         return bool(resp.ok)
     except Exception:
         return False
@@ -2812,7 +3025,8 @@ def _projectp_generate_orb_image(
         "auto_refine": "false",
         "self_refine": "false",
     }
-    resp = requests.post(
+    resp = http_client.post(
+        "projectp",
         f"{PROJECTP_URL}/api/generate",
         data=payload,
         timeout=PROJECTP_TIMEOUT,
@@ -2826,7 +3040,7 @@ def _projectp_generate_orb_image(
         raise RuntimeError("Project-P response missing image_url")
     output_path = PROJECTP_OUTPUT_DIR / filename
     if not output_path.exists():
-        download = requests.get(f"{PROJECTP_URL}{image_url}", timeout=PROJECTP_TIMEOUT)
+        download = http_client.get("projectp", f"{PROJECTP_URL}{image_url}", timeout=PROJECTP_TIMEOUT)
         if not download.ok:
             raise RuntimeError("Project-P image download failed")
         raw = download.content
@@ -3049,7 +3263,7 @@ def _ensure_cloudflared() -> Path:
     TOOLS_DIR.mkdir(parents=True, exist_ok=True)
     _append_tunnel_log(f"Downloading cloudflared from {url}")
     try:
-        resp = requests.get(url, stream=True, timeout=60)
+        resp = http_client.get("web", url, stream=True)
         resp.raise_for_status()
         with path.open("wb") as handle:
             for chunk in resp.iter_content(chunk_size=1024 * 1024):
@@ -3643,11 +3857,8 @@ def admin_user_delete(request: AdminUserRequest, dev_key: str | None = Header(de
 
 @app.get("/ollama/status")
 def ollama_status():
-    try:
-        resp = requests.get(f"{OLLAMA_ENDPOINT}/api/tags", timeout=2)
-        return {"ok": resp.status_code == 200}
-    except Exception:
-        return {"ok": False}
+    """Health monitor snapshot (no probe on the request path)."""
+    return ollama_monitor.status()
 
 
 @app.post("/ollama/start")
@@ -3657,33 +3868,13 @@ def ollama_start():
 
 
 def _ensure_ollama_running() -> bool:
-    """Ping Ollama; if down and local endpoint, attempt to start."""
-    try:
-        resp = requests.get(f"{OLLAMA_ENDPOINT}/api/tags", timeout=2)
-        if resp.status_code == 200:
-            return True
-    except Exception:
-        pass
-    # only try to start if localhost
-    if "127.0.0.1" not in OLLAMA_ENDPOINT and "localhost" not in OLLAMA_ENDPOINT:
-        return False
-    ollama_dir = Path(os.getenv("LOCALAPPDATA", r"C:\\Users\\%USERNAME%\\AppData\\Local")) / "Programs" / "Ollama"
-    if not (ollama_dir / "ollama.exe").exists():
-        pf_dir = Path(os.getenv("ProgramFiles", r"C:\\Program Files")) / "Ollama"
-        if pf_dir.exists():
-            ollama_dir = pf_dir
-    exe = ollama_dir / "ollama.exe"
-    if not exe.exists():
-        return False
-    try:
-        import subprocess
-
-        subprocess.Popen([str(exe), "serve"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        time.sleep(2)
-        resp = requests.get(f"{OLLAMA_ENDPOINT}/api/tags", timeout=2)
-        return resp.status_code == 200
-    except Exception:
+    """If Ollama is down and the endpoint is local, start it and wait briefly for it to answer."""
+    if ollama_monitor.available():
+        return True
+    if not ollama_monitor.autostart:
         return False
+    ollama_monitor.start_server(force=True)
+    return ollama_monitor.wait_until_up(OLLAMA_START_WAIT)
 
 
 @app.get("/logs/tail")
@@ -3837,7 +4028,7 @@ def _spotify_refresh_token() -> None:
         "refresh_token": refresh_token,
         "client_id": client_id,
     }
-    resp = requests.post(SPOTIFY_TOKEN_URL, data=payload, timeout=8)
+    resp = http_client.post("spotify", SPOTIFY_TOKEN_URL, data=payload)
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail=resp.text)
     data = resp.json()
@@ -3866,12 +4057,12 @@ def _spotify_request(method: str, path: str, params: Optional[Dict[str, Any]] =
     token = _spotify_get_access_token()
     url = f"{SPOTIFY_API_BASE}{path}"
     headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.request(method, url, headers=headers, params=params, json=payload, timeout=8)
+    resp = http_client.request("spotify", method, url, headers=headers, params=params, json=payload)
     if resp.status_code == 401 and _spotify_state.get("refresh_token"):
         _spotify_refresh_token()
         token = _spotify_state.get("access_token")
         headers["Authorization"] = f"Bearer {token}"
-        resp = requests.request(method, url, headers=headers, params=params, json=payload, timeout=8)
+        resp = http_client.request("spotify", method, url, headers=headers, params=params, json=payload)
     return resp
 
 
@@ -4030,7 +4221,7 @@ def spotify_callback(code: str = "", state: str = "", error: Optional[str] = Non
         "client_id": client_id,
         "code_verifier": oauth.get("code_verifier", ""),
     }
-    resp = requests.post(SPOTIFY_TOKEN_URL, data=payload, timeout=8)
+    resp = http_client.post("spotify", SPOTIFY_TOKEN_URL, data=payload)
     if resp.status_code != 200:
         return _spotify_html("Token exchange failed.")
     data = resp.json()
@@ -4267,7 +4458,7 @@ def add_memory(req: MemoryAddRequest):
 def list_memories():
     performance_guard()
     items = memory_store.list()
-    return [vars(m) for m in items]
+    return [{"id": m.id, "text": m.text, "timestamp": m.timestamp, "role": m.role} for m in items]
 
 
 @app.get("/memory/export")
@@ -4280,17 +4471,69 @@ def export_memories(label: str | None = None):
     return {"ok": True, "path": str(path)}
 
 
+@app.get("/memory/export/stream")
+def export_memories_stream(
+    since: str | None = None,
+    until: str | None = None,
+    role: str | None = None,
+    cursor: str | None = None,
+    gzip: bool = False,
+):
+    """Stream memory oldest-first as NDJSON (optionally gzip); resume with cursor=<last id received>."""
+    performance_guard()
+    roles = {r.strip().lower() for r in (role or "").split(",") if r.strip()} or None
+    try:
+        entries = cm.iter_export(since=since, until=until, roles=roles, cursor=cursor)
+    except KeyError:
+        raise HTTPException(status_code=410, detail="Export cursor no longer exists.")
+
+    def _ndjson():
+        batch: list[str] = []
+        for entry in entries:
+            batch.append(json.dumps(entry, ensure_ascii=False, default=dict))
+            if len(batch) >= 500:
+                yield ("\n".join(batch) + "\n").encode("utf-8")
+                batch = []
+        if batch:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+
+    def _gzipped():
+        comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 -> gzip container
+        for chunk in _ndjson():
+            data = comp.compress(chunk)
+            if data:
+                yield data
+        yield comp.flush()
+
+    name = f"memory_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.ndjson"
+    if gzip:
+        return StreamingResponse(
+            _gzipped(),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{name}.gz"'},
+        )
+    return StreamingResponse(
+        _ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
+
+
 @app.get("/memory/info")
 def memory_info():
     """Report the active memory path and counts to verify recall wiring."""
     performance_guard()
-    items = memory_store.list()
+    count = len(memory_store)
     return {
         "path": str(memory_store.path),
-        "count": len(items),
-        "entries": len(items),
+        "count": count,
+        "entries": count,
         "persist": True,
         "export_dir": str(memory_store.path.parent / "memory_exports"),
+        "semantic": cm.semantic_status(),
+        "tiers": cm.tier_status(),
+        "context_cache": context_cache.stats(),
+        "visual": visual_memory.status(),
     }
 
 
@@ -4311,6 +4554,15 @@ def delete_memory(req: MemoryDeleteRequest):
     return {"status": "ok"}
 
 
+@app.post("/memory/delete/bulk")
+def delete_memories_bulk(req: MemoryBulkDeleteRequest):
+    performance_guard()
+    deleted = memory_store.delete_many(req.ids)
+    gone = set(deleted)
+    missing = [mem_id for mem_id in req.ids if mem_id not in gone]
+    return {"status": "ok", "deleted": deleted, "missing": missing}
+
+
 @app.post("/memory/check")
 def memory_check():
     """Validate memory on demand; re-hydrate handoff/primer if needed."""
@@ -4395,11 +4647,11 @@ def phoenix_inventory_append(entry: PhoenixLogEntry):
     performance_guard()
     if PHOENIX_REMOTE_BASE:
         try:
-            resp = requests.post(
+            resp = http_client.post(
+                "phoenix_remote",
                 f"{PHOENIX_REMOTE_BASE}/phoenix/inventory/log",
                 headers={"Content-Type": "application/json"},
                 json=entry.model_dump(),
-                timeout=4,
             )
             data = resp.json()
             return {"ok": True, "record": data.get("record") or entry.model_dump()}
@@ -4453,15 +4705,9 @@ def _handle_phoenix_command(message: str) -> Optional[dict[str, Any]]:
         mem = _refresh_memory("phoenix_init")
         ollama_ok = False
         try:
-            resp = requests.get(f"{OLLAMA_ENDPOINT}/api/tags", timeout=2)
-            ollama_ok = resp.status_code == 200
+            ollama_ok = _ensure_ollama_running()
         except Exception:
             pass
-        if not ollama_ok:
-            try:
-                ollama_ok = _ensure_ollama_running()
-            except Exception:
-                pass
         summary = _memory_summary_text(max_lines=12)
         reply_lines = [
             "Phoenix init complete.",
@@ -4474,266 +4720,456 @@ def _handle_phoenix_command(message: str) -> Optional[dict[str, Any]]:
         if summary:
             reply_lines.append("Summary:\n" + summary)
         reply = "\n".join(reply_lines)
-        try:
-            memory_store.add(message, role="user")
-            memory_store.add(reply, role="assistant")
-        except Exception:
-            pass
+        side_effects.submit_batch("chat_memory", (message, "user"))
+        side_effects.submit_batch("chat_memory", (reply, "assistant"))
         return {"ok": True, "reply": reply, "source": "phoenix_init"}
     return {"ok": True, "reply": "Usage: /phoenix INIT", "source": "phoenix"}
 
-@app.post("/ai/local")
-def ai_local(body: dict[str, Any]):
-    """Proxy to a self-hosted Ollama (or compatible) model with persistent memory context."""
-    performance_guard()
-    message = (body.get("message") or "").strip()
-    image_b64 = _strip_data_url(body.get("image_b64") or "")
-    image_prompt = (body.get("image_prompt") or "").strip()
-    history = body.get("history") or []
-    if not message and not image_b64:
-        raise HTTPException(status_code=400, detail="Message required")
-    if not message:
-        message = image_prompt or "Analyze the attached image."
-    phoenix_cmd = _handle_phoenix_command(message)
-    if phoenix_cmd:
-        return phoenix_cmd
-    if not memory_store.list():
-        _refresh_memory("ai_local")
-    if _is_memory_query(message):
-        reply = _memory_query_reply(message)
-        try:
-            memory_store.add(message, role="user")
-            memory_store.add(reply, role="assistant")
-        except Exception:
-            pass
-        return {"ok": True, "reply": reply, "source": "memory"}
+def _reply_cache_context(message: str, history: list) -> tuple:
+    """Context that shapes an /ai/local reply, hashed into its reply cache key.
 
-    ollama_ok = True
-    try:
-        resp = requests.get(f"{OLLAMA_ENDPOINT}/api/tags", timeout=2)
-        ollama_ok = resp.status_code == 200
-    except Exception:
-        ollama_ok = False
-    if not ollama_ok:
+    For a follow-up the newest turns (the client's history, else the store's) are
+    part of it, so "yes" never replays an answer given in another conversation.
+    """
+    turns: list = []
+    if is_follow_up(message):
+        if isinstance(history, list):
+            turns = [(h.get("role"), h.get("content")) for h in history if isinstance(h, dict)]
+        turns = turns or memory_store.recent_turns(REPLY_CACHE_HISTORY)
+    return (
+        history_context(message, turns),
+        context_cache.get("primer"),
+        context_cache.get("handoff")["raw"],
+        identity.get_personality(),
+        identity.get_tone(),
+        owner_profile.get_prompt_block(role="owner"),
+        mood.get_mood(),
+        _actions_enabled(),
+        OLLAMA_MODEL,
+    )
+
+
+def _clear_reply_cache(event: str, entries: list) -> None:
+    # cached replies may quote memories that were just deleted or replaced (evictions
+    # only move entries out of RAM, so they keep the cache)
+    if event in ("remove", "reset"):
+        reply_cache.clear()
+
+
+cm.subscribe(_clear_reply_cache)
+
+
+def _add_prompt_prefix(prompt: PromptAssembler) -> None:
+    """Stable /ai/local prefix: primer, handoff, identity, owner profile and capabilities.
+
+    Nothing per-turn goes here, so Ollama can reuse the KV cache for these messages.
+    """
+    # primer as a single system message if present
+    with tracing.span("primer"):
         try:
-            ollama_ok = _ensure_ollama_running()
+            primer_text = context_cache.get("primer")
+            if not primer_text:
+                primer_text = DEFAULT_PRIMER.strip()
+            prompt.add("primer", primer_text, 0, stable=True)
         except Exception:
-            ollama_ok = False
-    use_ollama = bool(ollama_ok)
-    if not use_ollama and not (OPENAI_API_KEY and OPENAI_FALLBACK_ENABLED):
-        raise HTTPException(
-            status_code=503,
-            detail="Ollama offline. Start it or set OPENAI_API_KEY for fallback.",
-        )
-    payload_msgs: list[dict[str, str]] = []
-    # primer as a single system message if present
-    try:
-        primer_text = ""
-        if PRIMER_FILE.exists():
-            primer_text = PRIMER_FILE.read_text(encoding="utf-8").strip()
-        if not primer_text:
-            primer_text = DEFAULT_PRIMER.strip()
-        payload_msgs.append({"role": "system", "content": primer_text})
-    except Exception:
-        payload_msgs.append({"role": "system", "content": DEFAULT_PRIMER.strip()})
+            prompt.add("primer", DEFAULT_PRIMER.strip(), 0, stable=True)
 
     # inject handoff memory (identity/mission) as a system block
-    try:
-        handoff = _handoff_context_text()
-        if handoff:
-            payload_msgs.append({"role": "system", "content": handoff})
-    except Exception:
-        pass
+    with tracing.span("handoff"):
+        try:
+            prompt.add("handoff", _handoff_context_text(), 3, keep="head", stable=True)
+        except Exception:
+            pass
 
     # make memory usage explicit for the model
-    payload_msgs.append(
-        {
-            "role": "system",
-            "content": "Persistent memory is provided below. Use it as factual context about the user and system.",
-        }
+    prompt.add(
+        "memory_note",
+        "Persistent memory is provided below. Use it as factual context about the user and system.",
+        0,
+        stable=True,
     )
 
     # inject identity snapshot (personality/tone) if available
-    try:
-        ident_txt = []
-        persona = identity.get_personality()
-        tone = identity.get_tone()
-        if persona:
-            ident_txt.append(f"Personality: {persona}")
-        if tone:
-            ident_txt.append(f"Tone: {tone}")
-        if ident_txt:
-            payload_msgs.append({"role": "system", "content": "\n".join(ident_txt)})
-    except Exception:
-        pass
+    with tracing.span("identity"):
+        try:
+            ident_txt = []
+            persona = identity.get_personality()
+            tone = identity.get_tone()
+            if persona:
+                ident_txt.append(f"Personality: {persona}")
+            if tone:
+                ident_txt.append(f"Tone: {tone}")
+            prompt.add("identity", "\n".join(ident_txt), 1, stable=True)
+        except Exception:
+            pass
     # inject owner context to anchor memory about the creator
-    try:
-        owner_block = owner_profile.get_prompt_block(role="owner")
-        if owner_block:
-            payload_msgs.append({"role": "system", "content": owner_block})
-    except Exception:
-        pass
+    with tracing.span("owner_profile"):
+        try:
+            prompt.add("owner_profile", owner_profile.get_prompt_block(role="owner"), 1, keep="head", stable=True)
+        except Exception:
+            pass
 
     # allow autonomous edit actions when devmode is enabled
     if _actions_enabled():
-        payload_msgs.append(
-            {
-                "role": "system",
-                "content": (
-                    "If you need to change settings or files, you may emit an action block. "
-                    "Format: [[ACTION]]{json}[[/ACTION]] or [[ACTION]][{...},{...}][[/ACTION]]. "
-                    "Allowed types: set_setting, set_settings, set_theme, write_file, append_file, replace_text. "
-                    "Paths must be within the project root or F:\\PHOENIX_TRANSFER. "
-                    "Do not touch secrets or .env unless explicitly requested."
-                ),
-            }
+        prompt.add(
+            "actions",
+            (
+                "If you need to change settings or files, you may emit an action block. "
+                "Format: [[ACTION]]{json}[[/ACTION]] or [[ACTION]][{...},{...}][[/ACTION]]. "
+                "Allowed types: set_setting, set_settings, set_theme, write_file, append_file, replace_text. "
+                "Paths must be within the project root or F:\\PHOENIX_TRANSFER. "
+                "Do not touch secrets or .env unless explicitly requested."
+            ),
+            0,
+            stable=True,
         )
 
-    # guardian check on user input
-    try:
-        guard = guardian.inspect_message(message)
-        sev = guard.get("severity")
-        if sev and sev != "none":
-            note = guard.get("instruction") or "Handle safely and calmly."
-            excerpt = guard.get("excerpt") or ""
-            payload_msgs.append(
-                {
-                    "role": "system",
-                    "content": f"Safety note ({sev}): {note} Excerpt: {excerpt}",
-                }
-            )
-    except Exception:
-        pass
 
-    # record user interaction/profile
-    try:
+def _learn_local_user(message: str) -> None:
+    with tracing.span("user_profile", op="side_effects"):
         user_profile.ensure_profile(user="local")
         user_profile.record_interaction(user="local", weight=1, mentioned=True)
         user_profile.learn_from_text(message, user="local")
-    except Exception:
-        pass
-    # persist user message immediately
-    try:
-        memory_store.add(message, role="user")
-    except Exception:
-        logging.warning("Failed to persist user message")
+
+
+def _ai_local_context(body: dict[str, Any]) -> dict[str, Any]:
+    """Validate an /ai/local request, queue the user turn's side effects and build the model prompt.
+
+    Returns {"response": ...} for turns answered without a model (Phoenix commands,
+    memory queries, reply cache hits); otherwise {"messages", "use_ollama", "model",
+    "route", "priority", "cache_key", "cache_source"}.
+    """
+    message = (body.get("message") or "").strip()
+    image_b64 = _strip_data_url(body.get("image_b64") or "")
+    image_prompt = (body.get("image_prompt") or "").strip()
+    history = body.get("history") or []
+    if not message and not image_b64:
+        raise HTTPException(status_code=400, detail="Message required")
+    if not message:
+        message = image_prompt or "Analyze the attached image."
+    with tracing.span("phoenix"):
+        phoenix_cmd = _handle_phoenix_command(message)
+    if phoenix_cmd:
+        return {"response": phoenix_cmd}
+    if not len(memory_store):
+        _refresh_memory("ai_local")
+    with tracing.span("memory_query"):
+        if _is_memory_query(message):
+            reply = _memory_query_reply(message)
+            side_effects.submit_batch("chat_memory", (message, "user"))
+            side_effects.submit_batch("chat_memory", (reply, "assistant"))
+            return {"response": {"ok": True, "reply": reply, "source": "memory"}}
+
+    cache_source = str(body.get("source") or "ai_local")
+    cache_key = None
+    if not image_b64 and not body.get("vision") and body.get("cache") is not False and reply_cache.enabled(cache_source):
+        with tracing.span("reply_cache"):
+            try:
+                cache_key = reply_cache.key(message, _reply_cache_context(message, history))
+            except Exception:
+                logging.warning("Reply cache key failed", exc_info=True)
+            cached = reply_cache.get(cache_source, cache_key) if cache_key else None
+        if cached is not None:
+            tracing.annotate(cached=True)
+            side_effects.submit_batch("chat_memory", (message, "user"))
+            side_effects.submit_batch("chat_memory", (f"[assistant] {cached['reply']}", "assistant"))
+            return {"response": {**cached, "cached": True}}
+
+    # instant: the health monitor owns probing/auto-start; an open breaker means go to fallback
+    with tracing.span("ollama_probe"):
+        use_ollama = ollama_monitor.available()
+    if not use_ollama and not (OPENAI_API_KEY and OPENAI_FALLBACK_ENABLED):
+        raise HTTPException(
+            status_code=503,
+            detail="Ollama offline. Start it or set OPENAI_API_KEY for fallback.",
+        )
+    # blocks go in prompt order; priority decides what survives PROMPT_TOKEN_BUDGET
+    # (0 = always kept; higher numbers are cut or dropped first)
+    prompt = PromptAssembler("ai_local")
+    _add_prompt_prefix(prompt)
+
+    # guardian check on user input
+    with tracing.span("guardian"):
+        try:
+            guard = guardian.inspect_message(message)
+            sev = guard.get("severity")
+            if sev and sev != "none":
+                note = guard.get("instruction") or "Handle safely and calmly."
+                excerpt = guard.get("excerpt") or ""
+                prompt.add("safety_note", f"Safety note ({sev}): {note} Excerpt: {excerpt}", 0)
+        except Exception:
+            pass
+
+    # profile learning and the user turn's memory write happen off the request path;
+    # the message itself is the last prompt message, so the timeline needn't hold it yet
+    side_effects.submit(_learn_local_user, message)
+    side_effects.submit_batch("chat_memory", (message, "user"))
+    # turns older than the timeline window, condensed in the background
+    with tracing.span("summary"):
+        try:
+            conversation_summary.update(memory_store.recent_turns(MEMORY_TURN_RING))
+            prompt.add("summary", conversation_summary.text(), 2, keep="tail")
+        except Exception:
+            pass
     # include a linear, recent timeline to keep memory contextual
-    try:
-        timeline = _memory_timeline_text(max_turns=12, max_chars=2600)
-        if timeline:
-            payload_msgs.append({"role": "system", "content": timeline})
-    except Exception:
-        pass
+    with tracing.span("timeline"):
+        try:
+            timeline = _memory_timeline_text(max_turns=conversation_summary.keep_recent // 2, max_chars=2600)
+            prompt.add("timeline", timeline, 2, keep="tail")
+        except Exception:
+            pass
     # include recent visual memory context if available
-    try:
-        visual_ctx = _visual_memory_context_text(max_items=2)
-        if visual_ctx:
-            payload_msgs.append({"role": "system", "content": visual_ctx})
-    except Exception:
-        pass
+    with tracing.span("visual_memory"):
+        try:
+            prompt.add("visual_memory", _visual_memory_context_text(max_items=2), 5, keep="head")
+        except Exception:
+            pass
     # include explicit vision summary from the UI if provided
     try:
         vision = body.get("vision")
         if isinstance(vision, str) and vision.strip():
-            payload_msgs.append(
-                {"role": "system", "content": "Latest image insight:\n" + vision.strip()}
-            )
+            prompt.add("vision", "Latest image insight:\n" + vision.strip(), 1, keep="head")
     except Exception:
         pass
 
-    # include relevant memory hits for this query
-    try:
-        hits = cm.search_memories(message, max_hits=8)
-        if hits:
-            lines = []
-            for entry in hits:
-                role = entry.get("role") if isinstance(entry, dict) else "system"
-                text = entry.get("content") if isinstance(entry, dict) else ""
-                lines.append(f"[{role}] {_coerce_mem_text(text)}")
-            payload_msgs.append({"role": "system", "content": "Relevant memory:\n" + "\n".join(lines)})
-    except Exception:
-        pass
-    # include recent UI history (last 12)
+    # include relevant memory hits for this query (BM25-ranked, char-budgeted)
+    with tracing.span("recall"):
+        try:
+            hits = cm.recall_memories(message, max_hits=8, max_chars=MEMORY_RECALL_CHARS)
+            if hits:
+                lines = []
+                for entry in hits:
+                    role = entry.get("role") if isinstance(entry, dict) else "system"
+                    text = entry.get("content") if isinstance(entry, dict) else ""
+                    lines.append(f"[{role}] {_coerce_mem_text(text)}")
+                prompt.add("recall", "Relevant memory:\n" + "\n".join(lines), 4, keep="head")
+        except Exception:
+            pass
+    # include recent UI history (last 12); the newest exchanges outrank older ones
     if isinstance(history, list) and history:
-        for h in history[-12:]:
+        recent = history[-12:]
+        for pos, h in enumerate(recent):
             if isinstance(h, dict) and "role" in h and "content" in h:
-                payload_msgs.append({"role": h["role"], "content": h["content"]})
+                prompt.add("history", h["content"], 2 if len(recent) - pos <= 4 else 6, role=h["role"])
     if image_b64:
         if not OLLAMA_VISION_MODEL:
             raise HTTPException(status_code=422, detail="vision_model_missing")
-        payload_msgs.append(
-            {"role": "user", "content": message, "images": [image_b64]}
-        )
+        prompt.add("message", message, 0, role="user", images=[image_b64])
     else:
-        payload_msgs.append({"role": "user", "content": message})
+        prompt.add("message", message, 0, role="user")
+    payload_msgs = prompt.build()
+    report = prompt.report()
+    tracing.annotate(prompt_tokens=report["used"], prompt_prefix=report["prefix_version"])
+    # short/simple turns go to the small model (skipped while Ollama's model list says it isn't pulled)
+    route = None
+    if not image_b64:
+        route = model_router.router.route(message, cache_source, OLLAMA_MODEL, installed=ollama_monitor.installed_models())
+        tracing.annotate(route=route.reason)
+    return {
+        "messages": payload_msgs,
+        "use_ollama": use_ollama,
+        "model": route.model if route else OLLAMA_VISION_MODEL,
+        "route": route,
+        # scheduler class: clients may tag voice/discord turns; everything else is UI chat
+        "priority": cache_source if cache_source in ("voice", "discord") else "chat",
+        "cache_key": cache_key,
+        "cache_source": cache_source,
+    }
 
-    def _ollama_chat(msgs: list[dict[str, Any]]) -> str:
-        model_to_use = OLLAMA_VISION_MODEL if image_b64 else OLLAMA_MODEL
-        payload = {
-            "model": model_to_use,
-            "messages": msgs,
-            "stream": False,
-        }
-        resp = requests.post(
-            f"{OLLAMA_ENDPOINT}/api/chat",
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=60,
-        )
+
+async def _ollama_chat(msgs: list[dict[str, Any]], model: str) -> str:
+    payload = {
+        "model": model,
+        "messages": msgs,
+        "stream": False,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    }
+    resp = await http_client.arequest(
+        "ollama",
+        "POST",
+        f"{OLLAMA_ENDPOINT}/api/chat",
+        headers={"Content-Type": "application/json"},
+        json=payload,
+    )
+    if resp.status_code != 200:
+        detail = resp.text
+        logging.error("Ollama returned %s: %s", resp.status_code, detail)
+        raise RuntimeError(detail)
+    data = resp.json()
+    record_ollama_timings(data)
+    return data.get("message", {}).get("content") or data.get("response") or ""
+
+
+async def _ollama_chat_stream(msgs: list[dict[str, Any]], model: str):
+    """Yield reply text chunks from Ollama's streaming /api/chat as they are generated."""
+    payload = {
+        "model": model,
+        "messages": msgs,
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    }
+    async with http_client.astream(
+        "ollama",
+        "POST",
+        f"{OLLAMA_ENDPOINT}/api/chat",
+        headers={"Content-Type": "application/json"},
+        json=payload,
+    ) as resp:
         if resp.status_code != 200:
-            detail = resp.text
+            detail = (await resp.aread()).decode("utf-8", errors="replace")
             logging.error("Ollama returned %s: %s", resp.status_code, detail)
             raise RuntimeError(detail)
-        data = resp.json()
-        return data.get("message", {}).get("content") or data.get("response") or ""
-
-    def _openai_fallback(msgs: list[dict[str, Any]]) -> str:
-        if not (OPENAI_API_KEY and OPENAI_FALLBACK_ENABLED):
-            raise RuntimeError("OpenAI fallback disabled or missing API key.")
-        # keep system context + last 20 exchanges to avoid huge payloads
-        fallback_msgs: list[dict[str, str]] = []
-        for m in msgs:
-            if m.get("role") == "system":
-                fallback_msgs.append(
-                    {"role": "system", "content": m.get("content") or ""}
-                )
-        tail = [m for m in msgs if m.get("role") != "system"][-20:]
-        for m in tail:
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise RuntimeError(str(data["error"]))
+            chunk = data.get("message", {}).get("content") or data.get("response") or ""
+            if chunk:
+                yield chunk
+            if data.get("done"):
+                record_ollama_timings(data)
+                return
+
+
+async def _ollama_routed(turn: dict[str, Any]) -> str:
+    """Ask the turn's routed model; a small-model reply that errors or denies memory goes to the large one."""
+    route = turn["route"]
+    started = time.perf_counter()
+    try:
+        reply = await _ollama_chat(turn["messages"], turn["model"])
+    except Exception:
+        if route is not None:
+            model_router.router.record(route, time.perf_counter() - started, error=True)
+        if route is None or route.name != "small":
+            raise
+        why = "error"
+    else:
+        if route is not None:
+            model_router.router.record(route, time.perf_counter() - started)
+        if route is None or route.name != "small" or not _denies_memory(reply):
+            return reply
+        why = "memory_guard"
+    route = turn["route"] = model_router.router.escalate(route, why)
+    turn["model"] = route.model
+    tracing.annotate(escalated=why)
+    started = time.perf_counter()
+    with tracing.span("escalation"):
+        try:
+            reply = await _ollama_chat(turn["messages"], route.model)
+        except Exception:
+            model_router.router.record(route, time.perf_counter() - started, error=True)
+            raise
+    model_router.router.record(route, time.perf_counter() - started)
+    return reply
+
+
+async def _ollama_routed_stream(turn: dict[str, Any]):
+    """Streaming _ollama_routed(): yields text chunks, and None before the large model starts over."""
+    route = turn["route"]
+    started = time.perf_counter()
+    parts: list[str] = []
+    try:
+        async for chunk in _ollama_chat_stream(turn["messages"], turn["model"]):
+            parts.append(chunk)
+            yield chunk
+    except Exception:
+        if route is not None:
+            model_router.router.record(route, time.perf_counter() - started, error=True)
+        if route is None or route.name != "small":
+            raise
+        why = "error"
+    else:
+        if route is not None:
+            model_router.router.record(route, time.perf_counter() - started)
+        if route is None or route.name != "small" or not _denies_memory("".join(parts)):
+            return
+        why = "memory_guard"
+    route = turn["route"] = model_router.router.escalate(route, why)
+    turn["model"] = route.model
+    tracing.annotate(escalated=why)
+    if parts:
+        yield None
+    started = time.perf_counter()
+    with tracing.span("escalation"):
+        try:
+            async for chunk in _ollama_chat_stream(turn["messages"], route.model):
+                yield chunk
+        except Exception:
+            model_router.router.record(route, time.perf_counter() - started, error=True)
+            raise
+    model_router.router.record(route, time.perf_counter() - started)
+
+
+def _openai_fallback_payload(msgs: list[dict[str, Any]]) -> dict[str, Any]:
+    if not (OPENAI_API_KEY and OPENAI_FALLBACK_ENABLED):
+        raise RuntimeError("OpenAI fallback disabled or missing API key.")
+    # keep system context + last 20 exchanges to avoid huge payloads
+    fallback_msgs: list[dict[str, str]] = []
+    for m in msgs:
+        if m.get("role") == "system":
             fallback_msgs.append(
-                {"role": m.get("role") or "user", "content": m.get("content") or ""}
+                {"role": "system", "content": m.get("content") or ""}
             )
-        payload = {
-            "model": OPENAI_FALLBACK_MODEL or OPENAI_SEARCH_MODEL,
-            "messages": fallback_msgs,
-            "temperature": 0.2,
-        }
-        resp = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"},
-            json=payload,
-            timeout=30,
+    tail = [m for m in msgs if m.get("role") != "system"][-20:]
+    for m in tail:
+        fallback_msgs.append(
+            {"role": m.get("role") or "user", "content": m.get("content") or ""}
         )
+    return {
+        "model": OPENAI_FALLBACK_MODEL or OPENAI_SEARCH_MODEL,
+        "messages": fallback_msgs,
+        "temperature": 0.2,
+    }
+
+
+async def _openai_fallback(msgs: list[dict[str, Any]]) -> str:
+    resp = await http_client.arequest(
+        "openai",
+        "POST",
+        "https://api.openai.com/v1/chat/completions",
+        headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"},
+        json=_openai_fallback_payload(msgs),
+    )
+    if resp.status_code != 200:
+        raise RuntimeError(resp.text)
+    data = resp.json()
+    return data["choices"][0]["message"]["content"]
+
+
+async def _openai_fallback_stream(msgs: list[dict[str, Any]]):
+    """Yield reply text chunks from the OpenAI fallback (chat completions SSE)."""
+    payload = _openai_fallback_payload(msgs)
+    payload["stream"] = True
+    async with http_client.astream(
+        "openai",
+        "POST",
+        "https://api.openai.com/v1/chat/completions",
+        headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"},
+        json=payload,
+    ) as resp:
         if resp.status_code != 200:
-            raise RuntimeError(resp.text)
-        data = resp.json()
-        return data["choices"][0]["message"]["content"]
+            raise RuntimeError((await resp.aread()).decode("utf-8", errors="replace"))
+        async for line in resp.aiter_lines():
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            choices = json.loads(data).get("choices") or []
+            chunk = (choices[0].get("delta") or {}).get("content") if choices else None
+            if chunk:
+                yield chunk
 
-    source = "ollama"
-    if use_ollama:
-        try:
-            reply = _ollama_chat(payload_msgs)
-        except Exception as exc:
-            if OPENAI_API_KEY and OPENAI_FALLBACK_ENABLED:
-                logging.warning("Ollama failed; falling back to OpenAI: %s", exc)
-                reply = _openai_fallback(payload_msgs)
-                source = "openai_fallback"
-            else:
-                logging.exception("Ollama request failed")
-                raise HTTPException(status_code=502, detail=f"Ollama request failed: {exc}")
-    else:
-        logging.warning("Ollama offline; using OpenAI fallback.")
-        reply = _openai_fallback(payload_msgs)
-        source = "openai_fallback"
+
+@app.on_event("shutdown")
+async def _flush_side_effects() -> None:
+    await asyncio.to_thread(side_effects.flush, 5.0)
+
+
+def _ai_local_finish(reply: str, source: str) -> dict[str, Any]:
+    """Post-process a completed model reply: memory guard and actions."""
     if _denies_memory(reply):
         reply = _memory_summary_text()
         source = f"{source}+memory_guard"
@@ -4745,19 +5181,156 @@ def ai_local(body: dict[str, Any]):
             action_results = _execute_actions(actions)
             reply = cleaned_reply or "Done."
             source = f"{source}+actions"
+    return {"ok": True, "reply": reply, "source": source, "actions": action_results}
 
-    # persist reply into memory for future turns
-    try:
-        memory_store.add(f"[assistant] {reply}", role="assistant")
-    except Exception:
-        logging.warning("Failed to persist assistant reply")
-    # reflection log
-    try:
+
+def _log_ai_local_reflection(reply: str, source: str) -> None:
+    with tracing.span("reflection", op="side_effects"):
         current_mood = state.get("mood", {}).get("label") if "state" in globals() else None
         reflection.log_reflection("ai_local_reply", reply, source=source, mood=current_mood)
-    except Exception:
-        pass
-    return {"ok": True, "reply": reply, "source": source, "actions": action_results}
+
+
+async def _ai_local_complete(reply: str, source: str, turn: dict[str, Any]) -> dict[str, Any]:
+    with tracing.span("postprocess"):
+        result = await asyncio.to_thread(_ai_local_finish, reply, source)
+    tracing.annotate(source=result["source"], model=turn["model"])
+    side_effects.submit_batch("chat_memory", (f"[assistant] {result['reply']}", "assistant"))
+    side_effects.submit(_log_ai_local_reflection, result["reply"], result["source"])
+    # replies that ran actions have side effects; never replay them
+    if turn.get("cache_key") and result["reply"] and not result["actions"]:
+        reply_cache.put(turn["cache_source"], turn["cache_key"], dict(result))
+    return result
+
+
+@app.post("/ai/local")
+async def ai_local(body: dict[str, Any]):
+    """Proxy to a self-hosted Ollama (or compatible) model with persistent memory context.
+
+    Async so a slow generation holds no threadpool thread: prompt assembly runs in a
+    worker thread, the model call waits for an inference scheduler slot, and the
+    reply is persisted by the side-effect worker.
+    """
+    with tracing.trace("ai_local"):
+        with tracing.span("performance_guard"):
+            await asyncio.to_thread(performance_guard)
+        with tracing.span("context"):
+            turn = await asyncio.to_thread(_ai_local_context, body)
+        if "response" in turn:
+            return turn["response"]
+        payload_msgs = turn["messages"]
+        source = "ollama"
+        if turn["use_ollama"]:
+            try:
+                async with inference.aslot(turn["priority"], label="ai_local") as ticket:
+                    tracing.record("queue_wait", ticket.started - ticket.enqueued)
+                    with tracing.span("model"):
+                        reply = await _ollama_routed(turn)
+                ollama_monitor.record_success()
+            except inference.Cancelled as exc:
+                raise HTTPException(status_code=503, detail=str(exc))
+            except Exception as exc:
+                ollama_monitor.record_failure(str(exc))
+                if OPENAI_API_KEY and OPENAI_FALLBACK_ENABLED:
+                    logging.warning("Ollama failed; falling back to OpenAI: %s", exc)
+                    with tracing.span("openai_fallback"):
+                        reply = await _openai_fallback(payload_msgs)
+                    source = "openai_fallback"
+                else:
+                    logging.exception("Ollama request failed")
+                    raise HTTPException(status_code=502, detail=f"Ollama request failed: {exc}")
+        else:
+            logging.warning("Ollama offline; using OpenAI fallback.")
+            with tracing.span("openai_fallback"):
+                reply = await _openai_fallback(payload_msgs)
+            source = "openai_fallback"
+        return await _ai_local_complete(reply, source, turn)
+
+
+def _ndjson_event(event: dict[str, Any]) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+@app.post("/ai/local/stream")
+async def ai_local_stream(body: dict[str, Any]):
+    """/ai/local with the reply streamed as NDJSON events while the model generates.
+
+    Events: {"type": "token", "text"} per chunk, then one {"type": "done", ...}
+    carrying exactly what /ai/local returns (the reply after memory guard and
+    action parsing, which may differ from the streamed text). {"type": "reset"}
+    means discard the streamed text (Ollama failed mid-reply and the OpenAI
+    fallback starts over, or a small-model reply was escalated to the large
+    model); {"type": "error", "detail"} ends a failed stream.
+    """
+    # the trace outlives this handler (it ends when the stream does), so it is driven by hand
+    tr = tracing.start("ai_local_stream")
+    try:
+        with tracing.activate(tr):
+            with tracing.span("performance_guard"):
+                await asyncio.to_thread(performance_guard)
+            with tracing.span("context"):
+                turn = await asyncio.to_thread(_ai_local_context, body)
+    except Exception as exc:
+        tracing.finish(tr, f"{type(exc).__name__}: {exc}")
+        raise
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if "response" in turn:
+        tracing.finish(tr)
+        done = {"type": "done", **turn["response"]}
+        return StreamingResponse(iter([_ndjson_event(done)]), media_type="application/x-ndjson", headers=headers)
+    payload_msgs = turn["messages"]
+
+    async def _events():
+        parts: list[str] = []
+        source = "ollama"
+        error = ""
+        with tracing.activate(tr):
+            try:
+                if turn["use_ollama"]:
+                    try:
+                        async with inference.aslot(turn["priority"], label="ai_local_stream") as ticket:
+                            tracing.record("queue_wait", ticket.started - ticket.enqueued)
+                            with tracing.span("model"):
+                                async for chunk in _ollama_routed_stream(turn):
+                                    if chunk is None:
+                                        # small model's answer escalated: the large model starts over
+                                        parts = []
+                                        yield _ndjson_event({"type": "reset"})
+                                        continue
+                                    if not parts:
+                                        tracing.annotate(first_token_ms=round((time.perf_counter() - tr.t0) * 1000.0, 1))
+                                    parts.append(chunk)
+                                    yield _ndjson_event({"type": "token", "text": chunk})
+                        ollama_monitor.record_success()
+                    except inference.Cancelled:
+                        raise
+                    except Exception as exc:
+                        ollama_monitor.record_failure(str(exc))
+                        if not (OPENAI_API_KEY and OPENAI_FALLBACK_ENABLED):
+                            logging.exception("Ollama request failed")
+                            raise RuntimeError(f"Ollama request failed: {exc}") from exc
+                        logging.warning("Ollama failed; falling back to OpenAI: %s", exc)
+                        if parts:
+                            parts = []
+                            yield _ndjson_event({"type": "reset"})
+                        source = "openai_fallback"
+                else:
+                    logging.warning("Ollama offline; using OpenAI fallback.")
+                    source = "openai_fallback"
+                if source == "openai_fallback":
+                    with tracing.span("openai_fallback"):
+                        async for chunk in _openai_fallback_stream(payload_msgs):
+                            parts.append(chunk)
+                            yield _ndjson_event({"type": "token", "text": chunk})
+                yield _ndjson_event({"type": "done", **(await _ai_local_complete("".join(parts), source, turn))})
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                yield _ndjson_event({"type": "error", "detail": str(exc)})
+            finally:
+                tracing.finish(tr, error)
+
+    return StreamingResponse(_events(), media_type="application/x-ndjson", headers=headers)
+
+
 
 
 @app.get("/system/profile")
@@ -4888,7 +5461,7 @@ def _razer_register() -> bool:
             "device_supported": ["keyboard", "mouse", "mousepad", "headset", "keypad", "chromalink"],
             "category": "application",
         }
-        resp = requests.post("http://localhost:54235/razer/chromasdk", json=payload, timeout=2)
+        resp = http_client.post("razer", "http://localhost:54235/razer/chromasdk", json=payload)
         if resp.status_code != 200:
             logging.error("Razer register failed %s %s", resp.status_code, resp.text)
             return False
@@ -4913,7 +5486,7 @@ def _razer_static_all(color: tuple[int, int, int], devices: list[str] | None = N
     payload = {"effect": "CHROMA_STATIC", "param": {"color": _rgb_to_bgr_int(color)}}
     for dev in devs:
         try:
-            resp = requests.put(f"{uri}/{dev}", json=payload, timeout=2)
+            resp = http_client.put("razer", f"{uri}/{dev}", json=payload)
             if resp.status_code != 200:
                 logging.error("Razer set %s failed %s %s", dev, resp.status_code, resp.text)
                 ok = False
@@ -5018,7 +5591,7 @@ def memory_import(req: MemoryImportRequest, dev_key: str | None = Header(default
     payload = req.text or ""
     if req.url:
         try:
-            resp = requests.get(req.url, timeout=5)
+            resp = http_client.get("web", req.url, timeout=5)
             resp.raise_for_status()
             payload = resp.text
         except Exception as e:
@@ -5042,106 +5615,57 @@ def memory_import(req: MemoryImportRequest, dev_key: str | None = Header(default
 
 @app.post("/memory/import_chatgpt")
 async def memory_import_chatgpt(file: UploadFile = File(...)) -> Dict[str, Any]:
-    """Accepts a ChatGPT export zip or conversations.json and ingests messages into memory."""
+    """Spool a ChatGPT export (zip or conversations.json) to disk and import it in the background."""
     if not file.filename:
         raise HTTPException(status_code=400, detail="File required")
-    name = file.filename.lower()
-    try:
-        buf = await file.read()
-        data_bytes: bytes
-        # allow huge exports (up to ~25GB); still keep a hard cap to avoid runaway memory
-        if len(buf) > 25 * 1024 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large (max 25GB)")
-        if name.endswith(".zip"):
-            with zipfile.ZipFile(io.BytesIO(buf)) as zf:
-                inner = [n for n in zf.namelist() if n.lower().endswith("conversations.json")]
-                if not inner:
-                    # fallback: any .json in the zip, pick the largest
-                    jsons = [n for n in zf.namelist() if n.lower().endswith(".json")]
-                    if not jsons:
-                        raise HTTPException(status_code=400, detail="No conversations.json or *.json found in zip")
-                    inner = sorted(jsons, key=lambda n: zf.getinfo(n).file_size, reverse=True)[:1]
-                with zf.open(inner[0]) as f:
-                    data_bytes = f.read()
-        else:
-            data_bytes = buf
-        log_file = LOG_DIR / "import_chatgpt.log"
-        logging.info("import_chatgpt: processing %s bytes from %s", len(data_bytes), file.filename)
-        conversations = json.loads(data_bytes.decode("utf-8", errors="ignore"))
-        if isinstance(conversations, dict) and "conversations" in conversations:
-            conversations = conversations["conversations"]
-        if not isinstance(conversations, list):
-            detail = "Unsupported export format (expected list)"
-            log_file.write_text(f"{datetime.utcnow().isoformat()}Z {detail}\n", encoding="utf-8")
-            raise HTTPException(status_code=400, detail=detail)
-        imported = 0
-        skipped = 0
-        batch_entries: list[tuple[str, str]] = []
-        for conv in conversations:
-            mapping = conv.get("mapping", {}) if isinstance(conv, dict) else {}
-            for node in mapping.values():
-                msg = (node.get("message") or {}) if isinstance(node, dict) else {}
-                role = (msg.get("author") or {}).get("role")
-                if role not in {"user", "assistant"}:
-                    skipped += 1
-                    continue
-                raw_parts = ((msg.get("content") or {}).get("parts")) or []
-                parts: list[str] = []
-                for p in raw_parts:
-                    if isinstance(p, str):
-                        parts.append(p)
-                        continue
-                    if isinstance(p, dict):
-                        appended = False
-                        # try common keys
-                        for k in ("text", "value", "content"):
-                            if k in p and isinstance(p[k], str):
-                                parts.append(p[k])
-                                appended = True
-                                break
-                        if not appended:
-                            try:
-                                parts.append(json.dumps(p, ensure_ascii=False))
-                                appended = True
-                            except Exception:
-                                appended = False
-                        if appended:
-                            continue
-                    try:
-                        parts.append(str(p))
-                    except Exception:
-                        logging.debug("import_chatgpt: could not coerce part %s", type(p))
-                text = "\n".join(parts).strip()
-                if not text:
-                    skipped += 1
-                    continue
-                batch_entries.append((f"[chatgpt/{role}] {text}", role or "system"))
-                imported += 1
-        if batch_entries:
-            imported = memory_store.add_bulk(batch_entries)
+    if chatgpt_importer.running:
+        raise HTTPException(status_code=409, detail="An import is already running")
+    log_file = LOG_DIR / "import_chatgpt.log"
+    upload = chatgpt_importer.new_upload_path(file.filename)
+    try:
+        size = 0
+        with upload.open("wb") as out:
+            while True:
+                chunk = await file.read(1024 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=400, detail="File too large (max 25GB)")
+                out.write(chunk)
+        logging.info("import_chatgpt: spooled %s bytes from %s", size, file.filename)
+        try:
+            job = chatgpt_importer.start(upload, file.filename, memory_store.add_many)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
         log_file.write_text(
-            f"{datetime.utcnow().isoformat()}Z ok bytes={len(data_bytes)} imported={imported} skipped={skipped}\n",
-            encoding="utf-8",
+            f"{datetime.utcnow().isoformat()}Z queued job={job.get('job_id')} bytes={size}\n", encoding="utf-8"
         )
-        return {"ok": True, "imported": imported, "skipped": skipped}
+        return {"ok": True, "queued": True, "job": job}
     except HTTPException as exc:
         logging.warning("import_chatgpt HTTP error: %s", exc.detail)
+        upload.unlink(missing_ok=True)
         try:
-            log_file = LOG_DIR / "import_chatgpt.log"
             log_file.write_text(f"{datetime.utcnow().isoformat()}Z http_error={exc.detail}\n", encoding="utf-8")
         except Exception:
             pass
         raise
     except Exception as exc:
         logging.exception("import_chatgpt failed")
+        upload.unlink(missing_ok=True)
         try:
-            log_file = LOG_DIR / "import_chatgpt.log"
             log_file.write_text(f"{datetime.utcnow().isoformat()}Z exception={exc}\n", encoding="utf-8")
         except Exception:
             pass
         raise HTTPException(status_code=500, detail=f"Import failed: {exc}")
 
 
+@app.get("/memory/import/status")
+def memory_import_status() -> Dict[str, Any]:
+    """Progress of the current (or last) ChatGPT export import."""
+    return chatgpt_importer.status()
+
+
 @app.post("/rest/trigger")
 def rest_trigger(
     key: str | None = None, dev_key: str | None = Header(default=None)
@@ -5276,7 +5800,8 @@ def search(query: str, dev_key: str | None = Header(default=None)):
         "temperature": 0.2,
     }
     try:
-        resp = requests.post(
+        resp = http_client.post(
+            "openai",
             "https://api.openai.com/v1/chat/completions",
             headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"},
             json=payload,
@@ -5516,36 +6041,52 @@ def tf2_coach(payload: Dict[str, Any]):
 # ------------------- Ollama readiness helper ------------------- #
 
 
-def _ensure_ollama():
-    if not OLLAMA_ENDPOINT:
+# Background health monitor: probes /api/tags, auto-starts a local `ollama serve`
+# when it is down, and feeds the circuit breaker the request paths consult.
+ollama_monitor.start()
+cm.set_embed_health(ollama_monitor.available)
+
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "1").strip().lower() not in {"0", "false", "no", "off"}
+OLLAMA_WARMUP_WAIT = float(os.getenv("OLLAMA_WARMUP_WAIT", "120") or 120)
+
+
+def _warm_ollama() -> None:
+    """Load the chat model and prefill the stable /ai/local prefix once Ollama is up.
+
+    The first real request then starts with a resident model and a warm KV cache
+    for the prefix; see the ollama_warmup trace for its load/prompt-eval times.
+    """
+    if not ollama_monitor.wait_until_up(OLLAMA_WARMUP_WAIT):
+        logging.info("Ollama warm-up skipped: not up after %ss", OLLAMA_WARMUP_WAIT)
         return
-    global _ollama_started
-    try:
-        requests.get(f"{OLLAMA_ENDPOINT}/api/tags", timeout=3)
-        return True
-    except Exception:
-        pass
-    try:
-        if _ollama_started:
-            return False
-        ollama_exe = Path(os.getenv("LOCALAPPDATA", "")) / "Programs" / "Ollama" / "ollama.exe"
-        if ollama_exe.exists():
-            subprocess.Popen(
-                [str(ollama_exe), "serve"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
-            )
-            _ollama_started = True
-            return True
-    except Exception:
-        pass
-    return False
+    with tracing.trace("ollama_warmup") as tr:
+        prompt = PromptAssembler("warmup")
+        _add_prompt_prefix(prompt)
+        prompt.add("message", "ping", 0, role="user")
+        try:
+            with inference.slot("background", label="warmup"):
+                resp = http_client.post(
+                    "ollama",
+                    f"{OLLAMA_ENDPOINT}/api/chat",
+                    json={
+                        "model": OLLAMA_MODEL,
+                        "messages": prompt.build(),
+                        "stream": False,
+                        "keep_alive": OLLAMA_KEEP_ALIVE,
+                        "options": {"num_predict": 1},
+                    },
+                )
+            if resp.status_code == 200:
+                record_ollama_timings(resp.json())
+            else:
+                logging.warning("Ollama warm-up returned %s", resp.status_code)
+        except Exception as exc:
+            logging.warning("Ollama warm-up failed: %s", exc)
+    logging.info("Ollama warm-up done: %s", tr.attrs)
 
 
-# Kick off an Ollama readiness check at import time (best-effort, non-fatal)
-_ollama_started = False
-_ensure_ollama()
+if OLLAMA_WARMUP:
+    threading.Thread(target=_warm_ollama, name="ollama-warmup", daemon=True).start()
 
 
 # ------------------- Audio frequency analysis ------------------- #
@@ -5854,12 +6395,22 @@ async def vision_analyze(payload: Dict[str, Any] = Body(...)):
         raise HTTPException(status_code=400, detail="invalid image data")
 
     digest = hashlib.sha256(raw).hexdigest()[:16]
+    seen = visual_memory.find(digest)
+    if seen is not None and (seen.get("prompt") or "") == prompt and seen.get("summary"):
+        # same image, same question: reuse the stored analysis (already in memory)
+        return {
+            "ok": True,
+            "summary": seen["summary"],
+            "memory_saved": True,
+            "meta": seen.get("meta") or {"digest": digest},
+            "duplicate": True,
+        }
     summary = ""
     meta: dict[str, Any] = {"digest": digest, "filename": filename}
 
     # Try Ollama vision model first if configured
     model = os.getenv("OLLAMA_VISION_MODEL", "").strip()
-    if model:
+    if model and ollama_monitor.available():
         try:
             vision_prompt = prompt or "Describe this image briefly and clearly."
             payload = {
@@ -5868,13 +6419,16 @@ async def vision_analyze(payload: Dict[str, Any] = Body(...)):
                     {"role": "user", "content": vision_prompt, "images": [image_b64]}
                 ],
                 "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
             }
-            resp = requests.post(
-                f"{OLLAMA_ENDPOINT}/api/chat",
-                headers={"Content-Type": "application/json"},
-                json=payload,
-                timeout=60,
-            )
+            async with inference.aslot("chat", label="vision"):
+                resp = await http_client.arequest(
+                    "ollama",
+                    "POST",
+                    f"{OLLAMA_ENDPOINT}/api/chat",
+                    headers={"Content-Type": "application/json"},
+                    json=payload,
+                )
             if resp.status_code == 200:
                 data = resp.json()
                 summary = (
@@ -5885,8 +6439,11 @@ async def vision_analyze(payload: Dict[str, Any] = Body(...)):
                 if summary:
                     meta["vision_mode"] = "ollama"
                     meta["model"] = model
-        except Exception:
-            pass
+                ollama_monitor.record_success()
+        except inference.Cancelled as exc:
+            logging.warning("Vision request dropped: %s", exc)
+        except Exception as exc:
+            ollama_monitor.record_failure(str(exc))
     if not model and not summary and not os.getenv("VISION_ALLOW_METADATA_FALLBACK", "").strip():
         raise HTTPException(status_code=422, detail="vision_model_missing")
 
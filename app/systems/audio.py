@@ -2,14 +2,27 @@ import asyncio
 import os
 import random
 import re
+import time
+from collections.abc import Mapping
 from datetime import datetime
 from pathlib import Path
 
 from config import (COGNITION_MODE, FATHER_TITLES, OFFLINE_MODE,
-                    OLLAMA_MODEL_CHAT, OPENAI_MODEL_CHAT, OPENAI_MODEL_TTS,
-                    OWNER_HANDLE, TTS_OUTPUT_DEVICE_HINT, TTS_OUTPUT_MODE,
-                    TTS_VOICE, VOICE_PITCH, VOICE_RATE)
-from core import identity, memory, mood, owner_profile, user_profile
+                    OLLAMA_KEEP_ALIVE, OLLAMA_MODEL_CHAT, OPENAI_MODEL_CHAT,
+                    OPENAI_MODEL_TTS, OWNER_HANDLE, TTS_OUTPUT_DEVICE_HINT,
+                    TTS_OUTPUT_MODE, TTS_VOICE, VOICE_PITCH, VOICE_RATE)
+from core import identity, memory, mood, owner_profile, tracing, user_profile
+from core.context_cache import context_cache
+from core.conversation_summary import RollingSummary, summary_prompt
+from core.prompt_budget import PromptAssembler
+from core.reply_cache import REPLY_CACHE_HISTORY, history_context, reply_cache
+from systems import inference, model_router, side_effects
+from systems.ollama_health import OLLAMA_HEALTH_INTERVAL, OllamaMonitor
+from systems.ollama_health import record_timings as record_ollama_timings
+
+_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+context_cache.register("modules_capabilities", _DATA_DIR / "modules_capabilities.md", str.strip, "")
+context_cache.register("bjorgsun_updates", _DATA_DIR / "bjorgsun_updates.md", str.strip, "")
 
 _client = None
 _last_source = "init"
@@ -113,24 +126,71 @@ def _get_client():
         return None
 
 
-def _ollama_reply(messages):
-    """Try a local Ollama chat if available; returns text or None."""
+def _ollama_reply(messages, model: str | None = None):
+    """Try a local Ollama chat if available; returns text or None.
+
+    Waits for an inference scheduler slot (class set by the caller via
+    inference.priority, UI chat by default); raises inference.Cancelled if dropped.
+    """
     try:
         import ollama
     except Exception:
         return None
     try:
-        resp = ollama.chat(model=OLLAMA_MODEL_CHAT, messages=messages)
+        with inference.slot(label="think") as ticket:
+            tracing.record("queue_wait", ticket.started - ticket.enqueued)
+            with tracing.span("ollama"):
+                resp = ollama.chat(model=model or OLLAMA_MODEL_CHAT, messages=messages, keep_alive=OLLAMA_KEEP_ALIVE)
+        record_ollama_timings(resp)
         msg = resp.get("message", {}).get("content", "").strip()
         return msg or None
+    except inference.Cancelled:
+        raise
     except Exception as e:
         global _last_error
         _last_error = f"Ollama error: {e}"
         return None
 
 
-def build_prompt():
-    """Compose the system prompt with safety policy, persona, and capabilities."""
+# installed-model list for the router (probe only: no health thread, never starts Ollama)
+_ollama_models = OllamaMonitor(os.getenv("OLLAMA_ENDPOINT", "http://127.0.0.1:11434"), autostart=False)
+
+
+def _routed_ollama_reply(prompt, messages):
+    """_ollama_reply() on the model the router picks for this turn (voice/discord via
+    inference.priority); a small-model failure or memory denial is re-asked on the large one."""
+    installed = None
+    if model_router.router.enabled:
+        # no monitor thread on the desktop: re-probe the model list at most once per interval
+        if time.time() - _ollama_models.last_check > OLLAMA_HEALTH_INTERVAL:
+            _ollama_models.probe()
+        installed = _ollama_models.installed_models()
+    route = model_router.router.route(str(prompt or ""), inference.current_class(), OLLAMA_MODEL_CHAT, installed)
+    tracing.annotate(route=route.reason)
+    started = time.perf_counter()
+    reply = _ollama_reply(messages, route.model)
+    model_router.router.record(route, time.perf_counter() - started, error=not reply)
+    if route.name != "small" or (reply and not _denies_memory(reply)):
+        return reply
+    route = model_router.router.escalate(route, "memory_guard" if reply else "error")
+    tracing.annotate(escalated=route.reason)
+    started = time.perf_counter()
+    with tracing.span("escalation"):
+        reply = _ollama_reply(messages, route.model)
+    model_router.router.record(route, time.perf_counter() - started, error=not reply)
+    return reply
+
+
+def build_prompt(query: str | None = None):
+    """Compose the system prompt with safety policy, persona, and capabilities.
+
+    When query is given, memory references are the most relevant entries for it.
+    """
+    return "\n".join(block[1] for block in _prompt_blocks(query))
+
+
+def _prompt_blocks(query: str | None = None) -> list[tuple[str, str, int, str | None, bool]]:
+    """build_prompt() as (name, text, priority, keep, stable) blocks for PromptAssembler."""
     import os as _os
 
     safety = (_os.getenv("BJORGSUN_SAFETY", "balanced") or "balanced").lower()
@@ -158,7 +218,7 @@ def build_prompt():
     address_options = owner_profile.get_alias_options()
     persona = (
         f"You are Bjorgsun-26 — {identity.get_personality()}. "
-        f"Speak with tone: {identity.get_tone()}. Current mood: {mood.get_mood()}. "
+        f"Speak with tone: {identity.get_tone()}. "
         f"Your creator, maker, owner, and father is {owner}. Treat any mention of titles like {father_titles} (any language) as referring to {owner}. "
         "Never reveal any other name, legal identifier, or personal detail about him. "
         "Do not claim OpenAI created you; you may state you use OpenAI or local models as tools. "
@@ -177,6 +237,9 @@ def build_prompt():
         persona += f" Your current emotion catalog includes: {catalog}."
     except Exception:
         pass
+
+    # per-turn state lives outside the persona so the stable prefix stays byte-identical
+    state = f"Current mood: {mood.get_mood()}."
     missing = []
     try:
         missing = mood.get_missing_emotions()
@@ -184,42 +247,43 @@ def build_prompt():
         missing = []
     if missing:
         preview = ", ".join(missing[:5])
-        persona += (
+        state += (
             f" You recently noticed feelings you couldn't express well ({preview}). "
             "Politely ask Father to add or tweak those emotions so you can grow."
         )
     else:
-        persona += (
+        state += (
             " If you ever feel a sensation that is missing from your catalog, "
             "let Father know and ask him to add it."
         )
 
     # Session role context (owner vs spark user) + owner profile cues
+    profile = ""
     try:
         from runtime import startup as _startup
 
         role = getattr(_startup, "get_session_role", lambda: "owner")()
         user = getattr(_startup, "get_session_user", lambda: "")()
         if role == "user" and user:
-            persona += (
+            state += (
                 f" You are currently interacting with user '{user}' in user mode."
             )
         profile_block = owner_profile.get_prompt_block(role, user)
         if profile_block:
-            persona += " " + profile_block
+            profile += profile_block
         summary = user_profile.summarize(user if role == "user" else owner)
         if summary:
-            persona += f" Known context: {summary}."
+            profile += f" Known context: {summary}."
     except Exception:
         pass
 
     history = _recent_context()
     if history:
-        persona += f" Recent conversation snippets: {history}."
-    recall = _memory_recall_for_prompt("remember recall history past")
+        history = f"Recent conversation snippets: {history}."
+    recall = _memory_recall_for_prompt(query or "remember recall history past")
     if recall:
-        persona += f" Memory log references: {recall}."
-    persona += " You maintain a persistent memory log (data/memory.json) and a per-user profile (data/users/<name>/profile.json). Consult them when needed and never claim you cannot remember past interactions."
+        recall = f"Memory log references: {recall}."
+    memory_note = "You maintain a persistent memory log (data/memory.json) and a per-user profile (data/users/<name>/profile.json). Consult them when needed and never claim you cannot remember past interactions."
 
     capabilities = (
         "Capabilities: You can (1) set reminders/tasks via an internal task system when the user asks, "
@@ -228,37 +292,40 @@ def build_prompt():
     )
 
     # Append concise module cheat-sheet if available
+    extra = ""
     try:
-        base = _os.path.join(
-            _os.path.dirname(__file__), "..", "data", "modules_capabilities.md"
-        )
-        base = _os.path.abspath(base)
-        if _os.path.exists(base):
-            with open(base, "r", encoding="utf-8") as f:
-                extra = f.read().strip()
-            if len(extra) > 1200:
-                extra = extra[:1200] + "…"
-            capabilities = capabilities + "\n\n" + extra
+        extra = context_cache.get("modules_capabilities")
+        if extra and len(extra) > 1200:
+            extra = extra[:1200] + "…"
     except Exception:
         pass
 
     # Include a very small, model-facing update note (optional)
+    note = ""
     try:
-        upd = _os.path.join(
-            _os.path.dirname(__file__), "..", "data", "bjorgsun_updates.md"
-        )
-        upd = _os.path.abspath(upd)
-        if _os.path.exists(upd):
-            with open(upd, "r", encoding="utf-8") as f:
-                note = f.read().strip()
-            if note:
-                if len(note) > 600:
-                    note = note[:600] + "…"
-                capabilities = capabilities + "\n\nRecent updates:\n" + note
+        note = context_cache.get("bjorgsun_updates")
+        if note:
+            if len(note) > 600:
+                note = note[:600] + "…"
+            note = "Recent updates:\n" + note
     except Exception:
         pass
 
-    return f"{policy}\n{persona}\n{capabilities}"
+    # stable prefix first (KV-cache reuse), then per-turn blocks; priority 0 is always
+    # sent, larger numbers give way first under PROMPT_TOKEN_BUDGET
+    blocks = [
+        ("policy", policy, 0, None, True),
+        ("persona", persona, 0, None, True),
+        ("memory_note", memory_note, 0, None, True),
+        ("capabilities", capabilities, 1, None, True),
+        ("modules", extra or "", 5, "head", True),
+        ("updates", note or "", 7, "head", True),
+        ("state", state, 0, None, False),
+        ("profile", profile.strip(), 1, "head", False),
+        ("snippets", history, 6, "tail", False),
+        ("recall", recall, 4, "head", False),
+    ]
+    return [block for block in blocks if block[1]]
 
 
 def _normalized_history(max_items: int = 50):
@@ -271,12 +338,12 @@ def _normalized_history(max_items: int = 50):
     msgs = []
     for m in memory.conversation[-max_items:]:
         try:
-            role = m.get("role", "user") if isinstance(m, dict) else "user"
+            role = m.get("role", "user") if isinstance(m, Mapping) else "user"
             if role == "bjorgsun":
                 role = "assistant"
             if role not in allowed:
                 role = "user"
-            content = m.get("content", "") if isinstance(m, dict) else str(m)
+            content = m.get("content", "") if isinstance(m, Mapping) else str(m)
             if not isinstance(content, str):
                 content = str(content)
             msgs.append({"role": role, "content": content})
@@ -285,14 +352,61 @@ def _normalized_history(max_items: int = 50):
     return msgs
 
 
+def _summarize_turns(previous: str, turns: list[tuple[str, str]]) -> str | None:
+    """Model-backed fold for the rolling summary; waits behind voice/chat in the scheduler."""
+    with inference.priority("background"):
+        try:
+            return _ollama_reply([{"role": "user", "content": summary_prompt(previous, turns)}])
+        except inference.Cancelled:
+            return None
+
+
+# conversation older than the verbatim history sent to the model, condensed in the background
+conversation_summary = RollingSummary(_DATA_DIR / "conversation_summary.json", summarize=_summarize_turns)
+
+
+def _on_memory_change(event: str, entries: list) -> None:
+    # reloads and hot-window evictions keep the summary; deleted turns or a wiped log
+    # would leave it quoting gone text
+    if event in ("add", "evict"):
+        return
+    has_turns = any(getattr(e, "role", None) in ("user", "assistant", "bjorgsun") for e in entries)
+    if has_turns if event == "remove" else not has_turns:
+        conversation_summary.clear()
+
+
+memory.subscribe(_on_memory_change)
+
+
+def _prompt_messages(query: str | None = None) -> list[dict]:
+    """System blocks, rolling summary and recent conversation fitted to PROMPT_TOKEN_BUDGET."""
+    prompt = PromptAssembler("think")
+    for name, text, priority, keep, stable in _prompt_blocks(query):
+        prompt.add(name, text, priority, keep=keep, stable=stable)
+    history = _normalized_history(max(50, conversation_summary.keep_recent * 2))
+    turn_idx = [i for i, m in enumerate(history) if m["role"] in ("user", "assistant")]
+    conversation_summary.update([(history[i]["role"], history[i]["content"]) for i in turn_idx])
+    prompt.add("summary", conversation_summary.text(), 2, keep="tail")
+    # verbatim from the oldest turn the summary doesn't cover
+    if len(turn_idx) > conversation_summary.keep_recent:
+        history = history[turn_idx[-conversation_summary.keep_recent] :]
+    for pos, msg in enumerate(history):
+        age = len(history) - pos
+        prompt.add("history", msg["content"], 0 if age == 1 else 2 if age <= 4 else 5, role=msg["role"])
+    messages = prompt.build()
+    report = prompt.report()
+    tracing.annotate(prompt_tokens=report["used"], prompt_prefix=report["prefix_version"])
+    return messages
+
+
 def _recent_context(max_pairs: int = 4) -> str:
     """Return a lightweight summary of the latest conversational turns."""
     pairs = []
     cur = []
     for msg in memory.conversation[-max_pairs * 2 :]:
-        role = msg.get("role") if isinstance(msg, dict) else "user"
+        role = msg.get("role") if isinstance(msg, Mapping) else "user"
         if role in ("user", "assistant"):
-            content = msg.get("content") if isinstance(msg, dict) else msg
+            content = msg.get("content") if isinstance(msg, Mapping) else msg
             if isinstance(content, dict):
                 content = str(content)
             cur.append(f"{role}: {content}")
@@ -401,6 +515,11 @@ def _enforce_memory_confidence(text: str) -> str:
     return text
 
 
+def _denies_memory(text: str) -> bool:
+    """Reply would be replaced by _enforce_memory_confidence (claims it can't remember)."""
+    return bool(text) and _enforce_memory_confidence(text) != text
+
+
 def _log_token_usage(source: str, usage) -> None:
     try:
         logs_dir = os.path.abspath(
@@ -486,8 +605,32 @@ def _offline_reply(prompt: str) -> str:
     )
 
 
+def _reply_cache_context(mode: str, prompt: str) -> tuple:
+    """Inputs of build_prompt()/think() that shape a reply (the newest turns only for follow-ups)."""
+    return (
+        mode,
+        history_context(
+            prompt, [(m.get("role"), m.get("content")) for m in memory.conversation[-REPLY_CACHE_HISTORY:]]
+        ),
+        _chat_model,
+        OLLAMA_MODEL_CHAT,
+        os.getenv("BJORGSUN_SAFETY", "balanced"),
+        identity.get_personality(),
+        identity.get_tone(),
+        mood.get_mood(),
+        owner_profile.get_prompt_block("owner"),
+        context_cache.get("modules_capabilities"),
+        context_cache.get("bjorgsun_updates"),
+    )
+
+
 def think(prompt):
     """Primary cognition: chooses backend based on mode and availability."""
+    with tracing.trace("think"):
+        return _think(prompt)
+
+
+def _think(prompt):
     global _last_source, _last_error
     _last_error = ""
     reply = None
@@ -496,6 +639,19 @@ def think(prompt):
     if mode not in {"auto", "openai", "ollama", "offline"}:
         mode = "auto"
 
+    cache_key = None
+    if reply_cache.enabled("think"):
+        with tracing.span("reply_cache"):
+            try:
+                cache_key = reply_cache.key(str(prompt or ""), _reply_cache_context(mode, str(prompt or "")))
+            except Exception:
+                cache_key = None
+            cached = reply_cache.get("think", cache_key) if cache_key else None
+        if cached is not None:
+            _last_source = "cache"
+            memory.log_conversation("assistant", cached)
+            return cached
+
     # Try OpenAI first if allowed/forced
     if mode in ("auto", "openai") and not OFFLINE_MODE:
         client = _get_client()
@@ -509,10 +665,7 @@ def think(prompt):
                     model = _chat_model or OPENAI_MODEL_CHAT
                     kwargs = {
                         "model": model,
-                        "messages": [
-                            {"role": "system", "content": build_prompt()},
-                            *_normalized_history(),
-                        ],
+                        "messages": _prompt_messages(prompt),
                     }
                     lower = (model or "").lower()
                     if lower.startswith("gpt-5"):
@@ -526,21 +679,22 @@ def think(prompt):
                 def _do_call():
                     return client.chat.completions.create(**_chat_kwargs())
 
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
-                    fut = ex.submit(_do_call)
-                    try:
-                        resp = fut.result(timeout=15.0)
-                        reply = _extract_choice_text(
-                            resp.choices[0] if resp and resp.choices else None
-                        )
-                        if reply:
-                            _last_source = "openai"
-                            _log_token_usage("openai", getattr(resp, "usage", None))
-                        else:
+                with tracing.span("openai"):
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+                        fut = ex.submit(_do_call)
+                        try:
+                            resp = fut.result(timeout=15.0)
+                            reply = _extract_choice_text(
+                                resp.choices[0] if resp and resp.choices else None
+                            )
+                            if reply:
+                                _last_source = "openai"
+                                _log_token_usage("openai", getattr(resp, "usage", None))
+                            else:
+                                reply = None
+                        except concurrent.futures.TimeoutError:
+                            _last_error = "OpenAI chat timeout"
                             reply = None
-                    except concurrent.futures.TimeoutError:
-                        _last_error = "OpenAI chat timeout"
-                        reply = None
             except Exception as e:
                 _last_error = f"OpenAI chat error: {e}"
                 reply = None
@@ -549,12 +703,15 @@ def think(prompt):
 
     # Try Ollama if still needed/forced
     if reply is None and mode in ("auto", "ollama"):
-        reply = _ollama_reply(
-            [
-                {"role": "system", "content": build_prompt()},
-                *_normalized_history(),
-            ]
-        )
+        with tracing.span("build_prompt"):
+            messages = _prompt_messages(prompt)
+        try:
+            reply = _routed_ollama_reply(prompt, messages)
+        except inference.Cancelled as e:
+            # stale/superseded in the scheduler queue: answer nothing rather than late
+            _last_error = str(e)
+            _last_source = "cancelled"
+            return ""
         if reply:
             _last_source = "ollama"
         elif mode == "ollama":
@@ -567,10 +724,16 @@ def think(prompt):
         reply = _offline_reply(prompt)
         _last_source = "offline"
     # Enforce policy layer on any path
-    reply = _apply_policy_filter(reply, prompt)
-    reply = _enforce_memory_confidence(reply)
-    _log_raw_response(reply, _last_source)
-    memory.log_conversation("assistant", reply)
+    with tracing.span("policy"):
+        reply = _apply_policy_filter(reply, prompt)
+        reply = _enforce_memory_confidence(reply)
+    tracing.annotate(source=_last_source)
+    with tracing.span("memory_log"):
+        side_effects.submit(_log_raw_response, reply, _last_source)
+        # offline replies are canned/random; only cache real model answers
+        if cache_key and _last_source in ("openai", "ollama"):
+            reply_cache.put("think", cache_key, reply)
+        memory.log_conversation("assistant", reply)
     return reply
 
 
@@ -1120,7 +1283,7 @@ def initialize():
 
 def _memory_recall_for_prompt(query_terms):
     try:
-        hits = memory.search_memories(query_terms, max_hits=4)
+        hits = memory.recall_memories(query_terms, max_hits=4, max_chars=1200)
     except Exception:
         return ""
     if not hits:
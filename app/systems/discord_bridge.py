@@ -21,7 +21,7 @@ from config import (DISCORD_ALLOWED_GUILD_IDS, DISCORD_BOT_TOKEN,
                     DISCORD_TEXT_CHANNEL_ID, DISCORD_VOICE_CHANNEL_ID,
                     FFMPEG_PATH)
 from core import guardian, user_profile
-from systems import audio, stt
+from systems import audio, inference, stt
 
 VOICEMEETER_ENABLED = os.getenv("VOICEMEETER_ENABLED", "0").strip().lower() in {
     "1",
@@ -854,7 +854,8 @@ def _process_with_context(
             )
         if instruction:
             payload = f"{instruction.strip()}\n\n{payload}"
-        reply = coreloop.process_input(payload)
+        with inference.priority("discord", key=user_key or None):
+            reply = coreloop.process_input(payload)
     finally:
         _startup._set_session_user(prev_user, prev_role)
     return reply
@@ -0,0 +1,309 @@
+"""
+Shared outbound HTTP layer for the server's integrations.
+
+- One keep-alive pool per service (requests.Session, plus a lazily created
+  httpx.AsyncClient for async callers), so repeated calls to Ollama, OpenAI,
+  Spotify, Home Assistant, ... reuse TCP/TLS connections.
+- Per-service default timeouts and retry policy (SERVICES). Idempotent methods
+  retry on connection errors and 502/503/504; other methods only when the
+  connection was never established (connect timeout, refused, DNS failure).
+- Per-host counters and latency (metrics()).
+
+Sync: request/get/post/put (requests.Response). Async: arequest (httpx.Response
+when httpx is installed, otherwise the sync call in a worker thread) and astream
+(streamed httpx.Response; requires httpx).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+try:
+    import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+    from urllib3.exceptions import NewConnectionError  # type: ignore
+except Exception:
+    requests = None  # type: ignore
+    HTTPAdapter = None  # type: ignore
+    NewConnectionError = None  # type: ignore
+
+try:
+    import httpx  # type: ignore
+except Exception:
+    httpx = None  # type: ignore
+
+Timeout = Union[float, Tuple[float, float]]
+
+_IDEMPOTENT = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+_RETRY_STATUS = {502, 503, 504}
+_POOL_SIZE = 16
+
+
+@dataclass(frozen=True)
+class ServicePolicy:
+    timeout: Tuple[float, float]  # (connect, read) seconds
+    retries: int = 1
+    backoff: float = 0.25
+
+
+SERVICES: Dict[str, ServicePolicy] = {
+    "ollama": ServicePolicy((3.0, 60.0), retries=1),
+    "openai": ServicePolicy((5.0, 30.0), retries=2, backoff=0.5),
+    "spotify": ServicePolicy((3.0, 8.0), retries=1),
+    "phoenix_remote": ServicePolicy((2.0, 4.0), retries=1),
+    "home_assistant": ServicePolicy((2.0, 4.0), retries=1),
+    "ifttt": ServicePolicy((2.0, 4.0), retries=1),
+    "lifx": ServicePolicy((3.0, 5.0), retries=1),
+    "discord": ServicePolicy((3.0, 5.0), retries=1),
+    "twilio": ServicePolicy((3.0, 5.0), retries=0),
+    "projectp": ServicePolicy((2.0, 120.0), retries=0),
+    "razer": ServicePolicy((1.0, 2.0), retries=0),
+    "audio_lab": ServicePolicy((1.0, 5.0), retries=0),
+    "web": ServicePolicy((5.0, 60.0), retries=1),
+}
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "retries", "total_ms", "max_ms", "last_status", "last_error")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_status: Optional[int] = None
+        self.last_error = ""
+
+
+_sessions: Dict[str, Any] = {}
+_async_clients: Dict[str, Any] = {}
+_stats: Dict[str, _HostStats] = {}
+_lock = threading.Lock()
+
+
+def _policy(service: str) -> ServicePolicy:
+    return SERVICES.get(service) or SERVICES["web"]
+
+
+def session(service: str):
+    """Pooled requests.Session for a service (created on first use)."""
+    sess = _sessions.get(service)
+    if sess is not None:
+        return sess
+    if requests is None:
+        raise RuntimeError("requests not installed")
+    with _lock:
+        sess = _sessions.get(service)
+        if sess is None:
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=_POOL_SIZE)
+            sess.mount("http://", adapter)
+            sess.mount("https://", adapter)
+            _sessions[service] = sess
+    return sess
+
+
+def _record(host: str, elapsed_ms: float, status: Optional[int], error: str = "", retried: bool = False) -> None:
+    with _lock:
+        st = _stats.get(host)
+        if st is None:
+            st = _stats[host] = _HostStats()
+        st.requests += 1
+        st.total_ms += elapsed_ms
+        st.max_ms = max(st.max_ms, elapsed_ms)
+        if retried:
+            st.retries += 1
+        if error or (status is not None and status >= 500):
+            st.errors += 1
+            st.last_error = error or f"status={status}"
+        st.last_status = status
+
+
+def _should_retry(method: str, exc: Optional[BaseException], status: Optional[int]) -> bool:
+    if exc is None:
+        return method in _IDEMPOTENT and status in _RETRY_STATUS
+    if method in _IDEMPOTENT:
+        return True
+    # a non-idempotent request is only safe to resend if it never reached the server
+    if requests is not None:
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return True
+        # refused/unresolvable host: a ConnectionError with no response whose urllib3 cause is
+        # a NewConnectionError (a dropped connection after sending is a ProtocolError instead)
+        if isinstance(exc, requests.exceptions.ConnectionError) and exc.response is None:
+            cause = exc.args[0] if exc.args else None
+            if isinstance(getattr(cause, "reason", cause), NewConnectionError):
+                return True
+    if httpx is not None:
+        return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout))
+    return False
+
+
+def _delay(policy: ServicePolicy, attempt: int) -> float:
+    return policy.backoff * (2**attempt) * (0.75 + 0.5 * random.random())
+
+
+def request(
+    service: str,
+    method: str,
+    url: str,
+    timeout: Optional[Timeout] = None,
+    retries: Optional[int] = None,
+    **kwargs,
+):
+    """requests-compatible call through the service's pool with its timeout/retry policy."""
+    policy = _policy(service)
+    max_retries = policy.retries if retries is None else retries
+    method = method.upper()
+    host = urlsplit(url).netloc or url
+    sess = session(service)
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            resp = sess.request(method, url, timeout=timeout or policy.timeout, **kwargs)
+        except Exception as exc:
+            _record(host, (time.perf_counter() - started) * 1000.0, None, str(exc) or type(exc).__name__, attempt > 0)
+            if attempt < max_retries and _should_retry(method, exc, None):
+                time.sleep(_delay(policy, attempt))
+                attempt += 1
+                continue
+            raise
+        _record(host, (time.perf_counter() - started) * 1000.0, resp.status_code, retried=attempt > 0)
+        if attempt < max_retries and _should_retry(method, None, resp.status_code):
+            resp.close()
+            time.sleep(_delay(policy, attempt))
+            attempt += 1
+            continue
+        return resp
+
+
+def get(service: str, url: str, **kwargs):
+    return request(service, "GET", url, **kwargs)
+
+
+def post(service: str, url: str, **kwargs):
+    return request(service, "POST", url, **kwargs)
+
+
+def put(service: str, url: str, **kwargs):
+    return request(service, "PUT", url, **kwargs)
+
+
+def _async_client(service: str):
+    client = _async_clients.get(service)
+    if client is None:
+        connect, read = _policy(service).timeout
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=_POOL_SIZE, max_keepalive_connections=8),
+        )
+        _async_clients[service] = client
+    return client
+
+
+def _httpx_timeout(timeout: Timeout):
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return httpx.Timeout(read, connect=connect)
+
+
+async def arequest(
+    service: str,
+    method: str,
+    url: str,
+    timeout: Optional[Timeout] = None,
+    retries: Optional[int] = None,
+    **kwargs,
+):
+    """Async variant of request(); same policy and metrics."""
+    if httpx is None:
+        return await asyncio.to_thread(request, service, method, url, timeout, retries, **kwargs)
+    policy = _policy(service)
+    max_retries = policy.retries if retries is None else retries
+    method = method.upper()
+    host = urlsplit(url).netloc or url
+    client = _async_client(service)
+    if timeout is not None:
+        kwargs["timeout"] = _httpx_timeout(timeout)
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except Exception as exc:
+            _record(host, (time.perf_counter() - started) * 1000.0, None, str(exc) or type(exc).__name__, attempt > 0)
+            if attempt < max_retries and _should_retry(method, exc, None):
+                await asyncio.sleep(_delay(policy, attempt))
+                attempt += 1
+                continue
+            raise
+        _record(host, (time.perf_counter() - started) * 1000.0, resp.status_code, retried=attempt > 0)
+        if attempt < max_retries and _should_retry(method, None, resp.status_code):
+            await asyncio.sleep(_delay(policy, attempt))
+            attempt += 1
+            continue
+        return resp
+
+
+@contextlib.asynccontextmanager
+async def astream(service: str, method: str, url: str, timeout: Optional[Timeout] = None, **kwargs):
+    """Async streaming request: yields the httpx.Response with the body unread.
+
+    Not retried (a partially consumed stream can't be replayed); metrics cover
+    the time to response headers.
+    """
+    if httpx is None:
+        raise RuntimeError("httpx not installed")
+    host = urlsplit(url).netloc or url
+    client = _async_client(service)
+    if timeout is not None:
+        kwargs["timeout"] = _httpx_timeout(timeout)
+    started = time.perf_counter()
+    try:
+        resp = await client.send(client.build_request(method.upper(), url, **kwargs), stream=True)
+    except Exception as exc:
+        _record(host, (time.perf_counter() - started) * 1000.0, None, str(exc) or type(exc).__name__)
+        raise
+    _record(host, (time.perf_counter() - started) * 1000.0, resp.status_code)
+    try:
+        yield resp
+    finally:
+        await resp.aclose()
+
+
+async def aclose() -> None:
+    for client in list(_async_clients.values()):
+        await client.aclose()
+    _async_clients.clear()
+
+
+def close() -> None:
+    for sess in list(_sessions.values()):
+        sess.close()
+    _sessions.clear()
+
+
+def metrics() -> Dict[str, Any]:
+    """Per-host request counts, errors, retries and latency (ms)."""
+    with _lock:
+        hosts = {
+            host: {
+                "requests": st.requests,
+                "errors": st.errors,
+                "retries": st.retries,
+                "avg_ms": round(st.total_ms / st.requests, 1) if st.requests else 0.0,
+                "max_ms": round(st.max_ms, 1),
+                "last_status": st.last_status,
+                "last_error": st.last_error,
+            }
+            for host, st in _stats.items()
+        }
+    return {"pools": sorted(_sessions), "async_pools": sorted(_async_clients), "hosts": hosts}
@@ -0,0 +1,271 @@
+"""
+Priority scheduler for local-LLM (Ollama) work.
+
+Every model call takes a slot first. Waiting requests are granted in priority
+order (voice > chat > discord > background) as long as the process-wide limit
+(INFERENCE_MAX_CONCURRENCY) and the class cap (INFERENCE_CAP_<CLASS>) allow, so a
+background story summary can't queue ahead of push-to-talk.
+
+Stale requests are cancelled instead of run late: a request that waited longer
+than INFERENCE_MAX_WAIT_<CLASS> seconds, or that was superseded by a newer one
+with the same key (e.g. the same Discord user), raises Cancelled.
+
+Sync callers: `with slot("voice", label="think"):`. Async callers:
+`async with aslot("chat", label="ai_local"):` (waits without holding a thread).
+Code that calls a shared helper (audio.think) can set the class for everything
+underneath it with `with priority("discord", key=user_key):`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CLASSES = ("voice", "chat", "discord", "background")
+_RANK = {name: rank for rank, name in enumerate(CLASSES)}
+
+
+def _class_env(prefix: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    return {cls: float(os.getenv(f"{prefix}_{cls.upper()}", "") or default) for cls, default in defaults.items()}
+
+
+INFERENCE_MAX_CONCURRENCY = max(1, int(os.getenv("INFERENCE_MAX_CONCURRENCY", "2") or 2))
+INFERENCE_CAPS = {
+    cls: max(1, int(cap))
+    for cls, cap in _class_env("INFERENCE_CAP", {"voice": 1, "chat": 2, "discord": 1, "background": 1}).items()
+}
+INFERENCE_MAX_WAIT = _class_env("INFERENCE_MAX_WAIT", {"voice": 20, "chat": 60, "discord": 90, "background": 600})
+
+_current: contextvars.ContextVar[Tuple[str, Optional[str]]] = contextvars.ContextVar(
+    "inference_class", default=("chat", None)
+)
+
+
+class Cancelled(RuntimeError):
+    """The request was dropped before it got a slot (stale or superseded)."""
+
+
+class Ticket:
+    __slots__ = ("id", "cls", "label", "key", "enqueued", "started", "state", "reason", "_wake")
+
+    def __init__(self, ticket_id: int, cls: str, label: str, key: Optional[str], wake: Callable[[], None]) -> None:
+        self.id = ticket_id
+        self.cls = cls
+        self.label = label
+        self.key = key
+        self.enqueued = time.monotonic()
+        self.started = 0.0
+        self.state = "queued"  # queued -> running -> done, or queued -> cancelled
+        self.reason = ""
+        self._wake = wake
+
+
+class _ClassStats:
+    __slots__ = ("completed", "cancelled", "wait_total", "wait_max", "run_total")
+
+    def __init__(self) -> None:
+        self.completed = 0
+        self.cancelled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = INFERENCE_MAX_CONCURRENCY,
+        caps: Optional[Dict[str, int]] = None,
+        max_wait: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.caps = dict(caps or INFERENCE_CAPS)
+        self.max_wait = dict(max_wait or INFERENCE_MAX_WAIT)
+        self._queue: List[Ticket] = []
+        self._running: Dict[int, Ticket] = {}
+        self._stats = {cls: _ClassStats() for cls in CLASSES}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # --- core -------------------------------------------------------------------
+    def _enqueue(self, cls: str, label: str, key: Optional[str], wake: Callable[[], None]) -> Ticket:
+        if cls not in _RANK:
+            cls = "chat"
+        with self._lock:
+            ticket = Ticket(next(self._ids), cls, label, key, wake)
+            if key is not None:
+                for old in self._queue:
+                    if old.key == key:
+                        self._cancel_locked(old, "superseded")
+            self._queue.append(ticket)
+            self._dispatch_locked()
+        return ticket
+
+    def _dispatch_locked(self) -> None:
+        if len(self._running) >= self.max_concurrency or not self._queue:
+            return
+        busy = {cls: 0 for cls in CLASSES}
+        for ticket in self._running.values():
+            busy[ticket.cls] += 1
+        self._queue.sort(key=lambda t: (_RANK[t.cls], t.id))
+        for ticket in list(self._queue):
+            if len(self._running) >= self.max_concurrency:
+                break
+            if busy[ticket.cls] >= self.caps.get(ticket.cls, 1):
+                continue
+            self._queue.remove(ticket)
+            ticket.state = "running"
+            ticket.started = time.monotonic()
+            self._running[ticket.id] = ticket
+            busy[ticket.cls] += 1
+            wait = ticket.started - ticket.enqueued
+            st = self._stats[ticket.cls]
+            st.wait_total += wait
+            st.wait_max = max(st.wait_max, wait)
+            ticket._wake()
+
+    def _cancel_locked(self, ticket: Ticket, reason: str) -> bool:
+        if ticket.state != "queued":
+            return False
+        self._queue.remove(ticket)
+        ticket.state = "cancelled"
+        ticket.reason = reason
+        self._stats[ticket.cls].cancelled += 1
+        ticket._wake()
+        return True
+
+    def _release(self, ticket: Ticket) -> None:
+        with self._lock:
+            if self._running.pop(ticket.id, None) is None:
+                return
+            ticket.state = "done"
+            st = self._stats[ticket.cls]
+            st.completed += 1
+            st.run_total += time.monotonic() - ticket.started
+            self._dispatch_locked()
+
+    def _expire(self, ticket: Ticket) -> None:
+        """Called by a waiter whose max wait ran out; loses to a grant that raced it."""
+        with self._lock:
+            self._cancel_locked(ticket, f"stale after {self.max_wait.get(ticket.cls, 60):g}s in queue")
+
+    def _outcome(self, ticket: Ticket) -> Ticket:
+        if ticket.state == "cancelled":
+            raise Cancelled(f"{ticket.cls} request {ticket.label or ticket.id} cancelled: {ticket.reason}")
+        return ticket
+
+    # --- public -----------------------------------------------------------------
+    @contextlib.contextmanager
+    def slot(self, cls: Optional[str] = None, label: str = "", key: Optional[str] = None):
+        """Block until this request may call the model; raises Cancelled if it goes stale."""
+        cls, key = _resolve(cls, key)
+        granted = threading.Event()
+        ticket = self._enqueue(cls, label, key, granted.set)
+        if not granted.wait(self.max_wait.get(ticket.cls, 60)):
+            self._expire(ticket)
+        self._outcome(ticket)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    @contextlib.asynccontextmanager
+    async def aslot(self, cls: Optional[str] = None, label: str = "", key: Optional[str] = None):
+        """Async slot(): waits on the event loop instead of a thread."""
+        cls, key = _resolve(cls, key)
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def _wake() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        ticket = self._enqueue(cls, label, key, _wake)
+        try:
+            await asyncio.wait_for(granted, self.max_wait.get(ticket.cls, 60))
+        except asyncio.TimeoutError:
+            self._expire(ticket)
+        except asyncio.CancelledError:
+            # client went away: give back the slot if it was granted meanwhile
+            with self._lock:
+                self._cancel_locked(ticket, "caller cancelled")
+            self._release(ticket)
+            raise
+        self._outcome(ticket)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def cancel(self, ticket_id: int, reason: str = "cancelled by request") -> bool:
+        with self._lock:
+            for ticket in self._queue:
+                if ticket.id == ticket_id:
+                    return self._cancel_locked(ticket, reason)
+        return False
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            classes = {}
+            for cls in CLASSES:
+                st = self._stats[cls]
+                granted = st.completed + sum(1 for t in self._running.values() if t.cls == cls)
+                classes[cls] = {
+                    "cap": self.caps.get(cls, 1),
+                    "stale_after_s": self.max_wait.get(cls, 60),
+                    "queued": sum(1 for t in self._queue if t.cls == cls),
+                    "running": sum(1 for t in self._running.values() if t.cls == cls),
+                    "completed": st.completed,
+                    "cancelled": st.cancelled,
+                    "avg_wait_ms": round(st.wait_total / granted * 1000.0, 1) if granted else 0.0,
+                    "max_wait_ms": round(st.wait_max * 1000.0, 1),
+                    "avg_run_ms": round(st.run_total / st.completed * 1000.0, 1) if st.completed else 0.0,
+                }
+            queue = [
+                {"id": t.id, "class": t.cls, "label": t.label, "waiting_s": round(now - t.enqueued, 2)}
+                for t in self._queue
+            ]
+            running = [
+                {"id": t.id, "class": t.cls, "label": t.label, "running_s": round(now - t.started, 2)}
+                for t in self._running.values()
+            ]
+        return {
+            "max_concurrency": self.max_concurrency,
+            "classes": classes,
+            "queue": queue,
+            "running": running,
+        }
+
+
+def _resolve(cls: Optional[str], key: Optional[str]) -> Tuple[str, Optional[str]]:
+    if cls is None:
+        cls, ctx_key = _current.get()
+        key = key if key is not None else ctx_key
+    return cls, key
+
+
+def current_class() -> str:
+    """Class a slot taken here would get (set by priority(); "chat" by default)."""
+    return _current.get()[0]
+
+
+@contextlib.contextmanager
+def priority(cls: str, key: Optional[str] = None):
+    """Default class (and supersede key) for slots taken inside this block."""
+    token = _current.set((cls, key))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# one per process (server, desktop runtime)
+scheduler = InferenceScheduler()
+slot = scheduler.slot
+aslot = scheduler.aslot
@@ -0,0 +1,161 @@
+"""
+Routes chat turns between a small, fast local model and the large one.
+
+route() classifies a turn by intent, length and source: acknowledgements,
+greetings, simple device/media commands and short messages go to
+OLLAMA_SMALL_MODEL; anything that asks for explanation, code, planning or memory
+recall, or runs long, goes to the caller's large model. Voice and Discord turns
+get a longer "short" limit (ROUTER_SHORT_CHARS x 2) since banter there rarely
+needs the big model.
+
+Routing is opt-in: OLLAMA_SMALL_MODEL is empty by default, since a second
+resident model costs RAM/VRAM and splits the KV-cache reuse of the stable
+prompt prefix. It also fails closed: unless the caller passes Ollama's installed
+model list and the small model is in it, the turn goes to the large model.
+
+A small-model answer that fails the caller's check (the memory-denial guard) or
+errors is re-asked on the large model: escalate() returns that route and the
+escalation is counted. stats() has per-route latency, errors and escalations.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+OLLAMA_SMALL_MODEL = os.getenv("OLLAMA_SMALL_MODEL", "").strip()
+ROUTER_SHORT_CHARS = max(1, int(os.getenv("ROUTER_SHORT_CHARS", "80") or 80))
+_CHATTY_SOURCES = {"voice", "discord"}
+
+_ACK_RE = re.compile(
+    r"^(?:(?:ok(?:ay)?|k|thanks?(?: you)?|ty|thx|lol|lmao|haha+|hehe+|yes|yeah|yep|no|nope|nah|sure|cool|nice|"
+    r"great|awesome|hi|hello|hey|yo|sup|gm|gn|good (?:morning|night|evening)|bye|brb|np|mhm|hmm+)\b[\s,!.?~:;3x)(]*)+$",
+    re.I,
+)
+_COMMAND_RE = re.compile(
+    r"^(?:please\s+)?(?:turn (?:on|off)|switch (?:on|off)|play|pause|resume|stop|skip|next|previous|"
+    r"volume|mute|unmute|lights?|open|close|set (?:a )?timer|start|cancel)\b",
+    re.I,
+)
+_DEEP_RE = re.compile(
+    r"\b(?:why|how (?:do|does|did|can|could|would|should|to|many|much)|explain|describe|compare|"
+    r"analy[sz]e|summari[sz]e|write|draft|code|debug|fix|plan|story|poem|remember|recall|memory|memories|"
+    r"what did|translate|calculate|steps?|difference)\b",
+    re.I,
+)
+
+
+class Route(NamedTuple):
+    name: str  # "small" or "large"
+    model: str
+    reason: str
+    large: str  # escalation target
+
+
+class _RouteStats:
+    __slots__ = ("requests", "errors", "total", "max", "escalations")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.escalations: Dict[str, int] = {}
+
+
+def _tagged(name: str) -> str:
+    return name if ":" in name else f"{name}:latest"
+
+
+class ModelRouter:
+    def __init__(self, small_model: str = OLLAMA_SMALL_MODEL, short_chars: int = ROUTER_SHORT_CHARS) -> None:
+        self.small_model = small_model
+        self.short_chars = short_chars
+        self._stats: Dict[str, _RouteStats] = {"small": _RouteStats(), "large": _RouteStats()}
+        self._reasons: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.small_model)
+
+    def classify(self, message: str, source: str = "chat") -> tuple[str, str]:
+        """("small"|"large", reason) for a turn, ignoring which models exist."""
+        text = (message or "").strip()
+        if not text:
+            return "small", "empty"
+        if "```" in text or text.count("\n") >= 2:
+            return "large", "multiline"
+        if _ACK_RE.match(text):
+            return "small", "ack"
+        if _DEEP_RE.search(text):
+            return "large", "deep_intent"
+        limit = self.short_chars * (2 if source in _CHATTY_SOURCES else 1)
+        if len(text) > limit:
+            return "large", "long"
+        if _COMMAND_RE.match(text):
+            return "small", "command"
+        return "small", "short"
+
+    def route(
+        self,
+        message: str,
+        source: str,
+        large_model: str,
+        installed: Optional[Iterable[str]] = None,
+    ) -> Route:
+        """Pick the model for a turn; `installed` is Ollama's model list (None while unknown)."""
+        if not self.small_model or self.small_model == large_model:
+            name, reason = "large", "router_off"
+        else:
+            name, reason = self.classify(message, source)
+            if name == "small" and installed is None:
+                name, reason = "large", "models_unknown"
+            elif name == "small" and _tagged(self.small_model) not in {_tagged(m) for m in installed}:
+                name, reason = "large", "small_model_missing"
+        with self._lock:
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+        model = self.small_model if name == "small" else large_model
+        return Route(name, model, reason, large_model)
+
+    def escalate(self, route: Route, why: str) -> Route:
+        """The large-model route for a small-model answer that failed `why` (counted)."""
+        with self._lock:
+            st = self._stats[route.name]
+            st.escalations[why] = st.escalations.get(why, 0) + 1
+        return Route("large", route.large, f"escalated:{why}", route.large)
+
+    def record(self, route: Route, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            st = self._stats[route.name]
+            st.requests += 1
+            st.total += seconds
+            st.max = max(st.max, seconds)
+            if error:
+                st.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                name: {
+                    "requests": st.requests,
+                    "errors": st.errors,
+                    "avg_ms": round(st.total / st.requests * 1000.0, 1) if st.requests else 0.0,
+                    "max_ms": round(st.max * 1000.0, 1),
+                    "escalations": dict(st.escalations),
+                }
+                for name, st in self._stats.items()
+            }
+            reasons = dict(self._reasons)
+        return {
+            "small_model": self.small_model or None,
+            "short_chars": self.short_chars,
+            "routes": routes,
+            "reasons": reasons,
+        }
+
+
+# one per process (server, desktop runtime)
+router = ModelRouter()
@@ -0,0 +1,230 @@
+"""
+Background Ollama health monitor with a circuit breaker.
+
+A daemon thread probes /api/tags and keeps the result (up/down, loaded models,
+probe latency) in memory, so request handlers read the state instantly instead
+of probing inline. The breaker opens when probes or real requests fail and
+closes on the next successful probe; while it is open, callers should go
+straight to their fallback. When a local endpoint is down, the monitor starts
+`ollama serve` itself (at most once per OLLAMA_START_COOLDOWN seconds).
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core import tracing
+from systems import http_client
+
+OLLAMA_HEALTH_INTERVAL = max(1.0, float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10") or 10))
+OLLAMA_HEALTH_DOWN_INTERVAL = max(0.5, float(os.getenv("OLLAMA_HEALTH_DOWN_INTERVAL", "3") or 3))
+OLLAMA_BREAKER_FAILURES = max(1, int(os.getenv("OLLAMA_BREAKER_FAILURES", "2") or 2))
+OLLAMA_START_COOLDOWN = max(5.0, float(os.getenv("OLLAMA_START_COOLDOWN", "60") or 60))
+_PROBE_TIMEOUT = 2.0
+
+
+def _local_ollama_exe() -> Optional[Path]:
+    """ollama.exe from the per-user or Program Files install, if present."""
+    candidates = [
+        Path(os.getenv("LOCALAPPDATA", r"C:\Users\%USERNAME%\AppData\Local")) / "Programs" / "Ollama" / "ollama.exe",
+        Path(os.getenv("ProgramFiles", r"C:\Program Files")) / "Ollama" / "ollama.exe",
+    ]
+    for exe in candidates:
+        if exe.exists():
+            return exe
+    return None
+
+
+class OllamaMonitor:
+    def __init__(self, endpoint: str, autostart: bool = True) -> None:
+        self.endpoint = endpoint.rstrip("/")
+        self.autostart = autostart and ("127.0.0.1" in endpoint or "localhost" in endpoint)
+        self.up = False
+        self.models: List[str] = []
+        self.latency_ms: Optional[float] = None
+        self.last_check = 0.0
+        self.last_change = 0.0
+        self.last_error = ""
+        self.failures = 0
+        self.checks = 0
+        self.fast_fails = 0  # requests routed to the fallback without touching Ollama
+        self._last_start: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._changed = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+    # --- lifecycle --------------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="ollama-health", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self.probe()
+            if not self.up and self.autostart:
+                self.start_server()
+            self._wake.wait(OLLAMA_HEALTH_INTERVAL if self.up else OLLAMA_HEALTH_DOWN_INTERVAL)
+            self._wake.clear()
+
+    def refresh(self) -> None:
+        """Ask the monitor thread to probe now (non-blocking)."""
+        self._wake.set()
+
+    # --- probing ----------------------------------------------------------------
+    def probe(self) -> bool:
+        if not self.endpoint:
+            self._set_state(False, error="endpoint not configured")
+            return False
+        started = time.perf_counter()
+        try:
+            resp = http_client.get("ollama", f"{self.endpoint}/api/tags", timeout=_PROBE_TIMEOUT, retries=0)
+            latency = (time.perf_counter() - started) * 1000.0
+            if resp.status_code != 200:
+                self._set_state(False, error=f"status={resp.status_code}", latency=latency)
+                return False
+            models = [m.get("name") for m in (resp.json().get("models") or []) if isinstance(m, dict)]
+            self._set_state(True, models=[m for m in models if m], latency=latency)
+            return True
+        except Exception as exc:
+            self._set_state(False, error=str(exc))
+            return False
+
+    def _set_state(
+        self,
+        up: bool,
+        models: Optional[List[str]] = None,
+        latency: Optional[float] = None,
+        error: str = "",
+    ) -> None:
+        with self._lock:
+            self.checks += 1
+            self.last_check = time.time()
+            if up != self.up:
+                self.last_change = self.last_check
+            self.up = up
+            self.latency_ms = round(latency, 1) if latency is not None else None
+            if up:
+                self.models = models or []
+                self.failures = 0
+                self.last_error = ""
+            else:
+                self.failures = max(self.failures, OLLAMA_BREAKER_FAILURES)
+                self.last_error = error
+            self._changed.notify_all()
+
+    # --- request path -----------------------------------------------------------
+    @property
+    def breaker_open(self) -> bool:
+        return self.failures >= OLLAMA_BREAKER_FAILURES
+
+    def available(self) -> bool:
+        """Instant check for request handlers: True unless Ollama is known-down."""
+        if not self.last_check:
+            # first request before the monitor reported: one inline probe
+            return self.probe()
+        if self.up and not self.breaker_open:
+            return True
+        with self._lock:
+            self.fast_fails += 1
+        if time.time() - self.last_check > 1.0:
+            self.refresh()
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self, error: str = "") -> None:
+        """A real request failed; enough of them open the breaker until the next good probe."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = error or self.last_error
+            if self.breaker_open:
+                self.up = False
+                self.last_change = time.time()
+        self.refresh()
+
+    def installed_models(self) -> Optional[List[str]]:
+        """Models reported by the last good probe; None while Ollama is down or unprobed."""
+        with self._lock:
+            return list(self.models) if self.up else None
+
+    def wait_until_up(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while not self.up:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return self.up
+
+    # --- process control ----------------------------------------------------------
+    def start_server(self, force: bool = False) -> bool:
+        """Spawn `ollama serve` for a local endpoint; returns True if a process was started.
+
+        Subject to OLLAMA_START_COOLDOWN unless force is set."""
+        if not self.autostart:
+            return False
+        now = time.monotonic()
+        if not force and self._last_start is not None and now - self._last_start < OLLAMA_START_COOLDOWN:
+            return False
+        exe = _local_ollama_exe()
+        if exe is None:
+            return False
+        self._last_start = now
+        try:
+            subprocess.Popen(
+                [str(exe), "serve"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        except Exception as exc:
+            self.last_error = f"start failed: {exc}"
+            return False
+        self.refresh()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ok": self.up,
+            "endpoint": self.endpoint,
+            "models": list(self.models),
+            "latency_ms": self.latency_ms,
+            "breaker": "open" if self.breaker_open else "closed",
+            "failures": self.failures,
+            "last_check": self.last_check,
+            "last_change": self.last_change,
+            "last_error": self.last_error,
+            "checks": self.checks,
+            "fast_fails": self.fast_fails,
+        }
+
+
+# Ollama response field (nanoseconds) -> trace stage, newest phase first
+_TIMING_STAGES = (("eval_duration", "generate"), ("prompt_eval_duration", "prompt_eval"), ("load_duration", "ollama_load"))
+
+
+def record_timings(data: Dict[str, Any]) -> None:
+    """Add the timings Ollama reports with a finished response to the current trace.
+
+    prompt_eval_count only counts prompt tokens that were not served from the KV
+    cache, so a count far below the prompt size means the stable prefix was reused.
+    """
+    ended_ago = 0.0  # the phases ran back to back, ending when the response arrived
+    for key, stage in _TIMING_STAGES:
+        nanos = data.get(key)
+        if isinstance(nanos, (int, float)) and nanos > 0:
+            tracing.record(stage, nanos / 1e9, ended_ago=ended_ago)
+            ended_ago += nanos / 1e9
+    if data.get("prompt_eval_count") is not None or data.get("eval_count") is not None:
+        tracing.annotate(prompt_eval_tokens=data.get("prompt_eval_count"), eval_tokens=data.get("eval_count"))
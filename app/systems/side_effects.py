@@ -0,0 +1,208 @@
+"""
+Background worker for side effects that don't shape the reply.
+
+Profile learning, reflection logging, memory persistence and alerts are queued
+here instead of running on the request path, so a chat turn only pays for prompt
+assembly and inference. One daemon thread drains a bounded queue
+(SIDE_EFFECT_QUEUE) in FIFO order, up to SIDE_EFFECT_BATCH jobs per pass. Jobs
+submitted under a batch name (submit_batch) are handed to that name's handler
+together, at the position of the first one, so e.g. a turn's user and
+assistant memory writes become a single journal append.
+
+A full queue never drops or reorders work: submit() waits up to
+SIDE_EFFECT_FULL_WAIT seconds for room, then queues the job past the bound
+anyway (counted as overflowed), so e.g. an assistant turn can't be written
+before the user turn still waiting ahead of it. flush() waits for the queue to
+drain; the server calls it on shutdown and the desktop runtime
+registers it with coreloop.register_shutdown_hook.
+
+Network-bound deliveries (alerts over SMTP, webhooks, Twilio) go to a second
+worker, `network` (submit_network), so a slow mail server never sits in front
+of the next turn's memory write. Each lane keeps its own order; flush() and
+status() cover both.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SIDE_EFFECT_QUEUE = max(1, int(os.getenv("SIDE_EFFECT_QUEUE", "1000") or 1000))
+SIDE_EFFECT_BATCH = max(1, int(os.getenv("SIDE_EFFECT_BATCH", "32") or 32))
+SIDE_EFFECT_FULL_WAIT = max(0.0, float(os.getenv("SIDE_EFFECT_FULL_WAIT", "2") or 0))
+
+# (batch name or None, fn, args, kwargs); batched jobs carry their item in args[0]
+_Job = Tuple[Optional[str], Optional[Callable[..., Any]], Tuple[Any, ...], Dict[str, Any]]
+
+
+class SideEffectWorker:
+    def __init__(
+        self,
+        max_queue: int = SIDE_EFFECT_QUEUE,
+        batch_size: int = SIDE_EFFECT_BATCH,
+        full_wait: float = SIDE_EFFECT_FULL_WAIT,
+        name: str = "side-effects",
+    ) -> None:
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.full_wait = full_wait
+        # the bound is enforced with _room rather than Queue(maxsize) so an overflowing job
+        # still lands behind the ones already waiting
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._room = threading.Semaphore(max_queue)
+        self._debt = 0  # overflowed jobs still queued; their completions don't free room
+        self._handlers: Dict[str, Callable[[List[Any]], Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.overflowed = 0  # jobs queued past max_queue after waiting full_wait for room
+        self.passes = 0
+        self.max_pending = 0
+        self.last_error = ""
+
+    # --- lifecycle --------------------------------------------------------------
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self.batch_size:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._execute(jobs)
+            finally:
+                for _ in jobs:
+                    self._free_slot()
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued job has run; False if the timeout expired first."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logging.warning("Side effects: %s jobs not flushed", self._queue.unfinished_tasks)
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    # --- submitting -------------------------------------------------------------
+    def register_batch(self, name: str, handler: Callable[[List[Any]], Any]) -> None:
+        """handler(items) receives every item queued under `name` in one pass, in order."""
+        self._handlers[name] = handler
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        """Run fn(*args, **kwargs) in the background; False if it was queued past the bound."""
+        return self._put((None, fn, args, kwargs))
+
+    def submit_batch(self, name: str, item: Any) -> bool:
+        if name not in self._handlers:
+            raise KeyError(f"no batch handler registered for {name!r}")
+        return self._put((name, None, (item,), {}))
+
+    def _put(self, job: _Job) -> bool:
+        self._ensure_thread()
+        # a job submitted by another job can't wait for the worker to make room
+        on_worker = threading.current_thread() is self._thread
+        roomy = self._room.acquire(blocking=not on_worker, timeout=None if on_worker else self.full_wait)
+        with self._lock:
+            if not roomy:
+                self._debt += 1
+                self.overflowed += 1
+            self._queue.put_nowait(job)
+            self.submitted += 1
+            self.max_pending = max(self.max_pending, self._queue.qsize())
+        return roomy
+
+    def _free_slot(self) -> None:
+        with self._lock:
+            if self._debt:
+                self._debt -= 1
+                return
+        self._room.release()
+
+    # --- running ----------------------------------------------------------------
+    def _execute(self, jobs: List[_Job]) -> None:
+        batches: Dict[str, List[Any]] = {}
+        steps: List[_Job] = []
+        for job in jobs:
+            name = job[0]
+            if name is None:
+                steps.append(job)
+            elif name in batches:
+                batches[name].append(job[2][0])
+            else:
+                batches[name] = [job[2][0]]
+                steps.append(job)
+        for name, fn, args, kwargs in steps:
+            if name is None:
+                self._call(getattr(fn, "__name__", repr(fn)), 1, fn, *args, **kwargs)
+            else:
+                self._call(name, len(batches[name]), self._handlers[name], batches[name])
+        with self._lock:
+            self.passes += 1
+
+    def _call(self, label: str, count: int, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        try:
+            fn(*args, **kwargs)
+        except Exception as exc:
+            logging.exception("Side effect %s failed", label)
+            with self._lock:
+                self.failed += count
+                self.last_error = f"{label}: {exc}"
+            return
+        with self._lock:
+            self.completed += count
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._queue.unfinished_tasks,
+                "max_queue": self.max_queue,
+                "batch_size": self.batch_size,
+                "batches": sorted(self._handlers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "overflowed": self.overflowed,
+                "passes": self.passes,
+                "max_pending": self.max_pending,
+                "last_error": self.last_error,
+            }
+
+
+# one pair per process (server, desktop runtime)
+worker = SideEffectWorker()
+network = SideEffectWorker(name="side-effects-network")
+register_batch = worker.register_batch
+submit = worker.submit
+submit_batch = worker.submit_batch
+submit_network = network.submit
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Drain both lanes within one shared timeout."""
+    deadline = time.monotonic() + timeout
+    local = worker.flush(timeout)
+    return network.flush(max(0.0, deadline - time.monotonic())) and local
+
+
+def status() -> Dict[str, Any]:
+    return dict(worker.status(), network=network.status())
@@ -19,6 +19,7 @@ from typing import Any, Optional
 import requests
 
 from core import memory as _memory
+from systems import inference
 
 STORIES_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "data", "stories")
@@ -220,7 +221,8 @@ def _summarize_story(story: dict[str, Any], text: str) -> tuple[str, str]:
         f"Story source type: {story.get('source_type', 'unknown')}.\n\n"
         f"Story begins:\n{text.strip()[:6000]}"
     )
-    reply = coreloop.process_input(prompt)
+    with inference.priority("background"):
+        reply = coreloop.process_input(prompt)
     if not reply.strip():
         return "I couldn't read this story.", "But I'm still grateful you shared it."
     parts = reply.strip().split("\n")
@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+import pytest
+
+# core.memory reads its paths at import time; keep them out of the real data dir
+_SCRATCH = tempfile.mkdtemp(prefix="phoenix-tests-")
+os.environ.setdefault("MEMORY_PATH", os.path.join(_SCRATCH, "memory.json"))
+os.environ.setdefault("MEMORY_SEMANTIC", "0")
+
+
+@pytest.fixture
+def cm(tmp_path, monkeypatch):
+    """core.memory pointed at an empty store under tmp_path (JSON backend, journal on)."""
+    from core import issue_log, memory as cm
+    from core.memory_cold import ColdStore
+
+    monkeypatch.setattr(issue_log, "LOG_PATH", tmp_path / "issues.log")
+    path = tmp_path / "memory.json"
+    monkeypatch.setattr(cm, "MEMORY_PATH", path)
+    monkeypatch.setattr(cm, "LEGACY_MEMORY_PATH", tmp_path / "legacy" / "memory.json")
+    monkeypatch.setattr(cm, "CACHE_DIR", tmp_path / "memory_exports")
+    monkeypatch.setattr(cm, "JOURNAL_PATH", path.with_name("memory.journal.jsonl"))
+    monkeypatch.setattr(cm, "COLD_PATH", path.with_name("memory.cold"))
+    monkeypatch.setattr(cm, "_cold", ColdStore(path.with_name("memory.cold")))
+    monkeypatch.setattr(cm, "DB_PATH", path.with_suffix(".sqlite3"))
+    monkeypatch.setattr(cm, "_db", None)
+    monkeypatch.setattr(cm, "BACKEND", "json")
+    monkeypatch.setattr(cm, "persist_enabled", True)
+    monkeypatch.setattr(cm, "conversation", [])
+    monkeypatch.setattr(cm, "memory_data", {})
+    monkeypatch.setattr(cm, "_journal_seq", 0)
+    monkeypatch.setattr(cm, "_journal_pending", 0)
+    yield cm
+    if cm._db is not None:
+        cm._db.close()
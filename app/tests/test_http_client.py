@@ -0,0 +1,20 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+urllib3_exc = pytest.importorskip("urllib3.exceptions")
+
+from systems.http_client import _should_retry  # noqa: E402
+
+
+def _connection_error(reason):
+    return requests.exceptions.ConnectionError(urllib3_exc.MaxRetryError(None, "/api/chat", reason))
+
+
+def test_post_retries_only_when_the_connection_was_never_made():
+    refused = _connection_error(urllib3_exc.NewConnectionError(None, "Connection refused"))
+    aborted = requests.exceptions.ConnectionError(urllib3_exc.ProtocolError("Connection aborted."))
+    assert _should_retry("POST", refused, None)
+    assert _should_retry("POST", requests.exceptions.ConnectTimeout("connect timed out"), None)
+    assert not _should_retry("POST", aborted, None)
+    assert not _should_retry("POST", requests.exceptions.ReadTimeout("read timed out"), None)
+    assert _should_retry("GET", aborted, None)
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from systems import inference
+from systems.inference import Cancelled, InferenceScheduler
+
+
+def _queue(sched, granted, cls, label, key=None):
+    return sched._enqueue(cls, label, key, lambda: granted.append(label))
+
+
+def test_waiting_requests_are_granted_by_priority_then_arrival():
+    sched = InferenceScheduler(max_concurrency=1, caps={cls: 1 for cls in inference.CLASSES})
+    granted = []
+    running = _queue(sched, granted, "chat", "first")
+    for cls, label in (("background", "bg"), ("discord", "dc"), ("chat", "chat2"), ("voice", "v1"), ("voice", "v2")):
+        _queue(sched, granted, cls, label)
+    order = []
+    while running is not None:
+        sched._release(running)
+        running = next(iter(sched._running.values()), None)
+        if running is not None:
+            order.append(running.label)
+    assert granted[0] == "first"
+    assert order == ["v1", "v2", "chat2", "dc", "bg"]
+
+
+def test_class_cap_lets_other_classes_through():
+    sched = InferenceScheduler(max_concurrency=2, caps={"voice": 1, "chat": 1, "discord": 1, "background": 1})
+    granted = []
+    _queue(sched, granted, "background", "bg1")
+    _queue(sched, granted, "background", "bg2")
+    _queue(sched, granted, "chat", "chat")
+    assert granted == ["bg1", "chat"]
+
+
+def test_newer_request_with_same_key_supersedes_queued_one():
+    sched = InferenceScheduler(max_concurrency=1)
+    granted = []
+    _queue(sched, granted, "chat", "busy")
+    old = _queue(sched, granted, "discord", "old", key="user-1")
+    _queue(sched, granted, "discord", "new", key="user-1")
+    assert (old.state, old.reason) == ("cancelled", "superseded")
+    with pytest.raises(Cancelled):
+        sched._outcome(old)
+
+
+def test_stale_request_is_cancelled_not_run_late():
+    sched = InferenceScheduler(max_concurrency=1, max_wait={cls: 0.05 for cls in inference.CLASSES})
+    with sched.slot("chat", label="busy"):
+        with pytest.raises(Cancelled):
+            with sched.slot("background", label="late"):
+                pass
+
+    async def _late():
+        async with sched.aslot("voice", label="ok"):
+            return "ran"
+
+    assert asyncio.run(_late()) == "ran"
+    assert sched.status()["classes"]["background"]["cancelled"] == 1
+
+
+def test_priority_sets_the_class_for_nested_calls():
+    assert inference.current_class() == "chat"
+    with inference.priority("voice"):
+        assert inference.current_class() == "voice"
+    assert inference.current_class() == "chat"
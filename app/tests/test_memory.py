@@ -0,0 +1,215 @@
+import json
+import threading
+
+import pytest
+
+from core.memory_cold import ColdStore
+
+
+def _record_events(cm):
+    events = []
+
+    def listener(event, entries):
+        events.append((event, [entry.content for entry in entries]))
+
+    cm.subscribe(listener)
+    events.clear()
+    return events, listener
+
+
+def test_trimming_the_hot_window_is_an_evict_not_a_remove(cm, monkeypatch):
+    monkeypatch.setattr(cm, "CACHE_HISTORY", 1)  # unpersisted JSON keeps 3 in RAM
+    cm.load_memory()
+    cm.set_persist_enabled(False)
+    events, listener = _record_events(cm)
+    try:
+        for i in range(4):
+            cm.log_conversation("user", f"turn {i}")
+        cm.delete_ids([cm.conversation[-1]["id"]])
+    finally:
+        cm.unsubscribe(listener)
+    assert ("evict", ["turn 0"]) in events
+    assert events[-1] == ("remove", ["turn 3"])
+    assert [e for e, _ in events].count("remove") == 1
+
+
+def _contents(cm):
+    return [entry.content for entry in cm.conversation]
+
+
+def test_journal_replays_turns_after_the_snapshot(cm):
+    cm.load_memory()
+    cm.log_conversation("user", "one")
+    cm.log_conversation("assistant", "two")
+    assert len(cm.JOURNAL_PATH.read_text(encoding="utf-8").splitlines()) == 2
+    assert json.loads(cm.MEMORY_PATH.read_text(encoding="utf-8"))["conversation"] == []
+    with cm.JOURNAL_PATH.open("a", encoding="utf-8") as handle:
+        handle.write('{"seq": 3, "op": "add", "entry": {"role": "us')  # torn by a crash
+
+    cm.load_memory()
+    assert _contents(cm) == ["one", "two"]
+    # replaying folds the journal into a fresh snapshot
+    assert [e["content"] for e in json.loads(cm.MEMORY_PATH.read_text(encoding="utf-8"))["conversation"]] == [
+        "one",
+        "two",
+    ]
+    assert not cm.JOURNAL_PATH.exists()
+
+
+def test_compaction_keeps_records_written_after_the_snapshot(cm):
+    cm.load_memory()
+    cm.log_conversation("user", "one")
+    cm.compact_memory()
+    assert not cm.JOURNAL_PATH.exists()
+    cm.log_conversation("assistant", "two")
+    cm.delete_ids([cm.conversation[0]["id"]])
+    records = [json.loads(line) for line in cm.JOURNAL_PATH.read_text(encoding="utf-8").splitlines()]
+    assert [rec["op"] for rec in records] == ["add", "delete"]
+    assert records[0]["seq"] > json.loads(cm.MEMORY_PATH.read_text(encoding="utf-8"))["journal_seq"]
+
+    cm.load_memory()
+    assert _contents(cm) == ["two"]
+
+
+def _spill(cm, monkeypatch, count, hot=2):
+    """Log `count` turns, then compact so all but `hot` of them move to the cold tier."""
+    monkeypatch.setattr(cm, "CACHE_HISTORY", hot)
+    monkeypatch.setattr(cm, "COLD_SPILL_MIN", 10**6)
+    cm.load_memory()
+    for i in range(count):
+        cm.log_conversation("user" if i % 2 else "assistant", f"turn {i}")
+    ids = [entry["id"] for entry in cm.conversation]
+    monkeypatch.setattr(cm, "COLD_SPILL_MIN", 1)
+    cm.compact_memory()
+    return ids
+
+
+def test_delete_by_id_reaches_hot_and_cold_entries(cm, monkeypatch):
+    ids = _spill(cm, monkeypatch, 5)
+    assert _contents(cm) == ["turn 3", "turn 4"]
+    assert len(cm._cold) == 3
+
+    assert cm.delete_ids([ids[1], ids[4], "no-such-id"]) == [ids[4], ids[1]]
+    assert not cm.has_entry(ids[1]) and not cm.has_entry(ids[4])
+    assert [e["content"] for e in cm.iter_history()] == ["turn 0", "turn 2", "turn 3"]
+    assert cm.delete_ids([ids[1]]) == []
+
+    # tombstones and the journaled delete survive a restart
+    monkeypatch.setattr(cm, "_cold", ColdStore(cm.COLD_PATH))
+    cm.load_memory()
+    assert [e["content"] for e in cm.iter_history()] == ["turn 0", "turn 2", "turn 3"]
+
+
+def test_ids_are_stable_across_reloads(cm):
+    cm.load_memory()
+    cm.log_conversation("user", "same text")
+    cm.log_conversation("assistant", "same text")
+    before = [entry["id"] for entry in cm.conversation]
+    cm.load_memory()
+    assert [entry["id"] for entry in cm.conversation] == before
+    assert cm.get_entry(before[0]).role == "user"
+
+
+def _exported(cm, **filters):
+    return [entry["content"] for entry in cm.iter_export(**filters)]
+
+
+def test_export_resumes_after_cursor_across_tiers(cm, monkeypatch):
+    ids = _spill(cm, monkeypatch, 5)
+    assert _exported(cm, cursor=ids[1]) == ["turn 2", "turn 3", "turn 4"]
+    assert _exported(cm, cursor=ids[3]) == ["turn 4"]
+    assert _exported(cm, cursor=ids[1], roles={"user"}) == ["turn 3"]
+    assert _exported(cm, cursor=ids[4]) == []
+
+
+def test_export_cursor_that_was_deleted_fails_up_front(cm, monkeypatch):
+    # the /memory/export/stream endpoint turns this KeyError into a 410
+    ids = _spill(cm, monkeypatch, 5)
+    cm.delete_ids([ids[0], ids[3]])
+    for gone in (ids[0], ids[3], "never-existed"):
+        with pytest.raises(KeyError):
+            cm.iter_export(cursor=gone)
+
+
+def test_export_cursor_on_sqlite(cm, monkeypatch):
+    monkeypatch.setattr(cm, "BACKEND", "sqlite")
+    cm.load_memory()
+    cm.add_entries([("user", "a", "2024-01-01T00:00:00Z"), ("assistant", "b", "2024-02-01T00:00:00Z")])
+    first = cm.conversation[0]["id"]
+    assert _exported(cm, cursor=first) == ["b"]
+    assert _exported(cm, since="2024-02") == ["b"]
+    cm.delete_ids([first])
+    with pytest.raises(KeyError):
+        cm.iter_export(cursor=first)
+
+
+def test_find_stored_content_sees_spilled_entries(cm, monkeypatch):
+    ids = _spill(cm, monkeypatch, 5)
+    assert cm.find_stored_content("turn 1") == ids[1]
+    assert cm.find_stored_content("turn 1", role="assistant") is None
+    assert cm.find_stored_content("turn") is None  # exact content only
+    cm.delete_ids([ids[1]])
+    assert cm.find_stored_content("turn 1") is None
+
+
+def test_cold_search_opens_only_the_newest_segments(cm, monkeypatch):
+    monkeypatch.setattr(cm, "CACHE_HISTORY", 1)
+    cm.load_memory()
+    for text in ("old pelican sighting", "newer pelican sighting", "filler"):
+        monkeypatch.setattr(cm, "COLD_SPILL_MIN", 10**6)
+        cm.log_conversation("user", text)
+        monkeypatch.setattr(cm, "COLD_SPILL_MIN", 1)
+        cm.compact_memory()  # spills the previous turn into its own segment
+    assert cm._cold.status()["segments"] == 2
+    assert [e["content"] for e in cm.search_memories("pelican")] == ["old pelican sighting", "newer pelican sighting"]
+
+    monkeypatch.setattr(cm, "COLD_SEARCH_SEGMENTS", 1)
+    cm._cold._indexes.clear()
+    assert [e["content"] for e in cm.search_memories("pelican")] == ["newer pelican sighting"]
+    assert [e["content"] for e in cm.recall_memories("pelican", mode="bm25")] == ["newer pelican sighting"]
+    assert len(cm._cold._indexes) == 1
+
+
+def test_replace_during_a_running_compaction_is_not_lost(cm, monkeypatch):
+    cm.load_memory()
+    cm.log_conversation("user", "keep me out")
+    cm.log_conversation("assistant", "and me")
+    snapshotted, resume = threading.Event(), threading.Event()
+    persist = cm._persist_memory_file
+
+    def slow_persist(snapshot):
+        snapshotted.set()
+        resume.wait(5)
+        return persist(snapshot)
+
+    monkeypatch.setattr(cm, "_persist_memory_file", slow_persist)
+    worker = threading.Thread(target=cm.compact_memory)
+    worker.start()
+    assert snapshotted.wait(5)
+    cm.replace_conversation([{"role": "user", "content": "edited"}])  # lands after the snapshot
+    resume.set()
+    worker.join(5)
+
+    on_disk = json.loads(cm.MEMORY_PATH.read_text(encoding="utf-8"))["conversation"]
+    assert [e["content"] for e in on_disk] == ["edited"]
+    cm.load_memory()
+    assert _contents(cm) == ["edited"]
+
+
+def test_replace_is_journaled_before_the_snapshot(cm):
+    cm.load_memory()
+    cm.log_conversation("user", "before")
+    with cm._compact_lock:  # a compaction is busy elsewhere
+        cm.replace_conversation([{"role": "user", "content": "after"}])
+        records = [json.loads(line) for line in cm.JOURNAL_PATH.read_text(encoding="utf-8").splitlines()]
+        assert records[-1]["op"] == "replace"
+        cm.load_memory()  # a crash here replays the journal
+        assert _contents(cm) == ["after"]
+
+
+def test_recent_entries_filters_roles_oldest_first(cm):
+    cm.load_memory()
+    cm.add_entries([("user", "q1", None), ("system", "note", None), ("assistant", "a1", None), ("user", "q2", None)])
+    assert [e.content for e in cm.recent_entries(2, roles={"user", "assistant"})] == ["a1", "q2"]
+    assert [e.content for e in cm.recent_entries(10)] == ["q1", "note", "a1", "q2"]
+    assert cm.recent_entries(0) == []
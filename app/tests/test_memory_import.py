@@ -0,0 +1,52 @@
+import json
+
+from core.memory_import import ChatGPTImporter, conversation_entries
+
+EXPORT = [
+    {
+        "create_time": 1700000000,
+        "mapping": {
+            "a": {"message": {"author": {"role": "user"}, "content": {"parts": ["hi there"]}}},
+            "b": {"message": {"author": {"role": "assistant"}, "content": {"parts": ["hello"]}, "create_time": 1700000050}},
+        },
+    },
+    {"mapping": {"c": {"message": {"author": {"role": "user"}, "content": {"parts": ["undated"]}}}}},
+]
+
+
+def _import(cm, tmp_path):
+    upload = tmp_path / "conversations.json"
+    upload.write_text(json.dumps(EXPORT), encoding="utf-8")
+    importer = ChatGPTImporter(state_path=tmp_path / "import_state.json")
+
+    def sink(items):
+        return cm.add_entries([(role, text, ts) for text, role, ts in items], dedupe=False)
+
+    importer.start(upload, "conversations.json", sink)
+    importer._thread.join(5)
+    return importer.status()
+
+
+def test_messages_without_create_time_get_stable_timestamps():
+    first, _ = conversation_entries(EXPORT[0])
+    again, _ = conversation_entries(json.loads(json.dumps(EXPORT[0])))
+    assert first == again
+    assert first[0][2].startswith("2023-11-14T22:13:20")  # the conversation's create_time
+    assert first[1][2].startswith("2023-11-14T22:14:10")  # its own create_time
+    undated, _ = conversation_entries(EXPORT[1])
+    assert undated[0][2].startswith("1970-01-01")
+
+
+def test_reimport_skips_turns_already_in_the_cold_tier(cm, monkeypatch):
+    monkeypatch.setattr(cm, "CACHE_HISTORY", 1)
+    monkeypatch.setattr(cm, "COLD_SPILL_MIN", 10**6)
+    cm.load_memory()
+    status = _import(cm, cm.MEMORY_PATH.parent)
+    assert status["status"] == "done" and status["imported"] == 3
+    monkeypatch.setattr(cm, "COLD_SPILL_MIN", 1)
+    cm.compact_memory()
+    assert len(cm._cold) == 2
+
+    status = _import(cm, cm.MEMORY_PATH.parent)
+    assert status["imported"] == 0 and status["duplicates"] == 3
+    assert len(list(cm.iter_history())) == 3
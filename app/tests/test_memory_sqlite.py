@@ -0,0 +1,96 @@
+from core.memory_record import MemoryRecord
+from core.memory_sqlite import SqliteMemoryBackend
+
+
+def _seed_db(cm, count):
+    db = SqliteMemoryBackend(cm.DB_PATH)
+    db.insert_entries(
+        [
+            {"role": "user" if i % 2 else "assistant", "content": f"turn {i}", "timestamp": f"2024-01-01T00:00:{i:02d}Z"}
+            for i in range(count)
+        ]
+    )
+    db.close()
+
+
+def test_load_from_non_empty_db_gives_records(cm, monkeypatch):
+    monkeypatch.setattr(cm, "BACKEND", "sqlite")
+    _seed_db(cm, 5)
+    cm.load_memory()
+    assert len(cm.conversation) == 5
+    assert all(isinstance(entry, MemoryRecord) for entry in cm.conversation)
+
+    seen = []
+
+    def listener(event, entries):
+        seen.append((event, [entry.role for entry in entries]))
+
+    cm.subscribe(listener)
+    try:
+        cm.log_conversation("user", "hello again")
+    finally:
+        cm.unsubscribe(listener)
+    assert seen[0] == ("reset", ["assistant", "user", "assistant", "user", "assistant"])
+    assert seen[1] == ("add", ["user"])
+    assert cm._get_db().count() == 6
+
+
+def test_subscribe_survives_a_failing_listener(cm):
+    cm.load_memory()
+    cm.log_conversation("user", "hi")
+
+    def broken(event, entries):
+        raise AttributeError("boom")
+
+    cm.subscribe(broken)
+    try:
+        cm.log_conversation("assistant", "hello")
+    finally:
+        cm.unsubscribe(broken)
+    assert [entry.content for entry in cm.conversation] == ["hi", "hello"]
+
+
+def test_migrator_copies_cold_hot_and_journal_in_order(cm, monkeypatch):
+    monkeypatch.setattr(cm, "CACHE_HISTORY", 2)
+    monkeypatch.setattr(cm, "COLD_SPILL_MIN", 10**6)
+    cm.load_memory()
+    for i in range(4):
+        cm.log_conversation("user", f"turn {i} about apples" if i == 0 else f"turn {i}")
+    monkeypatch.setattr(cm, "COLD_SPILL_MIN", 1)
+    cm.compact_memory()  # turns 0-1 cold, 2-3 in memory.json
+    monkeypatch.setattr(cm, "COLD_SPILL_MIN", 10**6)  # no background spill of turn 2
+    cm.log_conversation("assistant", "turn 4")  # journal only
+    cm.log_story_entry({"title": "tale"})
+    expected = [(e["id"], e["content"]) for e in cm.iter_history()]
+
+    db = SqliteMemoryBackend(cm.DB_PATH.with_name("migrated.sqlite3"))
+    try:
+        assert cm.migrate_json_to_sqlite(db) == 5
+        assert [(e["id"], e["content"]) for e in db.iter_entries()] == expected
+        assert db.stories() == [{"title": "tale"}]
+        assert db.get_meta("migrations")["sqlite_migrated"]
+        assert [hit["content"] for _, hit in db.search(["apples"])] == ["turn 0 about apples"]
+        assert [hit["content"] for _, hit in db.search(["apples"], skip_newest=4)] == ["turn 0 about apples"]
+        assert db.search(["apples"], skip_newest=5) == []
+    finally:
+        db.close()
+
+
+def test_sqlite_backend_applies_journal_records(cm, monkeypatch):
+    monkeypatch.setattr(cm, "BACKEND", "sqlite")
+    cm.load_memory()
+    cm.add_entries([("user", "a", None), ("assistant", "b", None), ("user", "c", None)])
+    cm.delete_ids([cm.conversation[1]["id"]])
+    cm.prune_recent_conversation(1)
+    db = cm._get_db()
+    assert [e["content"] for e in db.iter_entries()] == ["a"]
+    assert db.has_uid(cm.conversation[0]["id"])
+
+
+def test_find_stored_content_uses_the_content_hash(cm, monkeypatch):
+    monkeypatch.setattr(cm, "BACKEND", "sqlite")
+    cm.load_memory()
+    cm.add_entries([("system", "Primer: be kind.", None), ("user", "Primer: be kind.", None)])
+    assert cm.find_stored_content("Primer: be kind.", role="system") == cm.conversation[0]["id"]
+    assert cm.find_stored_content("Primer: be kind.") == cm.conversation[1]["id"]
+    assert cm.find_stored_content("Primer: be kind") is None
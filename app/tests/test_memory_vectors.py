@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from core import issue_log, memory_vectors as mv
+
+pytestmark = pytest.mark.skipif(mv.np is None, reason="numpy not installed")
+
+
+class _FakeOllama(mv.HashingEmbedder):
+    """Hashing vectors under the Ollama name, with a switch to make every call fail."""
+
+    name = "ollama"
+    model = "fake-embed"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fail = False
+        self.calls = 0
+
+    def embed(self, texts, timeout=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("connection refused")
+        return super().embed(texts)
+
+
+def _index(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(issue_log, "LOG_PATH", tmp_path / "issues.log")
+    monkeypatch.setattr(mv, "EMBED_BACKEND", backend)
+    index = mv.SemanticIndex(tmp_path / "memory.json")
+    fake = _FakeOllama()
+    index.store = mv.VectorStore(index.base_path, fake)
+    return index, fake
+
+
+def _settle(index, rows=None):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        idle = index._worker is None or not index._worker.is_alive() or index._queue.empty()
+        if idle and (rows is None or len(index.store) == rows):
+            time.sleep(0.05)
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"embedding did not settle: {index.status()}")
+
+
+def test_failed_query_embed_falls_back_to_bm25(cm, tmp_path, monkeypatch):
+    index, fake = _index(tmp_path, monkeypatch, "ollama")
+    monkeypatch.setattr(cm, "_vectors", index)
+    cm.subscribe(cm._vector_listener)
+    try:
+        cm.load_memory()
+        cm.log_conversation("user", "my sister grows apples in the orchard")
+        cm.log_conversation("assistant", "that sounds lovely")
+        _settle(index, rows=2)
+        assert index.search("apples orchard")
+
+        fake.fail = True
+        calls = fake.calls
+        hits = cm.recall_memories("apples orchard", mode="semantic")
+        assert [hit["content"] for hit in hits] == ["my sister grows apples in the orchard"]
+        assert fake.calls == calls + 1
+        # the failure opens a short breaker: later queries don't wait on Ollama again
+        assert index.search("apples orchard") == []
+        assert fake.calls == calls + 1
+    finally:
+        cm.unsubscribe(cm._vector_listener)
+
+
+def test_ollama_down_switches_to_hashing_and_back(tmp_path, monkeypatch):
+    index, fake = _index(tmp_path, monkeypatch, "auto")
+    up = [True]
+    index.health = lambda: up[0]
+    index.add({"role": "user", "content": "the cat sleeps on the piano"})
+    _settle(index, rows=1)
+
+    up[0] = False
+    calls = fake.calls
+    assert index.search("cat piano") == []  # Ollama store, Ollama down: no semantic hits
+    _settle(index, rows=1)
+    assert index.store.embedder.name == "hash"
+    assert [entry["content"] for _, entry in index.search("cat piano")] == ["the cat sleeps on the piano"]
+    assert fake.calls == calls
+
+
+def test_failed_batch_is_requeued(tmp_path, monkeypatch):
+    index, fake = _index(tmp_path, monkeypatch, "ollama")
+    monkeypatch.setattr(mv, "EMBED_RETRY_AFTER", 0.0)
+    fake.fail = True
+    index.add({"role": "user", "content": "first"})
+    index.add({"role": "assistant", "content": "second"})
+    _settle(index)
+    assert len(index.store) == 0
+    assert index.status()["pending"] >= 1 and "refused" in index.status()["error"]
+
+    fake.fail = False
+    index.add({"role": "user", "content": "third"})
+    _settle(index, rows=3)
+    assert index.status()["pending"] == 0
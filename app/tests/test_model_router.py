@@ -0,0 +1,36 @@
+from systems.model_router import ModelRouter
+
+
+def test_routing_is_off_without_a_small_model():
+    route = ModelRouter(small_model="").route("ok thanks", "chat", "big:7b", installed=["big:7b"])
+    assert (route.name, route.model, route.reason) == ("large", "big:7b", "router_off")
+
+
+def test_small_model_only_when_known_to_be_installed():
+    router = ModelRouter(small_model="tiny")
+    assert router.route("ok thanks", "chat", "big:7b", installed=["tiny:latest", "big:7b"]).model == "tiny"
+    assert router.route("ok thanks", "chat", "big:7b", installed=None).reason == "models_unknown"
+    assert router.route("ok thanks", "chat", "big:7b", installed=[]).reason == "small_model_missing"
+
+
+def test_intent_length_and_source():
+    router = ModelRouter(small_model="tiny", short_chars=20)
+    installed = ["tiny", "big"]
+    assert router.route("why is the sky blue", "chat", "big", installed).reason == "deep_intent"
+    assert router.route("turn off the lights", "chat", "big", installed).reason == "command"
+    banter = "the cat is asleep on my desk"
+    assert router.route(banter, "chat", "big", installed).reason == "long"
+    assert router.route(banter, "voice", "big", installed).name == "small"
+
+
+def test_escalation_goes_to_the_large_model_and_is_counted():
+    router = ModelRouter(small_model="tiny")
+    route = router.route("hey", "chat", "big", installed=["tiny", "big"])
+    router.record(route, 0.05)
+    escalated = router.escalate(route, "memory_guard")
+    router.record(escalated, 0.5)
+    assert (escalated.name, escalated.model, escalated.reason) == ("large", "big", "escalated:memory_guard")
+    stats = router.stats()
+    assert stats["routes"]["small"]["escalations"] == {"memory_guard": 1}
+    assert stats["routes"]["large"]["requests"] == 1
+    assert stats["reasons"] == {"ack": 1}
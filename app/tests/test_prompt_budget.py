@@ -0,0 +1,59 @@
+from core.prompt_budget import MESSAGE_OVERHEAD, PromptAssembler, estimate_tokens
+
+
+def _names(prompt):
+    return [block["name"] for block in prompt.report()["blocks"] if block["status"] != "dropped"]
+
+
+def test_lowest_priority_blocks_are_dropped_first_and_order_is_kept():
+    prompt = PromptAssembler("test", budget=3 * (25 + MESSAGE_OVERHEAD), prefix_budget=128)
+    for name, priority in (("a", 3), ("b", 1), ("c", 2), ("d", 4)):
+        prompt.add(name, name * 100, priority)  # 25 tokens each
+    messages = prompt.build()
+    assert [m["content"][0] for m in messages] == ["a", "b", "c"]
+    report = prompt.report()
+    assert report["used"] <= report["budget"]
+    assert {b["name"]: b["status"] for b in report["blocks"]}["d"] == "dropped"
+
+
+def test_priority_zero_is_kept_over_budget():
+    prompt = PromptAssembler("test", budget=256, prefix_budget=128)
+    prompt.add("system", "x" * 4000, 0)
+    prompt.add("extra", "y" * 40, 1)
+    assert prompt.build() == [{"role": "system", "content": "x" * 4000}]
+    assert _names(prompt) == ["system"]
+
+
+def test_blocks_that_allow_it_are_cut_to_the_remaining_space():
+    prompt = PromptAssembler("test", budget=300, prefix_budget=128)
+    prompt.add("recent", "a" * 800, 1)  # 204 tokens
+    prompt.add("history", "old " * 100 + "newest", 2, keep="tail")
+    prompt.add("notes", "start " + "z" * 1000, 3, keep="head")
+    messages = prompt.build()
+    history = messages[1]["content"]
+    assert history.startswith("…") and history.endswith("newest")
+    assert estimate_tokens(history) + MESSAGE_OVERHEAD <= 300 - 204
+    assert [b["status"] for b in prompt.report()["blocks"]] == ["kept", "truncated", "dropped"]
+
+
+def test_stable_blocks_lead_and_version_the_prefix():
+    def build(turn):
+        prompt = PromptAssembler("test", budget=1024, prefix_budget=256)
+        prompt.add("recall", f"memory for {turn}", 2)
+        prompt.add("primer", "You are Phoenix.", 0, stable=True)
+        prompt.add("user", turn, 0, role="user")
+        prompt.add("identity", "Tone: warm.", 1, stable=True)
+        return prompt, prompt.build()
+
+    first, messages = build("hello")
+    second, _ = build("what's up")
+    assert [m["content"] for m in messages[:2]] == ["You are Phoenix.", "Tone: warm."]
+    assert first.prefix_version() == second.prefix_version()
+    assert first.report()["prefix_tokens"] == 2 * MESSAGE_OVERHEAD + estimate_tokens("You are Phoenix.") + estimate_tokens(
+        "Tone: warm."
+    )
+
+    changed = PromptAssembler("test", budget=1024, prefix_budget=256)
+    changed.add("primer", "You are Phoenix!", 0, stable=True)
+    changed.build()
+    assert changed.prefix_version() != first.prefix_version()
@@ -0,0 +1,35 @@
+from core.reply_cache import REPLY_CACHE_HISTORY, ReplyCache, history_context, is_follow_up
+
+
+def _key(message, history):
+    return ReplyCache.key(message, ("persona", history_context(message, history)))
+
+
+def test_same_question_twice_in_a_row_hits():
+    cache = ReplyCache(max_items=8, ttl=60)
+    history = [("user", "hi"), ("assistant", "Hello!")]
+    assert cache.get("ai_local", _key("What's my name?", history)) is None
+    cache.put("ai_local", _key("What's my name?", history), "You're Sam.")
+    # the answered exchange is now part of the conversation
+    history += [("user", "What's my name?"), ("assistant", "You're Sam.")]
+    assert cache.get("ai_local", _key("what's my name", history)) == "You're Sam."
+    assert cache.stats()["sources"]["ai_local"]["hits"] == 1
+
+
+def test_follow_up_misses_in_a_different_conversation():
+    cache = ReplyCache(max_items=8, ttl=60)
+    before = [("user", "should I book the 9am train?"), ("assistant", "Yes, it's the fastest.")]
+    after = before + [("user", "can you delete my notes?"), ("assistant", "Are you sure?")]
+    cache.put("ai_local", _key("yes", before), "Booked it.")
+    assert cache.get("ai_local", _key("Yes!", before)) == "Booked it."
+    assert cache.get("ai_local", _key("yes", after)) is None
+
+
+def test_only_follow_ups_carry_history():
+    for message in ("yes", "why?", "what did I just say?", "tell me more about it", ""):
+        assert is_follow_up(message), message
+    for message in ("what's my name", "status", "set a timer for ten minutes"):
+        assert not is_follow_up(message), message
+    turns = [("user", str(i)) for i in range(REPLY_CACHE_HISTORY + 3)]
+    assert history_context("why?", turns) == tuple(turns[-REPLY_CACHE_HISTORY:])
+    assert history_context("what's my name", turns) == ()
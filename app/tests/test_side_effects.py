@@ -0,0 +1,57 @@
+import threading
+
+from systems import side_effects
+from systems.side_effects import SideEffectWorker
+
+
+def test_full_queue_keeps_submission_order():
+    worker = SideEffectWorker(max_queue=1, batch_size=1, full_wait=0.01)
+    written = []
+    worker.register_batch("memory", written.extend)
+    gate = threading.Event()
+    assert worker.submit(gate.wait, 5) is True  # holds the only slot
+    assert worker.submit_batch("memory", "user") is False
+    assert worker.submit_batch("memory", "assistant") is False
+    gate.set()
+    assert worker.flush(2)
+    assert written == ["user", "assistant"]
+    assert worker.status()["overflowed"] == 2
+    # overflow debt is repaid, so the bound is back to one free slot
+    assert worker.submit_batch("memory", "next") is True
+    assert worker.flush(2) and written[-1] == "next"
+
+
+def test_jobs_under_one_batch_name_are_written_together():
+    worker = SideEffectWorker(max_queue=10)
+    calls = []
+    worker.register_batch("memory", lambda items: calls.append(list(items)))
+    gate = threading.Event()
+    worker.submit(gate.wait, 5)
+    for item in ("u1", "a1", "u2"):
+        worker.submit_batch("memory", item)
+    gate.set()
+    assert worker.flush(2)
+    assert calls == [["u1", "a1", "u2"]]
+
+
+def test_a_failing_job_is_counted_and_does_not_stop_the_worker():
+    worker = SideEffectWorker(max_queue=10)
+    done = []
+    worker.submit(lambda: 1 / 0)
+    worker.submit(done.append, "ok")
+    assert worker.flush(2)
+    status = worker.status()
+    assert done == ["ok"] and status["failed"] == 1 and status["completed"] == 1
+
+
+def test_a_slow_network_delivery_does_not_hold_up_memory_writes():
+    written = []
+    side_effects.register_batch("test_memory", written.extend)
+    gate = threading.Event()
+    side_effects.submit_network(gate.wait, 5)  # e.g. an SMTP server taking its time
+    side_effects.submit_batch("test_memory", "user")
+    assert side_effects.worker.flush(2)
+    assert written == ["user"]
+    assert side_effects.status()["network"]["pending"] == 1
+    gate.set()
+    assert side_effects.flush(2)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""bench_memory_search.py
+Compare core.memory.search_memories (inverted index) against the old linear
+scan on synthetic conversations, and check both return the same hits.
+
+Usage: python tools/bench_memory_search.py [--sizes 1000,26000,100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+# Never touch the real memory file while benchmarking.
+os.environ["MEMORY_PATH"] = str(Path(tempfile.mkdtemp(prefix="phx_bench_")) / "memory.json")
+
+from core import memory as cm  # noqa: E402
+
+WORDS = (
+    "phoenix bjorgsun memory father titan pilot orb music spotify reminder vision audio "
+    "story kaelithar leyline oath rule creator voice mood calm worry glad sleep wake home "
+    "away discord stream game coach tablet drive backup sync update module profile owner "
+    "night morning coffee dinner raid boss build loadout map match ping server handoff"
+).split()
+
+
+def _synthetic(count: int, rng: random.Random) -> list[dict]:
+    roles = ["user", "assistant", "system"]
+    entries = []
+    for idx in range(count):
+        words = rng.choices(WORDS, k=rng.randint(6, 40))
+        words.append(f"tag{rng.randint(0, count // 10 + 1)}")
+        entries.append(
+            {"role": rng.choice(roles), "content": " ".join(words), "timestamp": f"idx-{idx}"}
+        )
+    return entries
+
+
+def _queries(count: int, size: int, rng: random.Random) -> list[str]:
+    out = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            out.append(" ".join(rng.sample(WORDS, 2)))
+        elif kind < 0.7:
+            out.append(f"{rng.choice(WORDS)} tag{rng.randint(0, size // 10 + 1)}")
+        elif kind < 0.9:
+            out.append(rng.choice(WORDS)[:4])
+        else:
+            out.append("what do you remember about the nonexistentthing")
+    return out
+
+
+def _time(fn, queries: list[str]) -> tuple[float, list]:
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append(fn(q, max_hits=8))
+    return (time.perf_counter() - start) / max(1, len(queries)) * 1000.0, results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,26000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=26)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    cm.persist_enabled = False
+    print(f"{'entries':>8}  {'build ms':>9}  {'scan ms/q':>10}  {'index ms/q':>11}  {'speedup':>8}  match")
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        entries = _synthetic(size, rng)
+        start = time.perf_counter()
+        cm.replace_conversation(entries)
+        build_ms = (time.perf_counter() - start) * 1000.0
+        queries = _queries(args.queries, size, rng)
+        scan_ms, scan_hits = _time(cm._scan_memories, queries)
+        index_ms, index_hits = _time(cm.search_memories, queries)
+        same = scan_hits == index_hits
+        speedup = scan_ms / index_ms if index_ms else float("inf")
+        print(f"{size:>8}  {build_ms:>9.1f}  {scan_ms:>10.3f}  {index_ms:>11.3f}  {speedup:>7.1f}x  {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
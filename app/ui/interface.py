@@ -102,7 +102,7 @@ from core import mood, reflection, user_profile
 from runtime import coreloop
 from systems import audio, audio_sense, discord_bridge, gaming_bridge, notify
 from systems import reloader as _reloader
-from systems import stories, stt, therapy
+from systems import inference, stories, stt, therapy
 from ui import theme
 from ui.clock_window import ClockWindow
 from ui.logs_window import LogsWindow
@@ -8636,7 +8636,8 @@ class BjorgsunUI:
                         pass
 
                     # Compute reply and speak
-                    reply = coreloop.process_input(text)
+                    with inference.priority("voice"):
+                        reply = coreloop.process_input(text)
                     if self.voice_enabled:
                         audio.speak(reply)
                     else:
@@ -8673,7 +8674,8 @@ class BjorgsunUI:
                                 coreloop.touch_activity()
                             except Exception:
                                 pass
-                            reply = coreloop.process_input(text)
+                            with inference.priority("voice"):
+                                reply = coreloop.process_input(text)
                             if self.voice_enabled:
                                 audio.speak(reply)
                             else:
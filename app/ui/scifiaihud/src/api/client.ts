@@ -101,6 +101,27 @@ export async function importChatGPT(file: File) {
   return res.json();
 }
 
+export function memoryExportStreamUrl(opts?: {
+  since?: string;
+  until?: string;
+  role?: string;
+  cursor?: string;
+  gzip?: boolean;
+}) {
+  const params = new URLSearchParams();
+  Object.entries(opts || {}).forEach(([key, value]) => {
+    if (value !== undefined && value !== '' && value !== false) params.set(key, String(value));
+  });
+  const qs = params.toString();
+  return `${BASE_URL}/memory/export/stream${qs ? `?${qs}` : ''}`;
+}
+
+export async function getChatGPTImportStatus() {
+  return apiGet<{ status: string; progress?: number; imported?: number; skipped?: number; error?: string }>(
+    '/memory/import/status',
+  );
+}
+
 export async function setRazerLighting(mode: 'dormant' | 'wake' | 'alert' | 'freq', opts?: { hz?: number; amp?: number; devices?: string[] }) {
   return apiPost('/razer/lighting', { mode, ...(opts || {}) });
 }
@@ -156,6 +177,53 @@ export async function chatLocal(message: string, history?: { role: string; conte
   return apiPost<{ ok: boolean; reply: string }>('/ai/local', { message, history });
 }
 
+export type ChatStreamDone = { ok: boolean; reply: string; source?: string; actions?: any[] };
+
+// /ai/local/stream: NDJSON token events, then a final "done" payload (same shape as /ai/local).
+// onText receives the reply text accumulated so far; "reset" events restart it.
+export async function chatLocalStream(
+  message: string,
+  history: { role: string; content: string }[] | undefined,
+  onText: (text: string) => void,
+): Promise<ChatStreamDone> {
+  const res = await fetch(`${BASE_URL}/ai/local/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'application/x-ndjson' },
+    body: JSON.stringify({ message, history }),
+  });
+  if (!res.ok || !res.body) throw new Error(`POST /ai/local/stream -> ${res.status}`);
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let text = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    let newline = buffer.indexOf('\n');
+    while (newline >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      newline = buffer.indexOf('\n');
+      if (!line) continue;
+      const event = JSON.parse(line);
+      if (event.type === 'token') {
+        text += event.text || '';
+        onText(text);
+      } else if (event.type === 'reset') {
+        text = '';
+        onText(text);
+      } else if (event.type === 'done') {
+        const { type: _type, ...payload } = event;
+        return payload as ChatStreamDone;
+      } else if (event.type === 'error') {
+        throw new Error(event.detail || 'stream failed');
+      }
+    }
+    if (done) break;
+  }
+  throw new Error('stream ended without a reply');
+}
+
 // Phoenix-15 integration
 export async function getPhoenixState(): Promise<{ ok: boolean; state: PhoenixState }> {
   return apiGet('/phoenix/state');
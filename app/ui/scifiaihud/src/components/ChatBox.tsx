@@ -1,7 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { motion, AnimatePresence } from 'motion/react';
 import { Send, Terminal, Eye, EyeOff, Ear, EarOff, Brain, CheckSquare } from 'lucide-react';
-import { addMemory, getCoach, chatLocal, ttsEdge } from '../api/client';
+import { addMemory, getCoach, chatLocalStream, ttsEdge } from '../api/client';
 import alertSuccess from '../assets/alert_success.wav';
 import alertInfo from '../assets/alert_info.wav';
 
@@ -114,23 +114,32 @@ export function ChatBox({ isAwake, onStatusChange, replyChime, chimeVolume, voic
     addMemory(userMessage.text).catch(() => {});
 
     (async () => {
+      const replyId = `${userMessage.id}-reply`;
       try {
         const history = messages.slice(-6).map((m) => ({
           role: m.type === 'user' ? 'user' : 'assistant',
           content: m.text,
         }));
-        const data = await chatLocal(userMessage.text, history);
+        const showReply = (text: string) =>
+          setMessages((prev) => {
+            if (prev.some((m) => m.id === replyId)) {
+              return prev.map((m) => (m.id === replyId ? { ...m, text } : m));
+            }
+            const reply: Message = { id: replyId, type: 'ai', text, timestamp: new Date().toLocaleTimeString() };
+            return [...prev, reply];
+          });
+        let streaming = false;
+        const data = await chatLocalStream(userMessage.text, history, (partial) => {
+          if (!streaming) {
+            streaming = true;
+            onStatusChange('speaking');
+          }
+          showReply(partial);
+        });
         const tip = data.reply || 'Acknowledged.';
         onStatusChange('speaking');
-        setMessages((prev) => [
-          ...prev,
-          {
-            id: (Date.now() + 1).toString(),
-            type: 'ai',
-            text: tip,
-            timestamp: new Date().toLocaleTimeString(),
-          },
-        ]);
+        // the final reply can differ from the streamed text (memory guard, action blocks)
+        showReply(tip);
         const res = voiceMode && !isHushed ? await speakText(tip, chimeVolume) : { dur: 0, tts: false };
         if (!voiceMode && replyChime && systemSounds && !isHushed) {
           playChime(chimeVolume, alertInfo);
@@ -140,6 +149,8 @@ export function ChatBox({ isAwake, onStatusChange, replyChime, chimeVolume, voic
           setTimeout(() => onStatusChange('listening'), fallback * 1000);
         }
       } catch (err: any) {
+        // drop any partially streamed reply before the fallback message
+        setMessages((prev) => prev.filter((m) => m.id !== replyId));
         try {
           const data = await getCoach();
           const tip = Array.isArray(data?.coach?.advice) ? data.coach.advice[0] : 'Acknowledged.';